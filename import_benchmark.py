@@ -0,0 +1,62 @@
+"""
+Guards how long `import kirky` takes.
+
+Times `python -c "import kirky"` in fresh interpreters against `python -c "import numpy,
+scipy.sparse"` (which kirky cannot do without), and fails if kirky's own share of the median goes
+over the budget, or if importing it loads any of the modules that are only imported on first use.
+
+    python import_benchmark.py [--runs 10] [--budget 0.15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+LAZY_MODULES = ['matplotlib', 'pyx', 'scipy.optimize', 'highspy', 'kirky.stencil']
+
+
+def time_import(statement, runs):
+    """
+    Returns the wall clock time of running statement in a fresh interpreter, once per run.
+    """
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True, env=environment)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def get_loaded_lazy_modules():
+    statement = "import sys, kirky; print(' '.join(m for m in %r if m in sys.modules))" % LAZY_MODULES
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', statement], check=True, env=environment, capture_output=True)
+    return output.stdout.decode().split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time import kirky.")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=0.15, help="seconds kirky may add to numpy and scipy.sparse")
+    arguments = parser.parse_args()
+    time_import("import kirky", 1)
+    baseline = statistics.median(time_import("import numpy, scipy.sparse", arguments.runs))
+    kirky = statistics.median(time_import("import kirky", arguments.runs))
+    print("import numpy, scipy.sparse: %.3fs" % baseline)
+    print("import kirky:               %.3fs (%.3fs on top, budget %.3fs)" % (kirky, kirky - baseline, arguments.budget))
+    loaded = get_loaded_lazy_modules()
+    failed = False
+    if loaded:
+        print("import kirky loads %s, which should only be imported on first use" % ", ".join(loaded))
+        failed = True
+    if kirky - baseline > arguments.budget:
+        print("import kirky is over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,3 @@
-import numpy as np
-from .block_q import Frame
-from scipy.optimize import linprog
-from .imagine import draw_graph, draw_graph_slider
 """
 The Kirchhoff class represents a Kirchhoff matrix and provides methods for matrix manipulation.
 
@@ -17,26 +13,72 @@ Methods:
     augment_identity(self): Augments the matrix with an identity matrix.
     reduce_matrix(self): Reduces the matrix by dividing all elements by their greatest common divisor.
 """
+import time
 import numpy as np
+from .block_q import Frame
+from .array_frame import ArrayFrame
+from .zonotope_frame import ZonotopeFrame, BallFrame
+from scipy import sparse
+from .verify import verify_weights, verify_cycle_space
+from .backends import get_backend, choose_backend, SolverResult
+from .session import find_dual_ray, MIN_BUDGET
+from .growth import get_vertex_blame, get_dimension_blame, choose_growth
+from .lattice import reduce_rows
+from .screening import screen
+from .presolve import presolve
+from .result import FindResult
+
+STENCIL_MIN_EDGES = 10**4
+
+
+def __getattr__(name):
+    """
+    The drawing functions are imported on first use: matplotlib takes longer to import than the
+    rest of kirky together, and solving never needs it.
+    """
+    if name in ('draw', 'draw_graph', 'draw_graph_slider', 'draw3d'):
+        from . import imagine
+        return getattr(imagine, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 
 class Kirchhoff(object):
     """
     A class representing Kirchhoff matrices and their operations.
     """
 
-    def __init__(self, matrix, q=1):
+    def __init__(self, matrix, q=1, frame_class=Frame, policy=choose_backend, reduce_lattice=True, cache=None):
         """
         Initializes a Kirchhoff object.
 
         Parameters:
         - matrix (numpy.ndarray): The input matrix.
         - q (int): The value of q (default is 1).
+        - frame_class (type): Frame (one object per vertex and edge), ArrayFrame (flat arrays), or
+          ZonotopeFrame / BallFrame (only the lattice points of a region around the origin).
+        - policy (function): Picks the solver backend from the number of rows, columns and
+          nonzeros of the system (see backends.choose_backend).
+        - reduce_lattice (bool): Whether to build the frame on a lattice reduced version of the
+          matrix (see reduce_lattice).
+        - cache (GraphCache): Where solved graphs are stored and looked up (see cache.py), or
+          None.
         """
         self.q = q
         self.dimensions = matrix.shape[0]
         self.num_vectors = self.dimensions + matrix.shape[1]
         self.parse_matrix(matrix)
-        self.frame = Frame(self.matrix, q=q)
+        self.reduce_lattice(reduce_lattice)
+        self.frame = frame_class(self.frame_matrix, q=q)
+        self.system = None
+        self.vertex_remap = None
+        self.presolved = None
+        self.session = None
+        self.policy = policy
+        self.solver_result = None
+        self.presolve = True
+        self.screening = True
+        self.check_cycles = True
+        self.cache = cache
 
     def parse_matrix(self, matrix):
         """
@@ -69,76 +111,366 @@ class Kirchhoff(object):
         gcd = np.gcd.reduce(b)
         self.matrix = self.matrix / gcd
     
-    def generate_linear_system(self):
-        # generate null matrix
+    def reduce_lattice(self, reduce=True):
+        """
+        Chooses the matrix the frame is built on. A Kirchhoff graph only depends on the row space
+        of the matrix, so any unimodular row transformation U gives the same graphs with every
+        position moved by U. lattice.reduce_rows picks U to make the largest entry of every row
+        (and with it the frame) as small as it can; inverse_transform moves positions back.
+        """
+        if reduce:
+            self.frame_matrix, self.transform, self.inverse_transform = reduce_rows(self.matrix)
+        else:
+            self.frame_matrix = self.matrix
+            self.transform = self.inverse_transform = np.identity(self.dimensions, dtype=np.int64)
+
+    def get_positions(self):
+        """
+        Returns the position of every vertex of the frame in the coordinates of the original
+        matrix.
+        """
+        return np.asarray(self.frame.get_positions()) @ self.inverse_transform.T
+
+    def get_null_matrix(self):
+        """
+        Returns the matrix whose rows span the null space of the augmented matrix. Row j is the
+        j-th column of B followed by -q times the j-th unit vector, so there is one row per column
+        of B and one entry per vector.
+        """
         null_matrix = np.copy(self.matrix)
         null_matrix = np.vstack([null_matrix, np.zeros((self.num_vectors - self.dimensions, self.num_vectors))])
         for i in range(self.num_vectors):
             null_matrix[i][i] = -self.q
         null_matrix = np.delete(null_matrix, np.s_[:self.dimensions], 1)
-        null_matrix = np.transpose(null_matrix)                
-        system = []
-        for (i, edge) in enumerate(self.frame.edges):
-            edge.pin = i
-        num_edges = len(self.frame.edges)
-        for position in self.frame.vertices:
-            vertex = self.frame.vertices[position]
-            for null_row in null_matrix:
-                system_row = [0 for _ in range(num_edges)]
-                for edge in vertex.incoming:
-                    if edge != None:
-                        system_row[edge.pin] -= null_row[edge.id]
-                for edge in vertex.outgoing:
-                    if edge != None:
-                        system_row[edge.pin] += null_row[edge.id]
-                system.append(system_row)
-        return system
-
-                        
+        return np.transpose(null_matrix)
+
+    def generate_linear_system(self):
+        """
+        Returns the system as dense rows (a list of lists), for the exact tableau solver.
+        """
+        return self.generate_sparse_linear_system().toarray().tolist()
+
+    def get_system_entries(self, null_matrix, tails, heads, ids, first_pin=0):
+        """
+        Returns the (rows, columns, data) triplets the given edges contribute to the linear
+        system. The edges are assumed to hold consecutive pins starting at first_pin.
+
+        NOTES:
+            (a) every edge contributes +null_row[id] to the rows of its tail vertex and
+                -null_row[id] to the rows of its head vertex, so the entries of the whole
+                system are just the null matrix columns picked out by the edge ids
+            (b) vertex v owns rows v * num_null_rows ... (v + 1) * num_null_rows - 1, in the
+                same order generate_linear_system emits them
+            (c) zero entries of the null matrix would otherwise be stored explicitly
+        """
+        num_null_rows = null_matrix.shape[0]
+        tails, heads = np.asarray(tails, dtype=np.int64), np.asarray(heads, dtype=np.int64)
+        coefficients = null_matrix[:, ids]                                                              # (a)
+        offsets = np.arange(num_null_rows)[:, np.newaxis]
+        rows = np.concatenate([tails * num_null_rows + offsets, heads * num_null_rows + offsets])       # (b)
+        columns = np.tile(np.arange(first_pin, first_pin + len(ids)), (2 * num_null_rows, 1))
+        data = np.concatenate([coefficients, -coefficients])
+        nonzero = data != 0                                                                             # (c)
+        return rows[nonzero], columns[nonzero], data[nonzero]
+
+    def generate_sparse_linear_system(self):
+        """
+        Builds the same system as generate_linear_system (one row per vertex per null row, one
+        column per edge pin) as a scipy.sparse CSR matrix, without materializing dense rows.
+        """
+        null_matrix = self.get_null_matrix()
+        tails, heads, ids = self.frame.get_edge_arrays()
+        rows, columns, data = self.get_system_entries(null_matrix, tails, heads, ids)
+        shape = (self.frame.get_num_vertices() * null_matrix.shape[0], len(ids))
+        return sparse.coo_matrix((data, (rows, columns)), shape=shape).tocsr()
+
+    def get_stencil_operator(self):
+        """
+        Returns the system of the current frame as a matrix-free StencilOperator (same rows and
+        columns as generate_sparse_linear_system). Only box frames (Frame, ArrayFrame) have one;
+        for other frames this raises a ValueError. stencil.py is imported on first use.
+        """
+        from .stencil import get_stencil_operator
+        return get_stencil_operator(self.get_null_matrix(), self.frame)
+
+    def extend_linear_system(self):
+        """
+        Brings self.system up to date with the frame and returns it as a CSR matrix. Since the
+        frame only ever appends vertices and edges, the entries assembled on earlier calls are kept
+        and only the edges with pins past the previous column count are turned into new entries.
+        If the frame renumbered its vertices in the meantime the kept rows are moved accordingly,
+        and the renumbering is kept for pop_vertex_remap.
+        """
+        null_matrix = self.get_null_matrix()
+        num_null_rows = null_matrix.shape[0]
+        first_pin = 0 if self.system is None else self.system.shape[1]
+        tails, heads, ids = self.frame.get_edge_arrays(first_pin)
+        rows, columns, data = self.get_system_entries(null_matrix, tails, heads, ids, first_pin)
+        remap = self.frame.get_vertex_remap()
+        if remap is not None:
+            self.vertex_remap = remap if self.vertex_remap is None else remap[self.vertex_remap]
+        if self.system is not None:
+            old_rows = self.system.row
+            if remap is not None:
+                vertices, offsets = np.divmod(old_rows, num_null_rows)
+                old_rows = remap[vertices].astype(np.int64) * num_null_rows + offsets
+            rows = np.concatenate([old_rows, rows])
+            columns = np.concatenate([self.system.col, columns])
+            data = np.concatenate([self.system.data, data])
+        shape = (self.frame.get_num_vertices() * num_null_rows, self.frame.get_num_edges())
+        self.system = sparse.coo_matrix((data, (rows, columns)), shape=shape)
+        return self.system.tocsr()
+
+    def pop_vertex_remap(self):
+        """
+        Returns the array mapping every vertex index from before the last call to its index now
+        (or None if nothing moved) and forgets it. Whoever keeps vertex indices of their own
+        (the HighsSession) uses this to follow the frame.
+        """
+        remap = self.vertex_remap
+        self.vertex_remap = None
+        return remap
+
+    def get_normalized_system(self):
+        """
+        Returns the vertex conditions of the current frame followed by the sum condition row
+        (the weights minus a slack variable add up to 1), and the right hand side of that system.
+        The slack is the last column.
+        """
+        E = self.extend_linear_system()
+        num_rows, num_weights = E.shape
+        sum_condition_row = sparse.csr_matrix([[1] * num_weights + [-1]])
+        sum_condition_value = 1
+        E = sparse.vstack([sparse.hstack([E, sparse.csr_matrix((num_rows, 1))]), sum_condition_row], format='csr')
+        b = np.zeros(num_rows + 1)
+        b[-1] = sum_condition_value
+        return E, b
+
+    def get_presolved_system(self):
+        """
+        Returns the normalized system of the current frame, its right hand side and its
+        PresolvedSystem (see presolve.py). They are kept until the frame gains vertices or edges,
+        so screening and the backend of the same solve share one presolve.
+        """
+        key = (self.frame.get_num_vertices(), self.frame.get_num_edges())
+        if self.presolved is None or self.presolved[0] != key:
+            E, b = self.get_normalized_system()
+            self.presolved = (key, E, b, presolve(E, b))
+        return self.presolved[1:]
+
     def get_random_objective_vector(self, num_dims):
         """
         Generates a random objective vector of length num_weights.
         """
         return [num_dims * np.random.random() for _ in range(num_dims)]
 
-    def solve(self, random_objective_vector = True):
-        E = self.generate_linear_system()
-        num_weights = len(E[0])
-        sum_condition_row = [1] * num_weights + [-1]
-        sum_condition_value = 1
-        for row in E:
-            row.append(0)
-        E.append(sum_condition_row)
-        b = [0] * (len(E) - 1) + [sum_condition_value]
-        if(random_objective_vector == False):
-            c = [1 for i in range(num_weights + 1)]
-        else:
-            c = self.get_random_objective_vector(num_weights + 1)
-        result = linprog(c, A_eq=E, b_eq=b, integrality=1)
-        print(result.x)
-
-        status = result.status
-        print(status)
-        if(status == 0 ):
-            intSolution = np.array([round(x) for x in result.x])
-            toCheck = intSolution * E
-            if(np.sum(toCheck[:-1]) == 0):
-                return intSolution
-        return None
+    def solve(self, random_objective_vector = True, mode = None):
+        """
+        Looks for nonnegative integer edge weights satisfying the vertex conditions, normalized
+        by a sum condition row with a slack variable. mode names the backend to use (see
+        backends.BACKENDS: 'tableau', 'rational', 'milp', 'warm'); by default self.policy picks
+        one from the size of the system. The SolverResult is kept in self.solver_result.
+        Unless self.screening is off, frames that fail the cheap checks of screening.py are
+        rejected before the backend runs; they only presolve the system if the backend is going
+        to use the presolved system (or it is small). Nothing is printed: why a frame was
+        screened out or a solution rejected is in the 'message' of the statistics of the
+        SolverResult.
+        """
+        if mode is None:
+            E = self.extend_linear_system()
+            mode = self.policy(E.shape[0], E.shape[1], E.nnz)
+        backend = get_backend(mode)
+        if self.screening:
+            screening = screen(self, self.presolve and backend.uses_presolve)
+            if not screening.passed:
+                self.solver_result = SolverResult('screening', 'infeasible', None, screening.seconds,
+                                                  {'screening': screening.condition, 'message': str(screening)})
+                return None
+        result = backend.run(self, random_objective_vector)
+        if result.solution is not None:
+            verification = self.verify_solution(result.solution)
+            if verification.passed and self.check_cycles:
+                verification = self.verify_cycles(result.solution)
+                result.statistics['cycle_space'] = verification
+            if not verification.passed:
+                result.statistics['message'] = str(verification)
+                result.status, result.solution = 'rejected', None
+            elif self.cache is not None:
+                self.store_cached(result.solution)
+        self.solver_result = result
+        return result.solution
+
+    def verify_solution(self, solution):
+        """
+        Checks a solution (edge weights in pin order, optionally followed by the slack of the sum
+        condition) exactly against the vertex conditions of the current frame and returns a
+        Verification naming the worst violating vertex. Box frames with at least
+        STENCIL_MIN_EDGES edges are checked with the stencil operator, which is cheaper to build
+        than the assembled system and does not share its assembly with the solvers.
+        """
+        E = None
+        if self.frame.get_num_edges() >= STENCIL_MIN_EDGES:
+            try:
+                E = self.get_stencil_operator()
+            except ValueError:
+                pass
+        if E is None:
+            E = self.extend_linear_system()
+        num_null_rows = self.num_vectors - self.dimensions
+        return verify_weights(E, solution[:E.shape[1]], num_null_rows)
     
-    def draw_solution(self, x, y):
-        A = self.generate_linear_system()
-        print(np.shape(A))
-        solution = self.solve(A)
-        if(solution is None):
+    def verify_cycles(self, solution):
+        """
+        Checks the second Kirchhoff condition for a solution: the cycles of the graph made of the
+        edges of positive weight span the null space of the matrix. Returns a CycleVerification
+        carrying a certificate (see verify.verify_cycle_space).
+        """
+        tails, heads, ids = self.frame.get_edge_arrays()
+        weights = np.asarray(solution)[:len(ids)]
+        return verify_cycle_space(tails, heads, ids, weights, self.get_null_matrix(), self.frame.get_num_vertices())
+
+    def store_cached(self, solution):
+        """
+        Puts the graph of a solution of the current frame into self.cache.
+        """
+        tails, heads, ids = self.frame.get_edge_arrays()
+        self.cache.put(self.matrix, self.q, self.get_positions(), tails, heads, ids, np.asarray(solution)[:len(ids)])
+
+    def load_cached(self):
+        """
+        Looks the matrix up in self.cache. On a hit the frame is rebuilt just large enough to hold
+        the cached graph (moved to start at the origin) and its weights are returned like solve
+        returns them, with self.solver_result from backend 'cache'; otherwise returns None. Only
+        frames that grow to a shape (Frame, ArrayFrame) can be rebuilt.
+
+        NOTES:
+            (a) the cache hands the graph back in the coordinates of self.matrix, the frame is in
+                those of self.frame_matrix
+            (b) every cached edge is found in the new frame by its tail and its vector
+        """
+        if self.cache is None or not hasattr(self.frame, 'grow_to_shape'):
+            return None
+        start = time.perf_counter()
+        cached = self.cache.get(self.matrix, self.q)
+        if cached is None:
+            return None
+        positions, tails, heads, ids, weights = cached
+        frame_positions = positions @ self.transform.T                                              # (a)
+        frame_positions = frame_positions - frame_positions.min(axis=0)
+        self.reset_frame()
+        shape = np.maximum(frame_positions.max(axis=0) + 1, self.frame.shape)
+        self.frame.grow_to_shape([int(extent) for extent in shape])
+        frame_vertices = np.asarray(self.frame.get_positions()).tolist()
+        vertex_indices = {tuple(position): index for index, position in enumerate(frame_vertices)}
+        frame_tails, _, frame_ids = self.frame.get_edge_arrays()
+        pins = {edge: pin for pin, edge in enumerate(zip(frame_tails.tolist(), frame_ids.tolist()))}
+        solution = np.zeros(self.frame.get_num_edges() + 1, dtype=weights.dtype)
+        for tail, vector_id, weight in zip(frame_positions[tails].tolist(), ids.tolist(), weights):
+            pin = pins.get((vertex_indices.get(tuple(tail)), vector_id))                              # (b)
+            if pin is None:
+                self.reset_frame()
+                return None
+            solution[pin] = weight
+        solution[-1] = sum(weights) - 1
+        if not self.verify_solution(solution).passed:
+            self.reset_frame()
+            return None
+        self.solver_result = SolverResult('cache', 'solved', solution, time.perf_counter() - start)
+        return solution
+
+    def get_dual_ray(self):
+        """
+        Returns a Farkas certificate proving the current frame has no solution, laid out like the
+        rows of get_normalized_system, or None. After a warm solve it comes from the session;
+        otherwise the LP is solved once more just for it (needs highspy). Either way it may take
+        as long as the solve it explains (at least session.MIN_BUDGET seconds) and is None if it
+        takes longer, so that growing the frame never costs more than solving it did.
+        """
+        if self.session is not None and self.solver_result is not None and self.solver_result.backend == 'warm':
+            return self.session.get_dual_ray()
+        seconds = 0.0 if self.solver_result is None else self.solver_result.seconds
+        E, b = self.get_normalized_system()
+        return find_dual_ray(E, b, max(MIN_BUDGET, seconds))
+
+    def grow_frame(self, strategy='certificate'):
+        """
+        Grows the frame after a solve found nothing. With strategy 'double' this is frame.expand.
+        With 'certificate' the dimensions whose boundary the Farkas certificate of the failed
+        solve blames are grown by the reach of the vectors along them (see growth.py), which is
+        usually less than doubling; without a certificate (also when it would take longer than
+        the solve, see get_dual_ray), or for frames that do not grow by dimension
+        (ZonotopeFrame), it falls back to frame.expand.
+        """
+        steps = []
+        if strategy == 'certificate' and getattr(self.frame, 'grows_by_dimension', True):
+            dual_ray = self.get_dual_ray()
+            if dual_ray is not None:
+                reach = np.max(np.abs(self.frame.matrix), axis=1).astype(np.int64)
+                vertex_blame = get_vertex_blame(dual_ray, self.num_vectors - self.dimensions)
+                dimension_blame = get_dimension_blame(self.frame.get_positions(), self.frame.shape, reach, vertex_blame)
+                steps = choose_growth(self.frame.shape, reach, dimension_blame)
+        elif strategy != 'double':
+            raise ValueError("unknown growth strategy %s, expected 'certificate' or 'double'" % strategy)
+        if not steps:
             self.frame.expand()
-            self.draw_solution(x, y)
-            print("No solution found")
-            return
-        
-        # update the weights
-        for edge in self.frame.edges:
-            edge.weight = solution[edge.pin]
-        print(solution)
-        # draw the graph
-        draw_graph_slider(self, x, y)
+        for dimension, amount in steps:
+            self.frame.expand(dimension, amount)
+
+    def reset_frame(self):
+        """
+        Starts over from a new frame of the first shape, dropping the system and solver session
+        of the old one.
+        """
+        self.frame = self.frame.__class__(self.frame_matrix, q=self.q)
+        self.system = None
+        self.vertex_remap = None
+        self.session = None
+        self.solver_result = None
+        self.presolved = None
+
+    def try_shape(self, frame_shape, mode = None):
+        """
+        Builds a new frame of the given shape and solves it. Returns the solution or None, like
+        solve; None also when the shape is smaller than the first frame shape.
+        """
+        self.reset_frame()
+        if not self.frame.grow_to_shape(frame_shape):
+            return None
+        return self.solve(mode=mode)
+
+    def find(self, max_steps=None, mode=None, strategy='certificate'):
+        """
+        Looks for a Kirchhoff graph: the cache first (if there is one), then solve on the current
+        frame, growing it (see grow_frame) after every frame without a solution, for at most
+        max_steps solves (no limit if None). The weights of a solution are set on the frame.
+        Returns a FindResult; nothing is printed or drawn.
+        """
+        start = time.perf_counter()
+        attempts = []
+        solution = self.load_cached()
+        if solution is not None:
+            attempts.append(self.solver_result)
+        while solution is None and (max_steps is None or len(attempts) < max_steps):
+            solution = self.solve(mode=mode)
+            attempts.append(self.solver_result)
+            if solution is None and (max_steps is None or len(attempts) < max_steps):
+                self.grow_frame(strategy)
+        shape = [int(extent) for extent in self.frame.shape]
+        if solution is None:
+            return FindResult('unsolved', None, shape, None, None, None, attempts, time.perf_counter() - start)
+        self.frame.set_weights(solution[:self.frame.get_num_edges()])
+        tails, _, ids = self.frame.get_edge_arrays()
+        weights = np.asarray(solution)[:len(ids)]
+        support = np.flatnonzero(weights > 0)
+        return FindResult('solved', solution, shape, self.get_positions()[tails[support]], ids[support],
+                          weights[support], attempts, time.perf_counter() - start)
+
+    def draw_solution(self, x, y, max_labels=None):
+        """
+        Finds a Kirchhoff graph (see find), prints a summary and draws it interactively, with at
+        most max_labels edge labels at once (see imagine.draw_graph_slider).
+        """
+        from .imagine import draw_graph_slider
+        result = self.find()
+        print(result)
+        draw_graph_slider(self, x, y, max_labels)
@@ -0,0 +1,183 @@
+import numpy as np
+from .helpers import get_lattice_positions
+
+MAX_VERTICES = np.iinfo(np.int32).max + 1 # vertex indices are stored as int32
+
+
+class ArrayFrame(object):
+    """
+    Represents a frame in a Kirchhoff graph stored as flat arrays instead of Vertex and Edge objects.
+
+    A vertex is just an integer: the mixed-radix encoding of its position with respect to the
+    current shape (the first dimension varies fastest, as in get_lattice_positions). An edge is an
+    entry in four parallel arrays, and its index in those arrays is its pin. A frame never has more
+    than MAX_VERTICES vertices, so vertex indices fit in int32.
+
+    Attributes:
+        dimensions (int): The number of dimensions in the frame.
+        num_vectors (int): The number of vectors in the frame.
+        q (int): The value of q for the frame.
+        shape (list): An array representing how many vertices are along each dimension.
+        tails (ndarray): The index of the tail vertex of every edge (int32).
+        heads (ndarray): The index of the head vertex of every edge (int32).
+        vector_ids (ndarray): The column of the matrix every edge corresponds to (int32).
+        weights (ndarray): The weight of every edge (int64, or Python ints for exact solutions
+            too large for int64).
+    """
+
+    def __init__(self, matrix, q=1):
+        self.dimensions = matrix.shape[0]
+        self.num_vectors = matrix.shape[1]
+        self.matrix = matrix
+        self.vectors = np.transpose(matrix).astype(np.int64)
+        self.q = q
+        self.shape = self.get_first_shape()
+        self.check_shape(self.shape)
+        self.tails = np.empty(0, dtype=np.int32)
+        self.heads = np.empty(0, dtype=np.int32)
+        self.vector_ids = np.empty(0, dtype=np.int32)
+        self.weights = np.empty(0, dtype=np.int64)
+        self.vertex_remap = None
+        self.add_new_edges(np.zeros(self.dimensions, dtype=np.int64))
+
+    def get_first_shape(self):
+        self.shape = [int(max_element) + 1 for max_element in np.max(np.abs(self.matrix), axis=1)]
+        return self.shape
+
+    def check_shape(self, shape):
+        """
+        Raises a ValueError if a frame of the given shape would have more vertices than int32
+        vertex indices can number.
+        """
+        if np.prod([int(extent) for extent in shape], dtype=object) > MAX_VERTICES:
+            raise ValueError("a frame of shape %s has more than %d vertices" % (list(shape), MAX_VERTICES))
+
+    def encode(self, positions):
+        """
+        Turns an (n, dimensions) array of positions into vertex indices. The shape always passed
+        check_shape first, so the indices fit in int32.
+        """
+        return np.ravel_multi_index(tuple(np.transpose(positions)), self.shape, order='F').astype(np.int32)
+
+    def decode(self, indices, shape=None):
+        """
+        Turns vertex indices back into an (n, dimensions) array of positions. The indices are read
+        with respect to shape, which defaults to the current shape of the frame.
+        """
+        shape = self.shape if shape is None else shape
+        return np.stack(np.unravel_index(indices, shape, order='F'), axis=1)
+
+    def get_num_vertices(self):
+        return int(np.prod(self.shape))
+
+    def get_num_edges(self):
+        return len(self.tails)
+
+    def get_positions(self):
+        """
+        Returns the position of every vertex, in vertex index order.
+        """
+        return self.decode(np.arange(self.get_num_vertices()))
+
+    def get_edge_arrays(self, start_pin=0):
+        """
+        Returns the tail indices, head indices and vector ids of the edges, in pin order and
+        starting at start_pin.
+        """
+        return self.tails[start_pin:], self.heads[start_pin:], self.vector_ids[start_pin:]
+
+    def get_vertex_remap(self):
+        """
+        Growing the frame changes the mixed-radix encoding, so vertex indices handed out before an
+        expand are stale afterwards. This returns the array mapping every old index to its new one
+        (or None if nothing moved since the last call) and forgets it.
+        """
+        remap = self.vertex_remap
+        self.vertex_remap = None
+        return remap
+
+    def set_weights(self, weights):
+        """
+        Keeps the weights as int64, or as they are if they come as an object array (exact
+        solutions too large for int64 hold Python ints).
+        """
+        weights = np.asarray(weights)
+        self.weights = weights if weights.dtype == object else weights.astype(np.int64)
+
+    def get_weights(self):
+        return self.weights
+
+    def get_bounds(self, vector, start, end):
+        shape = np.asarray(end) - np.asarray(start)
+        min_position = np.where(vector < 0, -vector, 0)
+        max_position = np.where(vector > 0, shape - vector, shape)
+        return min_position + start, max_position + start
+
+    # a function to grow the frame along 1 dimension
+    def expand(self, dimension=None, amount=None):
+        """
+        Grows the frame by amount vertices along one dimension, doubling the dimension chosen like
+        Frame.expand by default. Existing edges keep their pins and are only re-encoded; the new
+        edges are appended after them.
+        """
+        if dimension is None:
+            dimension = self.get_expand_dimension()
+        if amount is None:
+            amount = self.shape[dimension]
+        old_shape = np.array(self.shape, dtype=np.int64)
+        old_num_vertices = self.get_num_vertices()
+        self.check_shape([extent + int(amount) * (i == dimension) for (i, extent) in enumerate(self.shape)])
+        self.shape[dimension] += int(amount)
+        remap = self.encode(self.decode(np.arange(old_num_vertices), tuple(old_shape)))
+        self.tails = remap[self.tails]
+        self.heads = remap[self.heads]
+        self.vertex_remap = remap if self.vertex_remap is None else remap[self.vertex_remap]
+        self.add_new_edges(old_shape)
+
+    def grow_to_shape(self, shape):
+        """
+        Grows the frame one dimension at a time until it has the given shape. Returns False (and
+        leaves the frame alone) if it is already larger than shape along some dimension.
+        """
+        if any(extent < current for extent, current in zip(shape, self.shape)):
+            return False
+        for dimension, extent in enumerate(shape):
+            if extent > self.shape[dimension]:
+                self.expand(dimension, extent - self.shape[dimension])
+        return True
+
+    def get_expand_dimension(self):
+        return int(np.argmin(np.divide(self.shape, np.max(np.abs(self.matrix), axis = 1))))
+
+    def add_new_edges(self, old_shape):
+        """
+        Adds every edge that fits in the current shape but did not fit in old_shape, exactly like
+        Frame.add_new_edges, but one vectorized box at a time.
+        """
+        origin = np.zeros(self.dimensions, dtype=np.int64)
+        shape = np.array(self.shape, dtype=np.int64)
+        tails, heads, vector_ids = [self.tails], [self.heads], [self.vector_ids]
+        for (vector_id, vector) in enumerate(self.vectors):
+            min_position, max_position = self.get_bounds(vector, origin, shape)
+            old_min_position, old_max_position = self.get_bounds(vector, origin, old_shape)
+            if np.any(old_max_position <= old_min_position):
+                slabs = [(min_position, max_position)]
+            else:
+                slabs = []
+                for i in range(self.dimensions):
+                    slab_min = np.copy(min_position)
+                    slab_max = np.copy(max_position)
+                    slab_min[i] = old_max_position[i]
+                    slab_max[:i] = old_max_position[:i]
+                    slabs.append((slab_min, slab_max))
+            for slab_min, slab_max in slabs:
+                if np.any(slab_max <= slab_min):
+                    continue
+                tail_positions = get_lattice_positions(slab_min, slab_max)
+                tails.append(self.encode(tail_positions))
+                heads.append(self.encode(tail_positions + vector))
+                vector_ids.append(np.full(len(tail_positions), vector_id, dtype=np.int32))
+        self.tails = np.concatenate(tails)
+        self.heads = np.concatenate(heads)
+        self.vector_ids = np.concatenate(vector_ids)
+        self.weights = np.concatenate([self.weights, np.zeros(len(self.tails) - len(self.weights), dtype=np.int64)])
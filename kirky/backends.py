@@ -0,0 +1,237 @@
+"""
+Solver backends for Kirchhoff.solve.
+
+A backend finds nonnegative integer edge weights for the current frame of a Kirchhoff object:
+the vertex conditions followed by the sum condition row, with the slack of the sum condition as
+the last variable (see Kirchhoff.get_normalized_system). Every backend answers with a
+SolverResult, so callers see the status and timing of the exact tableau and of HiGHS in the same
+shape.
+
+Backends are registered by name in BACKENDS. A solver that is only installed on some machines is
+added with register_backend and reports whether it can run through is_available. Which backend
+Kirchhoff.solve uses is decided by a policy: a function of the size of the system returning a
+backend name (choose_backend is the default one).
+"""
+import time
+from fractions import Fraction
+import numpy as np
+from .tableau import find_integer_solution, solve_kirky
+from .helpers import scale_to_integers
+from .session import HighsSession, get_highspy
+from .verify import get_exact_residual
+
+
+class SolverResult(object):
+    """
+    The outcome of one solve.
+
+    Attributes:
+        backend (str): The name of the backend that produced it.
+        status (str): 'solved', 'infeasible' (there is provably no solution on this frame),
+            'failed' (the backend gave up) or 'rejected' (the solution failed verification).
+        solution (ndarray): The integer solution (weights by pin, then the slack), or None.
+        seconds (float): The wall clock time the backend took.
+        statistics (dict): Whatever else the backend counted, e.g. iterations.
+    """
+
+    def __init__(self, backend, status, solution=None, seconds=0.0, statistics=None):
+        self.backend = backend
+        self.status = status
+        self.solution = solution
+        self.seconds = seconds
+        self.statistics = {} if statistics is None else statistics
+
+    def __bool__(self):
+        return self.solution is not None
+
+    def __str__(self):
+        return "%s: %s in %.3fs" % (self.backend, self.status, self.seconds)
+
+
+class SolverBackend(object):
+    name = None
+    uses_presolve = True
+
+    @staticmethod
+    def is_available():
+        return True
+
+    def solve(self, kirchhoff, random_objective_vector=True, statistics=None):
+        """
+        Returns a solution for the current frame of kirchhoff or None, updating statistics with
+        at least a 'status'. Backends that only need the system override solve_system instead;
+        unless kirchhoff.presolve is off they are handed the presolved system (the one screening
+        already computed, see Kirchhoff.get_presolved_system), and the size reduction is reported
+        under statistics['presolve'].
+        """
+        statistics = {} if statistics is None else statistics
+        if getattr(kirchhoff, 'presolve', False):
+            E, b, presolved = kirchhoff.get_presolved_system()
+        else:
+            E, b = kirchhoff.get_normalized_system()
+        if random_objective_vector:
+            c = kirchhoff.get_random_objective_vector(E.shape[1])
+        else:
+            c = [1] * E.shape[1]
+        if not getattr(kirchhoff, 'presolve', False):
+            return self.solve_system(c, E, b, statistics)
+        statistics['presolve'] = presolved.get_report()
+        if presolved.infeasible or presolved.E.shape[1] <= 1:
+            statistics['status'] = 'infeasible'
+            return None
+        solution = self.solve_system([c[column] for column in presolved.columns], presolved.E, presolved.b, statistics)
+        if solution is None:
+            return None
+        return postsolve_integer_solution(presolved, solution, E, b)
+
+    def solve_system(self, c, E, b, statistics=None):
+        raise NotImplementedError
+
+    def run(self, kirchhoff, random_objective_vector=True):
+        """
+        Times solve and wraps its outcome in a SolverResult.
+        """
+        statistics = {}
+        start = time.perf_counter()
+        solution = self.solve(kirchhoff, random_objective_vector, statistics)
+        seconds = time.perf_counter() - start
+        status = statistics.pop('status', 'solved' if solution is not None else 'failed')
+        return SolverResult(self.name, status, solution, seconds, statistics)
+
+
+def postsolve_integer_solution(presolved, solution, E, b):
+    """
+    Maps an integer solution of a presolved normalized system back to the original one. Columns
+    solved for by postsolve can come out fractional; the vertex conditions are homogeneous, so the
+    weights are scaled to integers. They are also missing from the sum condition of the presolved
+    system, so its slack is chosen again.
+    """
+    values = presolved.postsolve(solution)
+    if all(value.denominator == 1 for value in values[:-1]):
+        weights = [int(value) for value in values[:-1]]
+    else:
+        weights = scale_to_integers(values[:-1])
+    solution = weights + [sum(weights) - int(b[-1])]
+    if any(value < 0 for value in solution) or np.any(get_exact_residual(E, solution) != np.asarray(b)):
+        return None
+    return np.array(solution, dtype=object if max(solution) >= 2**62 else np.int64)
+
+
+class TableauBackend(SolverBackend):
+    """
+    The fraction-free exact simplex of tableau.py. No floating point anywhere, so its answer is
+    final, but its cost grows quickly with the size of the system.
+    """
+    name = 'tableau'
+
+    def __init__(self, pivot_rule='bland'):
+        self.pivot_rule = pivot_rule
+
+    def solve_system(self, c, E, b, statistics=None):
+        statistics = {} if statistics is None else statistics
+        rows = [[Fraction(int(value)) for value in row[:-1]] for row in E[:-1].toarray()]
+        weights = solve_kirky(rows, pivot_rule=self.pivot_rule, statistics=statistics)
+        if weights is None:
+            statistics['status'] = 'infeasible'
+            return None
+        weights = scale_to_integers(weights)
+        statistics['status'] = 'solved'
+        return np.array(weights + [sum(weights) - int(b[-1])], dtype=np.int64)
+
+
+class RationalBackend(SolverBackend):
+    """
+    scipy's HiGHS LP from scratch, with an exact integer point reconstructed from its solution.
+    """
+    name = 'rational'
+
+    def solve_system(self, c, E, b, statistics=None):
+        return find_integer_solution(c, E, b, 'rational', statistics=statistics)
+
+
+class MilpBackend(SolverBackend):
+    """
+    scipy's HiGHS MILP on the integer program directly.
+    """
+    name = 'milp'
+
+    def solve_system(self, c, E, b, statistics=None):
+        return find_integer_solution(c, E, b, 'milp', statistics=statistics)
+
+
+class WarmBackend(SolverBackend):
+    """
+    One HiGHS model per Kirchhoff object that grows with the frame and restarts from its last
+    optimal basis (see session.HighsSession). Needs highspy.
+
+    The model has to keep every row and column of the frame to be extended in place, so this
+    backend does not use presolve.py (kirchhoff.presolve has no effect on it); HiGHS presolves
+    it on its own whenever it is solved from scratch, which is after every infeasible frame.
+    Since choose_backend picks it for everything past the tableau sizes, presolve.py only runs
+    by default on tableau-sized systems, or when a stateless backend is asked for by mode.
+    """
+    name = 'warm'
+    uses_presolve = False
+
+    @staticmethod
+    def is_available():
+        return get_highspy() is not None
+
+    def solve(self, kirchhoff, random_objective_vector=True, statistics=None):
+        if kirchhoff.session is None:
+            kirchhoff.session = HighsSession(kirchhoff, random_objective_vector)
+        return kirchhoff.session.solve(statistics)
+
+
+BACKENDS = {}
+
+
+def register_backend(backend_class):
+    """
+    Adds a SolverBackend subclass to BACKENDS under its name. Returns the class, so it can be
+    used as a decorator.
+    """
+    if not backend_class.name:
+        raise ValueError("a backend needs a name")
+    BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+
+for backend_class in [TableauBackend, RationalBackend, MilpBackend, WarmBackend]:
+    register_backend(backend_class)
+
+
+def get_available_backends():
+    return sorted(name for name, backend_class in BACKENDS.items() if backend_class.is_available())
+
+
+def get_backend(backend):
+    """
+    Returns a SolverBackend instance given either an instance or one of the names in BACKENDS.
+    """
+    if isinstance(backend, SolverBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError("unknown backend %s, expected one of %s" % (backend, sorted(BACKENDS)))
+    if not BACKENDS[backend].is_available():
+        raise ValueError("backend %s is not available here, available are %s" % (backend, get_available_backends()))
+    return BACKENDS[backend]()
+
+
+TABLEAU_MAX_COLUMNS = 32
+TABLEAU_MAX_NONZEROS = 512
+
+
+def choose_backend(num_rows, num_columns, num_nonzeros):
+    """
+    The default policy. Small systems go to the exact tableau, which needs no reconstruction
+    and beats setting up an LP at that size. Everything else goes to the warm HiGHS session if
+    highspy is installed, since the frame keeps growing and the basis carries over, and to the
+    LP from scratch otherwise. The systems are very sparse (each column has at most twice the
+    number of null rows entries), so the number of nonzeros is what the tableau pays for.
+    """
+    if num_columns <= TABLEAU_MAX_COLUMNS and num_nonzeros <= TABLEAU_MAX_NONZEROS:
+        return 'tableau'
+    if WarmBackend.is_available():
+        return 'warm'
+    return 'rational'
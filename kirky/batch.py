@@ -0,0 +1,202 @@
+"""
+Solves many matrices in one go.
+
+Jobs are read lazily from a JSONL or CSV file (or stdin), handed to worker processes, and every
+result is written to an output JSONL file as soon as it comes in, so memory stays bounded by the
+number of jobs in flight. Each job gets its own process, which is killed if it runs past the
+timeout. Jobs whose id is already in the output file are skipped, so an interrupted batch resumes
+where it stopped.
+
+Input formats:
+    JSONL - one object per line: {"id": ..., "matrix": [[2, 1], [1, 2]], "q": 1}; id and q are
+            optional
+    CSV   - one matrix per line: id,q,matrix with the rows of the matrix separated by ';' and its
+            entries by spaces, e.g. a,1,2 1;1 2 (a header line starting with 'id' is skipped)
+
+Every output line holds the id, the status ('solved', 'unsolved' if max_steps frames had no
+solution, 'timeout' or 'error'), the number of solves, the seconds spent, and for solved jobs the
+final frame shape, the edges of positive weight (tail position and vector) and their weights.
+
+Run it with python -m kirky.batch INPUT [-o OUTPUT] [--processes N] [--timeout SECONDS].
+"""
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+import numpy as np
+from . import Kirchhoff
+from .array_frame import ArrayFrame
+from .block_q import Frame
+
+FRAME_CLASSES = {'array': ArrayFrame, 'frame': Frame}
+
+
+def parse_csv_matrix(text):
+    return [[int(value) for value in row.split()] for row in text.split(';') if row.strip()]
+
+
+def read_jobs(stream, format='jsonl'):
+    """
+    Yields (id, matrix, q) for every job in stream. Jobs without an id are numbered by their line
+    (starting at 1), so ids stay the same when the same input is read again.
+    """
+    if format == 'csv':
+        for (number, row) in enumerate(csv.reader(stream), 1):
+            if not row or (number == 1 and row[0].strip().lower() == 'id'):
+                continue
+            job_id = row[0].strip() or number
+            q = int(row[1]) if len(row) > 1 and row[1].strip() else 1
+            yield job_id, parse_csv_matrix(row[2]), q
+    elif format == 'jsonl':
+        for (number, line) in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            yield job.get('id', number), job['matrix'], job.get('q', 1)
+    else:
+        raise ValueError("unknown format %s, expected 'jsonl' or 'csv'" % format)
+
+
+def get_finished_ids(path):
+    """
+    Returns the ids of every job already in an output file (as strings), or an empty set if there
+    is no such file. A last line cut off by an interruption is ignored.
+    """
+    finished = set()
+    if path is None or not os.path.exists(path):
+        return finished
+    with open(path) as stream:
+        for line in stream:
+            try:
+                finished.add(str(json.loads(line)['id']))
+            except (ValueError, KeyError):
+                continue
+    return finished
+
+
+def solve_job(job_id, matrix, q=1, frame_class=ArrayFrame, max_steps=8, mode=None):
+    """
+    Solves one matrix with Kirchhoff.find, trying at most max_steps frames, and returns the
+    result as a dict ready for json.
+    """
+    kirchhoff = Kirchhoff(np.array(matrix), q=q, frame_class=frame_class)
+    result = {'id': job_id}
+    result.update(kirchhoff.find(max_steps, mode).to_dict())
+    return result
+
+
+def run_job(connection, arguments):
+    """
+    The body of a worker process: solves one job and sends the result back.
+    """
+    try:
+        result = solve_job(*arguments)
+    except Exception as error:
+        result = {'id': arguments[0], 'status': 'error', 'message': repr(error)}
+    connection.send(result)
+    connection.close()
+
+
+def run_batch(jobs, output, finished=(), processes=None, timeout=None, frame_class=ArrayFrame, max_steps=8,
+              mode=None):
+    """
+    Input:
+        jobs - (id, matrix, q) triples, e.g. from read_jobs
+        output - a writable text stream; every result goes there as one JSON line
+        finished - ids (as strings) to skip
+        processes - how many jobs run at once, all cores by default
+        timeout - seconds a job may take before its process is killed, or None
+        frame_class, max_steps, mode - as for solve_job
+
+    Returns a dict counting the results by status.
+
+    NOTES:
+        (a) at most processes jobs are in flight; the next job is only read once one finishes
+        (b) wake up for whichever comes first, a result or the earliest deadline
+        (c) without a timeout and with a single process there is nothing to run in parallel or
+            to kill, so jobs run in this process
+    """
+    processes = (os.cpu_count() or 1) if processes is None else processes
+    counts = {}
+
+    def write(result):
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+
+    jobs = ((job_id, matrix, q) for job_id, matrix, q in jobs if str(job_id) not in finished)
+    if processes <= 1 and timeout is None:                                                          # (c)
+        for job_id, matrix, q in jobs:
+            try:
+                write(solve_job(job_id, matrix, q, frame_class, max_steps, mode))
+            except Exception as error:
+                write({'id': job_id, 'status': 'error', 'message': repr(error)})
+        return counts
+    running = {}
+    exhausted = False
+    while running or not exhausted:
+        while not exhausted and len(running) < processes:                                           # (a)
+            job = next(jobs, None)
+            if job is None:
+                exhausted = True
+                break
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=run_job, args=(sender, job + (frame_class, max_steps, mode)))
+            process.daemon = True
+            process.start()
+            sender.close()
+            running[receiver] = (job[0], process, time.perf_counter())
+        if not running:
+            break
+        wait = None
+        if timeout is not None:                                                                     # (b)
+            wait = max(0.0, min(started for _, _, started in running.values()) + timeout - time.perf_counter())
+        for receiver in multiprocessing.connection.wait(list(running), wait):
+            job_id, process, started = running.pop(receiver)
+            try:
+                write(receiver.recv())
+            except EOFError:
+                write({'id': job_id, 'status': 'error', 'message': 'worker exited with code %s' % process.exitcode,
+                       'seconds': time.perf_counter() - started})
+            receiver.close()
+            process.join()
+        if timeout is not None:
+            now = time.perf_counter()
+            for receiver in [receiver for receiver, (_, _, started) in running.items() if now - started >= timeout]:
+                job_id, process, started = running.pop(receiver)
+                process.kill()
+                process.join()
+                receiver.close()
+                write({'id': job_id, 'status': 'timeout', 'seconds': now - started})
+    return counts
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Solve a batch of matrices.")
+    parser.add_argument('input', nargs='?', default='-', help="a .jsonl or .csv file, or - for stdin")
+    parser.add_argument('-o', '--output', help="the JSONL file to append results to (stdout if not given)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="the input format (by default from the extension)")
+    parser.add_argument('--processes', type=int, help="how many jobs run at once (all cores by default)")
+    parser.add_argument('--timeout', type=float, help="seconds per job")
+    parser.add_argument('--max-steps', type=int, default=8, help="how many frames to try per job")
+    parser.add_argument('--frame', choices=sorted(FRAME_CLASSES), default='array', help="the frame class")
+    parser.add_argument('--mode', help="the solver backend (chosen by size if not given)")
+    arguments = parser.parse_args(arguments)
+    format = arguments.format or ('csv' if arguments.input.endswith('.csv') else 'jsonl')
+    finished = get_finished_ids(arguments.output)
+    with contextlib.ExitStack() as stack:
+        source = sys.stdin if arguments.input == '-' else stack.enter_context(open(arguments.input))
+        output = sys.stdout if arguments.output is None else stack.enter_context(open(arguments.output, 'a'))
+        counts = run_batch(read_jobs(source, format), output, finished, arguments.processes, arguments.timeout,
+                           FRAME_CLASSES[arguments.frame], arguments.max_steps, arguments.mode)
+    print(", ".join("%d %s" % (count, status) for status, count in sorted(counts.items())) or "nothing to do",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
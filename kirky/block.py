@@ -33,6 +33,16 @@ class Vertex(object):
 
 
 class Frame(object):
+    """
+    A frame of vertices and edges used by the exact (Fraction based) pipeline.
+
+    Positions are rational, with denominators steps[i] along dimension i. Internally every
+    position is stored as a tuple of integers, the coordinates multiplied by steps, so the inner
+    loops only do integer arithmetic and hash integer tuples. self.vertices, Edge.tail/head and
+    Vertex.position therefore hold these scaled integer positions; use to_fractions,
+    get_edge_positions and get_vertex_positions to read positions as Fractions, and to_lattice
+    to go the other way.
+    """
 
     def __init__(self, dimensions, num_vectors, steps, q=1):
         self.num_vectors = num_vectors
@@ -57,6 +67,33 @@ class Frame(object):
         new_frame.shape = self.shape.copy()
         return new_frame
 
+    def to_lattice(self, position):
+        """
+        Converts a position given in Fractions to the scaled integer position used internally.
+        """
+        lattice_position = [Fraction(position[i]) * self.steps[i] for i in range(self.dimensions)]
+        if any(coordinate.denominator != 1 for coordinate in lattice_position):
+            raise ValueError("position %s is not on the lattice of this frame" % (position,))
+        return tuple(int(coordinate) for coordinate in lattice_position)
+
+    def to_fractions(self, position):
+        """
+        Converts a scaled integer position back to a tuple of Fractions.
+        """
+        return tuple(Fraction(position[i], self.steps[i]) for i in range(self.dimensions))
+
+    def get_edge_positions(self, edge):
+        """
+        Returns the tail and head positions of an edge of this frame as tuples of Fractions.
+        """
+        return self.to_fractions(edge.tail), self.to_fractions(edge.head)
+
+    def get_vertex_positions(self):
+        """
+        Returns the positions of all the vertices of this frame as tuples of Fractions.
+        """
+        return [self.to_fractions(position) for position in self.vertices]
+
     def update_vertices(self, edge):
         """
         Input:
@@ -104,8 +141,8 @@ class Frame(object):
         as edges wherever possible amongst those vertices.
 
         NOTES:
-            (a) with these two lines we create the coordinate vector lying along this
-                dimension
+            (a) the coordinate vector lying along this dimension is one unit long, which is
+                steps[dimension] lattice steps
             (b) we will run through each of the vertices we have so far and calculate where
                 another vertex would need to be for the current coordinate vector we are
                 working with to have it's base at the current vertex. If that calculated
@@ -117,11 +154,9 @@ class Frame(object):
                 (f) see if it's already in the frame, and if it isn't then add it!
         """
         for dimension in range(self.dimensions):
-            coordinate_vector = [Fraction(0) for _ in range(self.dimensions)]                           # (a)
-            coordinate_vector[dimension] = Fraction(1)
+            step = self.steps[dimension]                                                                # (a)
             for position in self.vertices:                                                              # (b)
-                head_position = tuple([position[i] + coordinate_vector[i]
-                                       for i in range(self.dimensions)])                                # (c)
+                head_position = position[:dimension] + (position[dimension] + step,) + position[dimension + 1:]  # (c)
                 if head_position in self.vertices:                                                      # (d)
                     edge = Edge(position, head_position, dimension)                                     # (e)
                     if edge not in self.coordinate_vectors:                                             # (f)
@@ -142,26 +177,23 @@ class Frame(object):
                 identical sets of vertices in layers 1/step[dimension] apart and stacked
                 along this new dimension. We will add enough layers so that we go from 0
                 in that dimension to 1 (i.e. step[dimension] layers).
-                (d) distance between the layers
+                (d) consecutive layers are one lattice step apart
                 (e) we go ahead and generate all the positions taken up by the new vertices.
                     We do this by taking each vertex and finding its new position in each
                     layer and adding all these positions to a new position list
                 (f) then we use these positions to create new vertices and add them to our
                     self.vertices
         """
-        origin = tuple([Fraction(0) for _ in range(self.dimensions)])                                   # (a)
+        origin = tuple([0 for _ in range(self.dimensions)])                                             # (a)
         vertex = Vertex(origin, self.num_vectors)
         self.vertices[origin] = vertex                                                                  # (b)
         for dimension in range(self.dimensions):                                                        # (c)
             old_positions = [position for position in self.vertices]
             new_positions = []
-            num_layers = self.steps[dimension]
-            distance = Fraction(1, num_layers)                                                          # (d)
+            num_layers = self.steps[dimension]                                                          # (d)
             for position in old_positions:                                                              # (e)
                 for i in range(num_layers):
-                    new_position = [e for e in position]
-                    new_position[dimension] += (i + 1) * distance
-                    new_positions.append(tuple(new_position))
+                    new_positions.append(position[:dimension] + (position[dimension] + i + 1,) + position[dimension + 1:])
             for position in new_positions:                                                              # (f)
                 vertex = Vertex(position, self.num_vectors)
                 self.vertices[position] = vertex
@@ -179,32 +211,44 @@ class Frame(object):
         Input:
             edges - a set of edges
             dimension - the index of the dimension along which to move before creating the copy
-            distance - the distance to move before pasting the copy
+            distance - the distance (a Fraction) to move before pasting the copy
 
         This method takes a series of edges, copies them, and then pastes them the specified
         distance along the specified dimension. It updates the input list of edges with the
         edges added.
+        """
+        offset = Fraction(distance) * self.steps[dimension]
+        if offset.denominator != 1:
+            raise ValueError("distance %s is not a multiple of 1/%s" % (distance, self.steps[dimension]))
+        self.shift_and_add(edges, dimension, int(offset))
+
+    def shift_and_add(self, edges, dimension, offset):
+        """
+        Input:
+            edges - a set of edges
+            dimension - the index of the dimension along which to move before creating the copy
+            offset - the number of lattice steps to move before pasting the copy
+
+        This is copy_and_add with the distance already expressed in lattice steps.
 
         NOTES:
-            (a) we create these lists so that we can modify the tail and head positions without
-                screwing up the old edge's position.
-            (b) we get the position of the new edge's tail and head
-            (c) we create the new edge
-            (d) if the edge we intend to paste already exists in our frame we just move onto the
+            (a) we get the position of the new edge's tail and head by shifting one coordinate
+            (b) we create the new edge
+            (c) if the edge we intend to paste already exists in our frame we just move onto the
                 next edge
-            (e) if it doesn't exist we add it to the list of new edges and update the vertices
-            (f) finally we update the original list with the new edges
+            (d) if it doesn't exist we add it to the list of new edges and update the vertices
+            (e) finally we update the original list with the new edges
         """
         new_edges = []
         for edge in edges:
-            tail, head = [e for e in edge.tail], [e for e in edge.head]                                 # (a)
-            tail[dimension] += distance                                                                 # (b)
-            head[dimension] += distance
-            new_edge = Edge(tail, head, edge.id)                                                        # (c)
-            if new_edge in edges: continue                                                              # (d)
-            new_edges.append(new_edge)                                                                  # (e)
+            tail, head = edge.tail, edge.head                                                           # (a)
+            tail = tail[:dimension] + (tail[dimension] + offset,) + tail[dimension + 1:]
+            head = head[:dimension] + (head[dimension] + offset,) + head[dimension + 1:]
+            new_edge = Edge(tail, head, edge.id)                                                        # (b)
+            if new_edge in edges: continue                                                              # (c)
+            new_edges.append(new_edge)                                                                  # (d)
             self.welcome_edge(new_edge)
-        edges.update(new_edges)                                                                         # (f)
+        edges.update(new_edges)                                                                         # (e)
 
     def seed_frame(self, shape):
         """
@@ -224,7 +268,7 @@ class Frame(object):
         self.create_hyper_cube()                                                                        # (a)
         for i in range(self.dimensions):                                                                # (b)
             for j in range(int((shape[i] - 1) * self.steps[i])):
-                self.copy_and_add(self.coordinate_vectors, i, Fraction(1, self.steps[i]))
+                self.shift_and_add(self.coordinate_vectors, i, 1)
         self.shape = shape                                                                              # (c)
 
     def populate(self, cross_vector):
@@ -232,6 +276,9 @@ class Frame(object):
         Input:
             cross_vector - an Edge corresponding to a cross vector
 
+        The cross vector is given in Fraction coordinates, like any position coming from outside
+        the frame.
+
         This method takes an example cross vector, figures out what the vector difference is between
         it's head and tail, and then adds every possible edge of the same kind that can fit between
         the vertices currently in the frame.
@@ -245,7 +292,8 @@ class Frame(object):
                 from the current vertex
             (b) check if the vertex exists and if it does create and add the edge!
         """
-        edge_dif = [cross_vector.head[i] - cross_vector.tail[i] for i in range(self.dimensions)]
+        tail, head = self.to_lattice(cross_vector.tail), self.to_lattice(cross_vector.head)
+        edge_dif = [head[i] - tail[i] for i in range(self.dimensions)]
         for position in self.vertices:
             needed_position = tuple([position[i] + edge_dif[i] for i in range(self.dimensions)])        # (a)
             if needed_position in self.vertices:                                                        # (b)
@@ -262,11 +310,11 @@ class Frame(object):
 
         NOTES:
             (a) we simply copy and paste the current frame (cross and coordinate vectors) by
-                the smallest distance between vertices specified by steps[dimension]
+                one lattice step, the smallest distance between vertices along this dimension
         """
         for i in range(int(self.shape[dimension] * self.steps[dimension])):                             # (a)
-            self.copy_and_add(self.cross_vectors, dimension, Fraction(1, self.steps[dimension]))
-            self.copy_and_add(self.coordinate_vectors, dimension, Fraction(1, self.steps[dimension]))
+            self.shift_and_add(self.cross_vectors, dimension, 1)
+            self.shift_and_add(self.coordinate_vectors, dimension, 1)
         self.shape[dimension] += self.shape[dimension]
 
     def grow_to_size(self, block_shape):
@@ -277,8 +325,8 @@ class Frame(object):
             return False
         for i in range(len(deltas)):
             for j in range(int(deltas[i] * self.steps[i])):
-                self.copy_and_add(self.cross_vectors, i, Fraction(1, self.steps[i]))
-                self.copy_and_add(self.coordinate_vectors, i, Fraction(1, self.steps[i]))
+                self.shift_and_add(self.cross_vectors, i, 1)
+                self.shift_and_add(self.coordinate_vectors, i, 1)
         self.shape = block_shape
         return True
 
@@ -1,4 +1,5 @@
 import numpy as np
+from .helpers import get_lattice_positions
 
 class Edge(object):
     def __init__(self, head, tail, id):
@@ -26,9 +27,10 @@ class Edge(object):
         return int(hash(self.tail) * (hash(self.head) ** 2 ))
 
 class Vertex(object):
-    def __init__(self, position, num_vectors):
+    def __init__(self, position, num_vectors, index=0):
         self.position = np.array(position)
         self.num_vectors = num_vectors
+        self.index = index # row block of this vertex in the linear system
         self.incoming = [Edge(None, None, -1) for i in range(num_vectors)]
         self.outgoing = [Edge(None, None, -1) for i in range(num_vectors)]
         
@@ -58,7 +60,9 @@ class Frame(object):
         q (int): The value of q for the frame.
         shape (list): An array representing how many vertices are along each dimension.
         vertices (dict): A dictionary of vertices with their positions as keys.
-        edges (set): The set of edges in the frame.
+        vertex_list (list): The same vertices, in vertex index order.
+        index_grid (ndarray): The vertex index at every position of the frame.
+        edges (list): The edges in the frame, in pin order.
     """
 
     def __init__(self, matrix, q=1):
@@ -66,11 +70,12 @@ class Frame(object):
         self.num_vectors = matrix.shape[1]
         self.matrix = matrix
         self.q = q
-        Edge.pin = 0
         self.shape = self.get_first_shape()
         self.vertices = {}
+        self.vertex_list = []
+        self.index_grid = np.zeros(0, dtype=np.int64).reshape((0,) * self.dimensions)
         self.populate_vertices(np.zeros(self.dimensions, dtype=np.int16),  np.array(self.shape, dtype=np.int16))
-        self.edges = set()
+        self.edges = []
         self.populate_edges(np.zeros(self.dimensions, dtype=np.int16),  np.array(self.shape, dtype=np.int16))
         
     def get_first_shape(self):
@@ -81,31 +86,52 @@ class Frame(object):
         return self.shape
     
     def populate_vertices(self, start, end):
-        for position in self.iterate_vertices(start, end):
-            self.vertices[tuple(position)] = Vertex(position, self.num_vectors)
-    
-    def iterate_vertices(self, start, end):
-        start = np.array(start)
-        end = np.array(end)
-        for i in range(np.product(end - start)):
-            position = np.zeros(self.dimensions)
-            for j, dim in enumerate(end - start):
-                position[j] = i % dim
-                i = i // dim
-            position += start
-            yield position
+        positions = get_lattice_positions(start, end)
+        first_index = len(self.vertex_list)
+        self.grow_index_grid()
+        self.index_grid[tuple(np.transpose(positions))] = np.arange(first_index, first_index + len(positions))
+        for (i, position) in enumerate(positions):
+            vertex = Vertex(position, self.num_vectors, first_index + i)
+            self.vertices[tuple(position)] = vertex
+            self.vertex_list.append(vertex)
+
+    def grow_index_grid(self):
+        """
+        Enlarges index_grid to the current shape, keeping the indices already in it.
+        """
+        if list(self.index_grid.shape) == list(self.shape):
+            return
+        index_grid = np.full(self.shape, -1, dtype=np.int64)
+        index_grid[tuple(slice(0, extent) for extent in self.index_grid.shape)] = self.index_grid
+        self.index_grid = index_grid
 
     def populate_edges(self, start, end):
-        vectors = np.transpose(self.matrix)
+        vectors = np.transpose(self.matrix).astype(np.int64)
         for (vector_id, vector) in enumerate(vectors):
             min_position, max_position = self.get_bounds(vector, start, end)
-            valid_tail_positions = self.iterate_vertices(min_position, max_position)
-            for tail_position in valid_tail_positions:
-                tail = self.vertices[tuple(tail_position)]
-                head_position = tail_position + vector
-                head = self.vertices[tuple(head_position)]
-                edge = Edge(head, tail, vector_id)
-                self.edges.add(edge)
+            self.add_edges_in_box(vector_id, vector, min_position, max_position)
+
+    def add_edges_in_box(self, vector_id, vector, min_position, max_position):
+        """
+        Adds an edge of the given vector at every tail position in the box [min_position,
+        max_position). The tail and head vertices are found with one array shift and one lookup
+        in index_grid for the whole box.
+        """
+        tail_positions = get_lattice_positions(min_position, max_position)
+        tail_indices = self.index_grid[tuple(np.transpose(tail_positions))]
+        head_indices = self.index_grid[tuple(np.transpose(tail_positions + vector))]
+        for (tail_index, head_index) in zip(tail_indices, head_indices):
+            self.add_edge(self.vertex_list[head_index], self.vertex_list[tail_index], vector_id)
+
+    def add_edge(self, head, tail, vector_id):
+        """
+        Creates an edge between two vertices of the frame and gives it the next free pin. Pins
+        are never renumbered, so an edge keeps its column in the linear system as the frame grows.
+        """
+        edge = Edge(head, tail, vector_id)
+        edge.pin = len(self.edges)
+        self.edges.append(edge)
+        return edge
 
     def get_bounds(self, vector, start, end):
         shape = end - start
@@ -118,31 +144,106 @@ class Frame(object):
                 max_position[i] = shape[i] - component
         return min_position + start, max_position + start
 
-    # a function to double the size of the frame along 1 dimension
-    def expand(self):
-        dimension = np.argmin(np.divide(self.shape, np.max(self.matrix, axis = 1)))
-        self.shape[dimension] *= 2
-        self.vertices = {}
-        self.populate_vertices(np.zeros(self.dimensions, dtype=np.int16),  np.array(self.shape, dtype=np.int16))
-        self.edges = set()
-        self.populate_edges(np.zeros(self.dimensions, dtype=np.int16),  np.array(self.shape, dtype=np.int16))
-            
-    def add_new_edges(self, start):
-        vectors = np.transpose(self.matrix)
+    def get_edge_arrays(self, start_pin=0):
+        """
+        Returns three parallel integer arrays holding, in pin order and starting at start_pin, the
+        index of each edge's tail vertex, the index of its head vertex and the id of the vector
+        (column of the matrix) it corresponds to.
+        """
+        edges = self.edges[start_pin:]
+        tails = np.fromiter((edge.tail.index for edge in edges), dtype=np.int64, count=len(edges))
+        heads = np.fromiter((edge.head.index for edge in edges), dtype=np.int64, count=len(edges))
+        ids = np.fromiter((edge.id for edge in edges), dtype=np.int64, count=len(edges))
+        return tails, heads, ids
+
+    def get_num_vertices(self):
+        return len(self.vertices)
+
+    def get_num_edges(self):
+        return len(self.edges)
+
+    def get_positions(self):
+        """
+        Returns the position of every vertex as an (n, dimensions) array, in vertex index order.
+        """
+        return np.array([vertex.position for vertex in self.vertex_list])
+
+    def get_vertex_remap(self):
+        """
+        Vertex indices of this frame never change, so there is never anything to remap.
+        """
+        return None
+
+    def set_weights(self, weights):
+        for edge in self.edges:
+            edge.weight = weights[edge.pin]
+
+    def get_weights(self):
+        return np.array([edge.weight for edge in self.edges])
+
+    # a function to grow the frame along 1 dimension
+    def expand(self, dimension=None, amount=None):
+        """
+        Grows the frame by amount vertices along one dimension; by default it doubles the
+        dimension that is shortest relative to the longest vector component along it. Only the new
+        slab of vertices and the edges that have at least one end in it are created; everything
+        already in the frame (vertex indices and edge pins included) is left untouched.
+        """
+        if dimension is None:
+            dimension = self.get_expand_dimension()
+        if amount is None:
+            amount = self.shape[dimension]
+        old_shape = np.array(self.shape, dtype=np.int16)
+        self.shape[dimension] += int(amount)
+        slab_start = np.zeros(self.dimensions, dtype=np.int16)
+        slab_start[dimension] = old_shape[dimension]
+        self.populate_vertices(slab_start, np.array(self.shape, dtype=np.int16))
+        self.add_new_edges(old_shape)
+
+    def grow_to_shape(self, shape):
+        """
+        Grows the frame one dimension at a time until it has the given shape. Returns False (and
+        leaves the frame alone) if it is already larger than shape along some dimension.
+        """
+        if any(extent < current for extent, current in zip(shape, self.shape)):
+            return False
+        for dimension, extent in enumerate(shape):
+            if extent > self.shape[dimension]:
+                self.expand(dimension, extent - self.shape[dimension])
+        return True
+
+    def get_expand_dimension(self):
+        return int(np.argmin(np.divide(self.shape, np.max(np.abs(self.matrix), axis = 1))))
+
+    def add_new_edges(self, old_shape):
+        """
+        Adds every edge that fits in the current shape but did not fit in old_shape.
+
+        NOTES:
+            (a) the tails of the edges of one vector form a box (see get_bounds), both before and
+                after the growth
+            (b) if nothing fit before, the whole new box is new
+            (c) otherwise the difference of the two boxes is split into disjoint slabs: slab i
+                takes the new part of dimension i, the old range along the dimensions before i
+                and the new range along the dimensions after it
+        """
+        origin = np.zeros(self.dimensions, dtype=np.int16)
+        shape = np.array(self.shape, dtype=np.int16)
+        vectors = np.transpose(self.matrix).astype(np.int64)
         for (vector_id, vector) in enumerate(vectors):
-            added_positions = self.iterate_vertices(start, self.shape)
-            for head_position in added_positions:
-                tail_position = head_position - vector
-                if(tuple(tail_position) in self.vertices):
-                    tail = self.vertices[tuple(tail_position)]
-                    head = self.vertices[tuple(head_position)]
-                    edge = Edge(head, tail, vector_id)
-                    self.edges.add(edge)
-            added_positions = self.iterate_vertices(start, self.shape)
-            for tail_position in added_positions:
-                head_position = tail_position + vector
-                if(tuple(head_position) in self.vertices):
-                    tail = self.vertices[tuple(tail_position)]
-                    head = self.vertices[tuple(head_position)]
-                    edge = Edge(head, tail, vector_id)
-                    self.edges.add(edge)
+            min_position, max_position = self.get_bounds(vector, origin, shape)                        # (a)
+            old_min_position, old_max_position = self.get_bounds(vector, origin, old_shape)
+            if np.any(old_max_position <= old_min_position):                                          # (b)
+                slabs = [(min_position, max_position)]
+            else:
+                slabs = []                                                                             # (c)
+                for i in range(self.dimensions):
+                    slab_min = np.copy(min_position)
+                    slab_max = np.copy(max_position)
+                    slab_min[i] = old_max_position[i]
+                    slab_max[:i] = old_max_position[:i]
+                    slabs.append((slab_min, slab_max))
+            for slab_min, slab_max in slabs:
+                if np.any(slab_max <= slab_min):
+                    continue
+                self.add_edges_in_box(vector_id, vector, slab_min, slab_max)
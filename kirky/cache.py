@@ -0,0 +1,177 @@
+"""
+An on-disk cache of solved Kirchhoff graphs.
+
+A graph found for [qI|B] is also, up to relabelling, a graph for every matrix that differs from it
+by a permutation of the columns of B or by a signed permutation of its rows: negating or permuting
+rows reflects or permutes the coordinates of the positions, and a unit column that comes out
+negated just means its edges are reversed. Entries are therefore keyed by a canonical form of the
+matrix (after Kirchhoff.parse_matrix has augmented it and divided out the common factor, which
+takes care of a common scale of B and q) and stored in its coordinates and labels; the caller's
+matrix only determines the map in and out.
+
+Every entry is one compressed .npz file holding the edges of positive weight, the positions of
+their vertices and the weights. The least recently used entries are deleted once the files exceed
+max_bytes.
+"""
+import os
+import itertools
+import hashlib
+import numpy as np
+
+DEFAULT_MAX_BYTES = 64 * 2**20
+MAX_CANONICAL_ROWS = 6
+
+
+def get_signed_permutations(dimensions):
+    """
+    Yields every signed permutation matrix of the given size (only the identity for more than
+    MAX_CANONICAL_ROWS rows).
+    """
+    if dimensions > MAX_CANONICAL_ROWS:
+        yield np.identity(dimensions, dtype=np.int64)
+        return
+    for permutation in itertools.permutations(range(dimensions)):
+        for signs in itertools.product((1, -1), repeat=dimensions):
+            M = np.zeros((dimensions, dimensions), dtype=np.int64)
+            M[list(permutation), range(dimensions)] = signs
+            yield M
+
+
+def canonicalize(matrix):
+    """
+    Input:
+        matrix - an augmented matrix [qI|B] (as Kirchhoff.matrix holds it)
+
+    Returns (canonical, M, labels, signs): the canonical matrix [qI|B_c], the signed permutation
+    M it was found with, and for every column l of matrix the column labels[l] of canonical with
+    M @ matrix[:, l] = signs[l] * canonical[:, labels[l]].
+
+    NOTES:
+        (a) the canonical B_c is the lexicographically smallest M @ B with its columns sorted,
+            over every signed permutation M
+        (b) M @ qI = qM, so unit column i turns into unit column pi(i), negated where M negates
+        (c) the columns of B move to wherever sorting put them
+    """
+    matrix = np.rint(np.asarray(matrix, dtype=np.float64)).astype(np.int64)
+    dimensions = matrix.shape[0]
+    B = matrix[:, dimensions:]
+    best = None
+    for M in get_signed_permutations(dimensions):                                                   # (a)
+        transformed = M @ B
+        order = np.lexsort(transformed[::-1])
+        key = transformed[:, order]
+        if best is None or key.T.tolist() < best[0].T.tolist():
+            best = (key, M, order)
+    key, M, order = best
+    canonical = np.hstack([matrix[:, :dimensions], key])
+    labels = np.zeros(matrix.shape[1], dtype=np.int64)
+    signs = np.ones(matrix.shape[1], dtype=np.int64)
+    rows, columns = np.nonzero(M)
+    labels[columns] = rows                                                                          # (b)
+    signs[columns] = M[rows, columns]
+    labels[dimensions + order] = dimensions + np.arange(len(order))                                 # (c)
+    return canonical, M, labels, signs
+
+
+def get_cache_key(canonical, q):
+    """
+    The name of the entry: a hash of the canonical matrix and q (the null matrix of a Kirchhoff
+    object is built with q as given, not divided by the common factor).
+    """
+    return hashlib.sha256(np.ascontiguousarray(canonical, dtype=np.int64).tobytes() +
+                          str((canonical.shape, q)).encode()).hexdigest()
+
+
+class GraphCache(object):
+    """
+    Solved graphs on disk, by canonical matrix.
+
+    Attributes:
+        directory (str): Where the entries live (by default $XDG_CACHE_HOME/kirky or
+            ~/.cache/kirky).
+        max_bytes (int): How large the entries may get together before the least recently used
+            ones are deleted.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        if directory is None:
+            root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            directory = os.path.join(root, 'kirky')
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get_path(self, canonical, q):
+        return os.path.join(self.directory, get_cache_key(canonical, q) + '.npz')
+
+    def get(self, matrix, q=1):
+        """
+        Returns the cached graph for matrix and q as (positions, tails, heads, ids, weights) in its own
+        coordinates and labels (tails and heads index positions), or None.
+        """
+        canonical, M, labels, signs = canonicalize(matrix)
+        path = self.get_path(canonical, q)
+        try:
+            with np.load(path) as entry:
+                if not np.array_equal(entry['matrix'], canonical) or entry['q'] != q:
+                    return None
+                positions, tails, heads, ids = entry['positions'], entry['tails'], entry['heads'], entry['ids']
+                weights = entry['weights']
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path)
+        if weights.dtype.kind == 'U':
+            weights = np.array([int(weight) for weight in weights], dtype=object)
+        inverse_labels = np.argsort(labels)
+        reversed_edges = signs[inverse_labels[ids]] < 0
+        tails, heads = np.where(reversed_edges, heads, tails), np.where(reversed_edges, tails, heads)
+        positions = positions.astype(np.int64) @ M
+        return positions, tails, heads, inverse_labels[ids], weights
+
+    def put(self, matrix, q, positions, tails, heads, ids, weights):
+        """
+        Stores a graph for matrix and q: the edges (tails and heads indexing positions, ids the
+        columns of matrix) and their weights. Only edges of positive weight and their vertices are
+        kept.
+        """
+        canonical, M, labels, signs = canonicalize(matrix)
+        weights = np.asarray(weights)
+        support = np.flatnonzero(weights > 0)
+        tails, heads, ids = np.asarray(tails)[support], np.asarray(heads)[support], np.asarray(ids)[support]
+        vertices, indices = np.unique(np.concatenate([tails, heads]), return_inverse=True)
+        tails, heads = indices[:len(support)], indices[len(support):]
+        reversed_edges = signs[ids] < 0
+        tails, heads = np.where(reversed_edges, heads, tails), np.where(reversed_edges, tails, heads)
+        positions = np.asarray(positions, dtype=np.int64)[vertices] @ M.T
+        weights = weights[support]
+        if weights.dtype == object:
+            weights = np.array([str(int(weight)) for weight in weights]) if max(weights) >= 2**62 else \
+                weights.astype(np.int64)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_path(canonical, q)
+        temporary = path + '.%d.tmp.npz' % os.getpid()
+        np.savez_compressed(temporary, matrix=canonical, q=q, positions=positions, tails=tails.astype(np.int32),
+                            heads=heads.astype(np.int32), ids=labels[ids].astype(np.int16), weights=weights)
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until the rest fit into max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz') and '.tmp.' not in name:
+                status = os.stat(os.path.join(self.directory, name))
+                entries.append((status.st_mtime, status.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, name))
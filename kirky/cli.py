@@ -0,0 +1,84 @@
+"""
+The kirky command.
+
+    kirky "2 1; 1 2" --render graph.png --export graph.json
+    kirky batch jobs.jsonl -o results.jsonl --processes 8 --timeout 60
+
+The first form finds the Kirchhoff graph of one matrix B (rows separated by ';', or as JSON),
+optionally draws it to an image file and exports it as JSON (see FindResult.to_dict), and reports
+how long every step took on stderr. The second form hands over to kirky.batch.
+"""
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from . import Kirchhoff
+from .array_frame import ArrayFrame
+from .block_q import Frame
+from .zonotope_frame import ZonotopeFrame, BallFrame
+from .cache import GraphCache
+
+FRAME_CLASSES = {'array': ArrayFrame, 'frame': Frame, 'zonotope': ZonotopeFrame, 'ball': BallFrame}
+
+
+def parse_matrix(text):
+    """
+    Reads a matrix given as JSON ([[2, 1], [1, 2]]) or as rows separated by ';' with entries
+    separated by spaces or commas (2 1; 1 2).
+    """
+    text = text.strip()
+    if text.startswith('['):
+        return np.array(json.loads(text))
+    return np.array([[int(value) for value in row.replace(',', ' ').split()] for row in text.split(';') if row.strip()])
+
+
+def main(arguments=None):
+    arguments = sys.argv[1:] if arguments is None else arguments
+    if arguments and arguments[0] == 'batch':
+        from .batch import main as batch_main
+        return batch_main(arguments[1:])
+    parser = argparse.ArgumentParser(prog='kirky', description="Find the Kirchhoff graph of [qI|B].",
+                                     epilog="Use 'kirky batch --help' to solve many matrices at once.")
+    parser.add_argument('matrix', help="B, as '2 1; 1 2' or as JSON")
+    parser.add_argument('-q', type=int, default=1, help="the value of q (default 1)")
+    parser.add_argument('--frame', choices=sorted(FRAME_CLASSES), default='array', help="the frame class")
+    parser.add_argument('--mode', help="the solver backend (chosen by size if not given)")
+    parser.add_argument('--max-steps', type=int, help="how many frames to try (no limit by default)")
+    parser.add_argument('--cache', nargs='?', const='', help="look up and store graphs in a cache directory "
+                        "(the default one if no directory is given)")
+    parser.add_argument('--render', metavar='FILE', help="draw the graph into an image file")
+    parser.add_argument('--export', metavar='FILE', help="write the graph as JSON ('-' for stdout)")
+    arguments = parser.parse_args(arguments)
+    timings = []
+
+    start = time.perf_counter()
+    cache = None if arguments.cache is None else GraphCache(arguments.cache or None)
+    kirchhoff = Kirchhoff(parse_matrix(arguments.matrix), q=arguments.q, frame_class=FRAME_CLASSES[arguments.frame],
+                          cache=cache)
+    timings.append(('setup', time.perf_counter() - start))
+    result = kirchhoff.find(arguments.max_steps, arguments.mode)
+    backends = sorted(set(attempt.backend for attempt in result.attempts))
+    timings.append(('find', result.seconds))
+    print("%s (backends: %s)" % (result, ", ".join(backends)), file=sys.stderr)
+    if result and arguments.render:
+        start = time.perf_counter()
+        from .imagine import draw
+        draw(kirchhoff, arguments.render)
+        timings.append(('render', time.perf_counter() - start))
+    if arguments.export:
+        start = time.perf_counter()
+        exported = json.dumps(result.to_dict())
+        if arguments.export == '-':
+            print(exported)
+        else:
+            with open(arguments.export, 'w') as stream:
+                stream.write(exported + '\n')
+        timings.append(('export', time.perf_counter() - start))
+    for step, seconds in timings:
+        print("%-7s %.3fs" % (step, seconds), file=sys.stderr)
+    return 0 if result else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
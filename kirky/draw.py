@@ -1,9 +1,11 @@
 from pyx import path, deco, text, color
 
 
-def DrawEdge(edge, canvas):
-    head = [float(element) for element in edge.head]
-    tail = [float(element) for element in edge.tail]
+def DrawEdge(edge, canvas, frame=None):
+    # edges of a block.Frame hold scaled integer positions, so let the frame convert them
+    tail_position, head_position = (edge.tail, edge.head) if frame is None else frame.get_edge_positions(edge)
+    head = [float(element) for element in head_position]
+    tail = [float(element) for element in tail_position]
     reversed = False
     if tail[0] - head[0] > 0:
         reversed = True
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def get_vertex_blame(dual_ray, num_null_rows):
+    """
+    Input:
+        dual_ray - a Farkas certificate for the normalized system: one value per vertex row, in
+            vertex order, followed by the value of the sum condition row
+        num_null_rows - how many consecutive rows belong to each vertex
+
+    Returns how much of the certificate sits on every vertex: the sum of the absolute values of
+    its rows. A vertex without weight is not needed to prove the frame infeasible.
+    """
+    return np.abs(np.asarray(dual_ray[:-1])).reshape(-1, num_null_rows).sum(axis=1)
+
+
+def get_dimension_blame(positions, shape, reach, vertex_blame):
+    """
+    Input:
+        positions - the position of every vertex, in vertex order
+        shape - the shape of the frame
+        reach - the longest component of any vector along every dimension
+        vertex_blame - the output of get_vertex_blame
+
+    Returns how much of the certificate every dimension is responsible for.
+
+    NOTES:
+        (a) a vertex is missing edges along a dimension only if it is within reach of one of the
+            two boundaries of that dimension; the closer it is, the more edges it is missing
+        (b) growing a dimension gives exactly those vertices their missing edges (the frame is the
+            same seen from either end), so the blame of a dimension is the certificate weight of
+            its boundary vertices, weighted by that closeness
+    """
+    positions = np.asarray(positions)
+    shape = np.asarray(shape)
+    reach = np.maximum(np.asarray(reach), 1)
+    distance = np.minimum(positions, shape - 1 - positions)                                         # (a)
+    closeness = np.clip(reach - distance, 0, None) / reach
+    return np.asarray(vertex_blame) @ closeness                                                     # (b)
+
+
+def choose_growth(shape, reach, dimension_blame, threshold=0.5):
+    """
+    Returns the (dimension, amount) steps to grow the frame by: every dimension carrying at least
+    threshold times the largest blame grows by its reach, which gives each boundary vertex one
+    more full step along it, and never by more than doubling. Returns an empty list if the
+    certificate blames no dimension at all.
+    """
+    dimension_blame = np.asarray(dimension_blame)
+    if len(dimension_blame) == 0 or np.max(dimension_blame) <= 0:
+        return []
+    dimensions = np.flatnonzero(dimension_blame >= threshold * np.max(dimension_blame))
+    return [(int(dimension), int(max(1, min(reach[dimension], shape[dimension])))) for dimension in dimensions]
@@ -1,5 +1,7 @@
 from fractions import Fraction
-from math import gcd as math_gcd
+from functools import reduce
+from math import gcd as math_gcd, lcm
+import numpy as np
 
 
 def common_denominator(fractions):
@@ -18,4 +20,34 @@ def common_denominator(fractions):
         return denominators[0]
 
 def gcd(a, b):
-    return math_gcd(int(a), int(b))
\ No newline at end of file
+    return math_gcd(int(a), int(b))
+
+
+def get_lattice_positions(start, end):
+    """
+    Returns every integer position in the box [start, end) as one (n, dimensions) array, in the
+    order the frames number their vertices (the first dimension varies fastest).
+    """
+    start = np.asarray(start, dtype=np.int64)
+    extents = np.maximum(np.asarray(end, dtype=np.int64) - start, 0)
+    indices = np.unravel_index(np.arange(np.prod(extents)), tuple(extents), order='F')
+    return np.stack(indices, axis=1) + start
+
+
+def rationalize(values, max_denominator=10**6):
+    """
+    Recovers exact fractions from floating point values using continued fractions
+    (Fraction.limit_denominator).
+    """
+    return [Fraction(float(value)).limit_denominator(max_denominator) for value in values]
+
+
+def scale_to_integers(fractions):
+    """
+    Returns the smallest integer vector that is a positive multiple of the given fractions: they
+    are multiplied by the lcm of their denominators and divided by the gcd of the results.
+    """
+    multiplier = reduce(lcm, [fraction.denominator for fraction in fractions], 1)
+    integers = [int(fraction * multiplier) for fraction in fractions]
+    divider = reduce(math_gcd, integers, 0)
+    return integers if divider == 0 else [integer // divider for integer in integers]
@@ -2,110 +2,148 @@ import matplotlib.pyplot as plt
 import numpy as np
 import matplotlib.patheffects as pe
 from matplotlib.widgets import Button,Slider
-import time
 
-def draw_graph(k, x, y):    
+def get_drawable_edges(k):
+    """
+    Returns the tail positions, head positions, vector ids and weights of the edges of the frame
+    of a Kirchhoff object that carry a nonzero weight, in the coordinates of its original matrix.
+    Works with every frame class.
+    """
+    frame = k.frame
+    positions = k.get_positions()
+    tails, heads, ids = frame.get_edge_arrays()
+    weights = frame.get_weights()
+    drawn = weights != 0
+    return positions[tails[drawn]], positions[heads[drawn]], ids[drawn], weights[drawn]
 
-    # transformation matrix for projecting from n-dimensional space to 2D
-    transformation_matrix = np.array([x, y])
-        
+def get_connected_positions(k):
+    """
+    Returns the positions of the vertices touching at least one edge with a nonzero weight.
+    """
+    tails, heads, _ = k.frame.get_edge_arrays()
+    drawn = k.frame.get_weights() != 0
+    connected = np.unique(np.concatenate([tails[drawn], heads[drawn]]))
+    return k.get_positions()[connected]
+
+def get_default_projection(dimensions):
+    """
+    A projection to 2D for draw: the first two dimensions along the x and y axes, the others at
+    angles spread evenly between the y axis and the negative x axis.
+    """
+    angles = [0, np.pi / 2] + list(np.linspace(np.pi / 2, np.pi, max(dimensions - 1, 1), endpoint=False)[1:])
+    angles = angles[:dimensions]
+    return [np.cos(angle) for angle in angles], [np.sin(angle) for angle in angles]
+
+def project_edges(tails, heads, transformation_matrix, space_offset):
+    """
+    Projects the edges given by their stacked tail and head positions (one row per edge) to 2D
+    with a single matrix product, and returns the tails and components of their arrows, pulled
+    in by space_offset at both ends, and the positions of their labels.
+    """
     # constants
     LABEL_POSITION = 0.618
-    SPACE_OFFSET = 0.02
     TEXT_OFFSET = 0.025
+
+    tail_vertices = tails @ transformation_matrix.T
+    vectors = heads @ transformation_matrix.T - tail_vertices
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0)
+    tail_positions = tail_vertices + space_offset * normalized
+    components = vectors - 2 * space_offset * normalized
+    text_positions = tail_vertices + vectors * LABEL_POSITION - TEXT_OFFSET
+    return tail_positions, components, text_positions
+
+def get_stacked_edges(k):
+    """
+    Returns the tail and head positions of the drawable edges of k as float arrays with one row
+    per edge, their labels, and the positions of the vertices they touch.
+    """
+    tails, heads, ids, weights = get_drawable_edges(k)
+    tails = np.asarray(tails, dtype=np.float64).reshape(-1, k.dimensions)
+    heads = np.asarray(heads, dtype=np.float64).reshape(-1, k.dimensions)
+    labels = [f'{weight}, {vector_id + 1}' for vector_id, weight in zip(ids, weights)]
+    positions = np.asarray(get_connected_positions(k), dtype=np.float64).reshape(-1, k.dimensions)
+    return tails, heads, labels, positions
+
+def add_label(ax, position, label):
+    return ax.text(position[0], position[1], label, color='black', fontsize=8, fontweight='bold', fontname='Arial', path_effects=[pe.withStroke(linewidth=6, foreground="white")])
+
+def plot_edges(ax, tail_positions, components, text_positions, labels, vertices):
+    """
+    Draws projected edges, their labels and the vertices onto ax, and returns the quiver, the
+    scatter and the text artists.
+    """
+    # constants
     HEAD_SIZE = 5
 
-    
-    vectors = []
-    vector_text = []
-    vector_text_positions = []
-    
-    for edge in k.frame.edges:
-        if edge.weight != 0:
-            # project coordinates
-            head_vertex = np.dot(transformation_matrix, edge.head.position)
-            tail_vertex = np.dot(transformation_matrix, edge.tail.position)
-            
-            # compute coordinates
-            vector = head_vertex - tail_vertex
-            normalized = vector / np.linalg.norm(vector)
-            tail_position = tail_vertex + SPACE_OFFSET * normalized
-            components = vector - 2 * SPACE_OFFSET * normalized
-            text_position = np.subtract(tail_vertex + vector * LABEL_POSITION, TEXT_OFFSET)
-            
-            # store the information
-            vectors.append((tail_position[0], tail_position[1], components[0], components[1]))
-            vector_text.append(f'{edge.weight}, {edge.id + 1}')
-            vector_text_positions.append((text_position[0], text_position[1]))
-    
-    # retrieve the vertices
-    vertices = [np.dot(transformation_matrix, vertex.position) for vertex in k.frame.vertices.values() if vertex.is_connected()]
-    print(vertices)
-    verticesX, verticesY = zip(*vertices)
+    quiver = ax.quiver(tail_positions[:, 0], tail_positions[:, 1], components[:, 0], components[:, 1], angles='xy', scale_units='xy', scale=1, width=0.003, color='black', headwidth = HEAD_SIZE, headlength = HEAD_SIZE, headaxislength = HEAD_SIZE)
+    scatter = ax.scatter(vertices[:, 0], vertices[:, 1], color='blue')
+    ax.set_xticks(np.arange(np.floor(vertices[:, 0].min()), np.ceil(vertices[:, 0].max()) + 1, 1))
+    ax.set_yticks(np.arange(np.floor(vertices[:, 1].min()), np.ceil(vertices[:, 1].max()) + 1, 1))
+    texts = [add_label(ax, position, label) for position, label in zip(text_positions, labels)]
+    return quiver, scatter, texts
 
+def plot_graph(ax, k, transformation_matrix, space_offset=0.02):
+    """
+    Draws the edges of positive weight of the frame of k, with their labels, and the vertices they
+    touch onto ax, projected to 2D by transformation_matrix.
+    """
+    transformation_matrix = np.asarray(transformation_matrix, dtype=np.float64)
+    tails, heads, labels, positions = get_stacked_edges(k)
+    tail_positions, components, text_positions = project_edges(tails, heads, transformation_matrix, space_offset)
+    return plot_edges(ax, tail_positions, components, text_positions, labels, positions @ transformation_matrix.T)
 
-    
-    # draw everything
+def draw_graph(k, x, y):
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    ax.quiver(*zip(*vectors), angles='xy', scale_units='xy', scale=1, width=0.003, color='black', headwidth = HEAD_SIZE, headlength = HEAD_SIZE, headaxislength = HEAD_SIZE)
-    ax.scatter(verticesX, verticesY, color='blue')
-    ax.set_xticks(np.arange(min(verticesX), max(verticesX) + 1, 1))
-    ax.set_yticks(np.arange(min(verticesY), max(verticesY) + 1, 1))
-    for i, text in enumerate(vector_text):
-        ax.text(vector_text_positions[i][0], vector_text_positions[i][1], text, color='black', fontsize=8, fontweight='bold', fontname='Arial', path_effects=[pe.withStroke(linewidth=6, foreground="white")])
-    
+    plot_graph(ax, k, np.array([x, y]))
     plt.show()
-def draw_graph_slider(k, x, y):
-    
+
+def draw(k, filename, x=None, y=None):
+    """
+    Draws the graph found for k into an image file (any format matplotlib can write), without
+    opening a window. x and y project the positions to 2D (see get_default_projection).
+    """
+    if x is None or y is None:
+        x, y = get_default_projection(k.dimensions)
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+    plot_graph(ax, k, np.array([x, y]))
+    fig.savefig(filename)
+    plt.close(fig)
+
+def draw_graph_slider(k, x, y, max_labels=None):
+    """
+    Draws the graph of k projected by x and y, with a slider for the angle every dimension past
+    the second is projected at. max_labels caps how many edge labels are drawn at once (see (b));
+    by default every edge keeps its label.
+
+    NOTES:
+        (a) the artists are made once; a slider move only reprojects the stacked edges with one
+            matrix product and moves the artists in place
+        (b) drawing a label costs about as much as drawing a thousand arrows, so on large graphs
+            a slider move is dominated by the labels. With max_labels there are at most that
+            many label artists, handed to the edges whose labels are in view; with more than that
+            in view the labels are hidden until the view is zoomed in
+        (c) where the backend can blit, the figure without the edges, vertices, labels and
+            sliders is kept as a background, and a slider move only draws those onto it instead
+            of redrawing the whole figure
+    """
     # transformation matrix for projecting from n-dimensional space to 2D
-    transformation_matrix = np.array([x, y])
-        
+    transformation_matrix = np.array([x, y], dtype=np.float64)
+
     # constants
-    LABEL_POSITION = 0.618
     SPACE_OFFSET = 0.05
-    TEXT_OFFSET = 0.025
-    HEAD_SIZE = 5
-
-    
-    vectors = []
-    vector_text = []
-    vector_text_positions = []
-    
-    for edge in k.frame.edges:
-        if edge.weight != 0:
-            # project coordinates
-            head_vertex = np.dot(transformation_matrix, edge.head.position)
-            tail_vertex = np.dot(transformation_matrix, edge.tail.position)
-            
-            # compute coordinates
-            vector = head_vertex - tail_vertex
-            normalized = vector / np.linalg.norm(vector)
-            tail_position = tail_vertex + SPACE_OFFSET * normalized
-            components = vector - 2 * SPACE_OFFSET * normalized
-            text_position = np.subtract(tail_vertex + vector * LABEL_POSITION, TEXT_OFFSET)
-            
-            # store the information
-            vectors.append((tail_position[0], tail_position[1], components[0], components[1]))
-            vector_text.append(f'{edge.weight}, {edge.id + 1}')
-            vector_text_positions.append((text_position[0], text_position[1]))
-    
-    # retrieve the vertices
-    vertices = [np.dot(transformation_matrix, vertex.position) for vertex in k.frame.vertices.values() if vertex.is_connected()]
-    print(vertices)
-    verticesX, verticesY = zip(*vertices)
 
+    tails, heads, labels, positions = get_stacked_edges(k)
+    tail_positions, components, text_positions = project_edges(tails, heads, transformation_matrix, SPACE_OFFSET)
 
-    
     # draw everything
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    ax.quiver(*zip(*vectors), angles='xy', scale_units='xy', scale=1, width=0.003, color='black', headwidth = HEAD_SIZE, headlength = HEAD_SIZE, headaxislength = HEAD_SIZE)
-    ax.scatter(verticesX, verticesY, color='blue')
-    ax.set_xticks(np.arange(np.floor(min(verticesX)), np.ceil(max(verticesX)) + 1, 1))
-    ax.set_yticks(np.arange(min(verticesY), max(verticesY) + 1, 1))
-    for i, text in enumerate(vector_text):
-        ax.text(vector_text_positions[i][0], vector_text_positions[i][1], text, color='black', fontsize=8, fontweight='bold', fontname='Arial', path_effects=[pe.withStroke(linewidth=6, foreground="white")])
+    quiver, scatter, _ = plot_edges(ax, tail_positions, components, text_positions[:0], [], positions @ transformation_matrix.T)
+    num_texts = len(labels) if max_labels is None else min(max_labels, len(labels))
+    texts = [add_label(ax, (0, 0), '') for _ in range(num_texts)]
     num_dims = k.dimensions
     num_sliders = num_dims - 2
     initial_angles = np.linspace(0, np.pi, num_dims)
@@ -124,48 +162,58 @@ def draw_graph_slider(k, x, y):
         sliders.append(slider)
     # calculate how much to adjust the subplot to make room for the sliders
     fig.subplots_adjust(bottom=0.25 + 0.03 * num_sliders)
+
+    state = {'text_positions': text_positions, 'background': None}
+
+    def place_labels(*args):                                                                        # (b)
+        text_positions = state['text_positions']
+        (xmin, xmax), (ymin, ymax) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        in_view = np.flatnonzero((text_positions[:, 0] >= xmin) & (text_positions[:, 0] <= xmax) &
+                                 (text_positions[:, 1] >= ymin) & (text_positions[:, 1] <= ymax))
+        if len(in_view) > len(texts):
+            in_view = in_view[:0]
+        for text, index in zip(texts, in_view):
+            text.set_position(text_positions[index])
+            text.set_text(labels[index])
+        for i, text in enumerate(texts):
+            text.set_visible(i < len(in_view))
+
+    artists = [quiver, scatter] + texts + [slider.ax for slider in sliders]
+    if fig.canvas.supports_blit:                                                                    # (c)
+        for artist in artists:
+            artist.set_animated(True)
+        for slider in sliders:
+            slider.drawon = False
+
+    def draw_artists():
+        for artist in artists:
+            fig.draw_artist(artist)
+
+    def on_draw(event):
+        state['background'] = fig.canvas.copy_from_bbox(fig.bbox)
+        draw_artists()
+
     def update(val):
-        time.sleep(0.05)
-        angles = [0, np.pi / 2] + [slider.val for slider in sliders]
-        transformation_matrix = np.array([[np.cos(angle) for angle in angles], [np.sin(angle) for angle in angles]])
-        print(np.round(transformation_matrix, decimals=2))
-        xlim = ax.get_xlim()
-        ylim = ax.get_ylim()
-        ax.clear()
-        vectors = []
-        vector_text = []
-        vector_text_positions = []
-        for edge in k.frame.edges:
-            if edge.weight != 0:
-                # project coordinates
-                head_vertex = np.dot(transformation_matrix, edge.head.position)
-                tail_vertex = np.dot(transformation_matrix, edge.tail.position)
-                
-                # compute coordinates
-                vector = head_vertex - tail_vertex
-                normalized = vector / np.linalg.norm(vector)
-                tail_position = tail_vertex + SPACE_OFFSET * normalized
-                components = vector - 2 * SPACE_OFFSET * normalized
-                text_position = np.subtract(tail_vertex + vector * LABEL_POSITION, TEXT_OFFSET)
-                
-                # store the information
-                vectors.append((tail_position[0], tail_position[1], components[0], components[1]))
-                vector_text.append(f'{edge.weight}, {edge.id + 1}')
-                vector_text_positions.append((text_position[0], text_position[1]))
-        # retrieve the vertices
-        vertices = [np.dot(transformation_matrix, vertex.position) for vertex in k.frame.vertices.values() if vertex.is_connected()]
-        verticesX, verticesY = zip(*vertices)
-        ax.quiver(*zip(*vectors), angles='xy', scale_units='xy', scale=1, width=0.003, color='black', headwidth = HEAD_SIZE, headlength = HEAD_SIZE, headaxislength = HEAD_SIZE)
-        ax.scatter(verticesX, verticesY, color='blue')
-        ax.set_xticks(np.arange(np.floor(min(verticesX)), np.ceil(max(verticesX)) + 1, 1))
-        ax.set_yticks(np.arange(min(verticesY), max(verticesY) + 1, 1))
-        ax.set_xlim(xlim)
-        ax.set_ylim(ylim)
-        for i, text in enumerate(vector_text):
-            ax.text(vector_text_positions[i][0], vector_text_positions[i][1], text, color='black', fontsize=8, fontweight='bold', fontname='Arial', path_effects=[pe.withStroke(linewidth=6, foreground="white")])
-        plt.show()
-        xlim = ax.get_xlim()
-        ylim = ax.get_ylim()
+        angles = np.array([0, np.pi / 2] + [slider.val for slider in sliders])
+        transformation_matrix = np.array([np.cos(angles), np.sin(angles)])
+        tail_positions, components, state['text_positions'] = project_edges(tails, heads, transformation_matrix, SPACE_OFFSET)  # (a)
+        quiver.set_offsets(tail_positions)
+        quiver.set_UVC(components[:, 0], components[:, 1])
+        scatter.set_offsets(positions @ transformation_matrix.T)
+        place_labels()
+        if state['background'] is None:
+            fig.canvas.draw_idle()
+            return
+        fig.canvas.restore_region(state['background'])
+        draw_artists()
+        fig.canvas.blit(fig.bbox)
+        fig.canvas.flush_events()
+
+    place_labels()
+    ax.callbacks.connect('xlim_changed', place_labels)
+    ax.callbacks.connect('ylim_changed', place_labels)
+    if fig.canvas.supports_blit:
+        fig.canvas.mpl_connect('draw_event', on_draw)
     for slider in sliders:
         slider.on_changed(update)
     plt.show()
@@ -173,10 +221,9 @@ def draw_graph_slider(k, x, y):
 def draw3d(k):
 	plt.clf()
 	print("The current plt figure number is", plt.gcf().number)
-	edges = list(k.frame.edges)
-	edges = [edge for edge in edges if edge.weight != 0]
-	tail_coordinates = [[int(coord) for coord in edge.tail] for edge in edges]
-	head_coordinates = [[int(coord) for coord in edge.head] for edge in edges]
+	tail_positions, head_positions, _, weights = get_drawable_edges(k)
+	tail_coordinates = [[int(coord) for coord in tail] for tail in tail_positions]
+	head_coordinates = [[int(coord) for coord in head] for head in head_positions]
 	text_coordinates = np.divide(np.add(tail_coordinates, head_coordinates), 2)
 	edge_components = np.subtract(head_coordinates, tail_coordinates)
 	X, Y, Z= zip(*(tail_coordinates))
@@ -190,8 +237,8 @@ def draw3d(k):
 	ax.set_ylim(y_lim)
 	ax.set_zlim(z_lim)
 	ax.quiver(X, Y, Z, U, V, W, arrow_length_ratio=0.1, pivot='tail', color='blue')
-	for i, edge in enumerate(edges):
-		ax.text(text_coordinates[i][0], text_coordinates[i][1], text_coordinates[i][2], f'{int(edge.weight)}', color='black', fontsize=10, fontweight='bold', fontname='Arial')
+	for i, weight in enumerate(weights):
+		ax.text(text_coordinates[i][0], text_coordinates[i][1], text_coordinates[i][2], f'{int(weight)}', color='black', fontsize=10, fontweight='bold', fontname='Arial')
 	ax.scatter(X, Y, Z, color='brown')
 	ax.set_xticks(np.arange(min(X), max(X)+1, 1))
 	ax.set_yticks(np.arange(min(Y), max(Y)+1, 1))
@@ -0,0 +1,117 @@
+from fractions import Fraction
+import numpy as np
+
+
+def get_gram_schmidt(basis):
+    """
+    Returns the Gram-Schmidt coefficients mu and squared lengths of the orthogonalized rows of
+    basis, exactly.
+    """
+    orthogonal, mu, lengths = [], [], []
+    for i, row in enumerate(basis):
+        vector = [Fraction(value) for value in row]
+        mu.append([Fraction(0)] * len(basis))
+        for j in range(i):
+            if lengths[j] == 0:
+                continue
+            mu[i][j] = sum(Fraction(value) * other for value, other in zip(row, orthogonal[j])) / lengths[j]
+            vector = [value - mu[i][j] * other for value, other in zip(vector, orthogonal[j])]
+        orthogonal.append(vector)
+        lengths.append(sum(value * value for value in vector))
+    return mu, lengths
+
+
+def lll_reduce(rows, delta=Fraction(3, 4)):
+    """
+    Input:
+        rows - linearly independent integer rows
+        delta - the Lovasz constant
+
+    Returns (reduced, transform) with reduced = transform @ rows, transform unimodular, and the
+    rows of reduced LLL reduced. Everything is exact; the row count is the number of dimensions of
+    a Kirchhoff matrix, so recomputing the Gram-Schmidt data after every step is cheap.
+
+    NOTES:
+        (a) size reduction: subtract the nearest integer multiple of earlier rows
+        (b) the Lovasz condition; if it fails the two rows are swapped and we step back
+    """
+    basis = [[int(value) for value in row] for row in rows]
+    transform = [[int(i == j) for j in range(len(basis))] for i in range(len(basis))]
+    k = 1
+    while k < len(basis):
+        for j in range(k - 1, -1, -1):                                                              # (a)
+            mu, _ = get_gram_schmidt(basis)
+            multiple = round(mu[k][j])
+            if multiple:
+                basis[k] = [value - multiple * other for value, other in zip(basis[k], basis[j])]
+                transform[k] = [value - multiple * other for value, other in zip(transform[k], transform[j])]
+        mu, lengths = get_gram_schmidt(basis)
+        if lengths[k] >= (delta - mu[k][k - 1] ** 2) * lengths[k - 1]:                              # (b)
+            k += 1
+        else:
+            basis[k], basis[k - 1] = basis[k - 1], basis[k]
+            transform[k], transform[k - 1] = transform[k - 1], transform[k]
+            k = max(k - 1, 1)
+    return basis, transform
+
+
+def reduce_max_entries(basis, transform):
+    """
+    LLL shortens rows in the euclidean norm, but the size of a frame depends on the largest entry
+    of each row. This keeps adding or subtracting one row to or from another while that lowers the
+    largest entry of the changed row (or its sum of absolute values, if the largest entry stays).
+    """
+    def size(row):
+        return max(abs(value) for value in row), sum(abs(value) for value in row)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(basis)):
+            for j in range(len(basis)):
+                for sign in (1, -1):
+                    if i == j:
+                        continue
+                    candidate = [value + sign * other for value, other in zip(basis[i], basis[j])]
+                    if size(candidate) < size(basis[i]):
+                        basis[i] = candidate
+                        transform[i] = [value + sign * other for value, other in zip(transform[i], transform[j])]
+                        improved = True
+    return basis, transform
+
+
+def normalize_signs(basis, transform):
+    """
+    Negates every row (and its row of transform) whose largest entry in absolute value is
+    negative, so that every row has a positive entry to grow the frame along.
+    """
+    for i, row in enumerate(basis):
+        if max(row) < -min(row):
+            basis[i] = [-value for value in row]
+            transform[i] = [-value for value in transform[i]]
+    return basis, transform
+
+
+def get_frame_size(matrix):
+    """
+    The number of vertices of the first frame of a matrix (see Frame.get_first_shape).
+    """
+    return int(np.prod(np.max(np.abs(np.asarray(matrix, dtype=np.float64)), axis=1) + 1))
+
+
+def reduce_rows(matrix):
+    """
+    Returns (reduced, transform, inverse): a unimodular transform and its inverse (integer
+    matrices) such that reduced = transform @ matrix has the same row space as matrix and a first
+    frame no larger than that of matrix, and the largest entry in absolute value of every row of
+    reduced is positive. If reduction does not help, transform is the identity.
+    """
+    matrix = np.asarray(matrix)
+    identity = np.identity(matrix.shape[0], dtype=np.int64)
+    basis, transform = normalize_signs(*reduce_max_entries(*lll_reduce(np.rint(matrix).astype(np.int64).tolist())))
+    if get_frame_size(basis) >= get_frame_size(matrix):
+        return matrix, identity, identity
+    transform = np.array(transform, dtype=np.int64)
+    inverse = np.rint(np.linalg.inv(transform)).astype(np.int64)
+    if not np.array_equal(transform @ inverse, identity):
+        return matrix, identity, identity
+    return (transform @ np.rint(matrix).astype(np.int64)).astype(matrix.dtype), transform, inverse
@@ -0,0 +1,150 @@
+"""
+Pivot column rules for the exact simplex tableaus in tableau.py.
+
+A rule only picks the entering column; the ratio test that picks the leaving row stays in the
+tableau. Rules see the tableau through three methods every tableau provides:
+
+    get_candidate_columns() - the (column, reduced cost) pairs with a negative reduced cost, in
+                              column order
+    get_column_entries(column) - the nonzero values of a column in the constraint rows
+    get_row_entries(row_index) - the nonzero values of a constraint row, by column
+
+Reduced costs are exact, so Bland and Dantzig compare exactly. Steepest edge and Devex only
+rank the candidates, so they use floats for their norms and reference weights.
+"""
+
+
+class PivotRule(object):
+    name = None
+
+    def choose_column(self, tableau, candidates):
+        raise NotImplementedError
+
+    def update(self, tableau, column, row_index):
+        """
+        Called right before a pivot on (row_index, column) is carried out.
+        """
+        pass
+
+
+class BlandRule(PivotRule):
+    """
+    The first column with a negative reduced cost. Never cycles but takes many iterations.
+    """
+    name = 'bland'
+
+    def choose_column(self, tableau, candidates):
+        return candidates[0][0]
+
+
+class DantzigRule(PivotRule):
+    """
+    The column with the most negative reduced cost (lowest index on ties).
+    """
+    name = 'dantzig'
+
+    def choose_column(self, tableau, candidates):
+        return min(candidates, key=lambda candidate: (candidate[1], candidate[0]))[0]
+
+
+class SteepestEdgeRule(PivotRule):
+    """
+    The column whose reduced cost is most negative relative to the length of the edge it moves
+    along, i.e. the largest reduced_cost^2 / (1 + ||column||^2).
+    """
+    name = 'steepest'
+
+    def choose_column(self, tableau, candidates):
+        best_column, best_score = None, None
+        for column, reduced_cost in candidates:
+            norm = 1 + sum(float(value) ** 2 for value in tableau.get_column_entries(column))
+            score = float(reduced_cost) ** 2 / norm
+            if best_score is None or score > best_score:
+                best_column, best_score = column, score
+        return best_column
+
+
+class DevexRule(PivotRule):
+    """
+    Forrest and Goldfarb's Devex approximation of steepest edge: the largest
+    reduced_cost^2 / weight, where the reference weights start at one and are updated from the
+    pivot row after every pivot instead of computing column norms.
+    """
+    name = 'devex'
+
+    def __init__(self):
+        self.weights = {}
+
+    def choose_column(self, tableau, candidates):
+        return max(candidates, key=lambda candidate: (float(candidate[1]) ** 2 / self.weights.get(candidate[0], 1.0),
+                                                      -candidate[0]))[0]
+
+    def update(self, tableau, column, row_index):
+        row = tableau.get_row_entries(row_index)
+        pivot_value = float(row[column])
+        pivot_weight = self.weights.get(column, 1.0)
+        for other_column, value in row.items():
+            if other_column != column:
+                ratio = float(value) / pivot_value
+                self.weights[other_column] = max(self.weights.get(other_column, 1.0), ratio * ratio * pivot_weight)
+        for leaving_column, basis_row in tableau.basis_dict.items():
+            if basis_row == row_index:
+                self.weights[leaving_column] = max(pivot_weight / (pivot_value * pivot_value), 1.0)
+        self.weights[column] = 1.0
+
+
+PIVOT_RULES = {rule.name: rule for rule in [BlandRule, DantzigRule, SteepestEdgeRule, DevexRule]}
+
+
+def get_pivot_rule(rule):
+    """
+    Returns a PivotRule instance given either an instance or one of the names in PIVOT_RULES.
+    """
+    if isinstance(rule, PivotRule):
+        return rule
+    if rule not in PIVOT_RULES:
+        raise ValueError("unknown pivot rule %s, expected one of %s" % (rule, sorted(PIVOT_RULES)))
+    return PIVOT_RULES[rule]()
+
+
+class PivotTracker(object):
+    """
+    Owns the pivot rule of a tableau and counts its iterations. If more than degeneracy_limit
+    pivots in a row leave the objective unchanged, the tableau is assumed to be cycling and the
+    rule is replaced by Bland's rule, which cannot cycle.
+    """
+
+    def __init__(self, rule='bland', degeneracy_limit=50):
+        self.rule = get_pivot_rule(rule)
+        self.requested_rule = self.rule.name
+        self.degeneracy_limit = degeneracy_limit
+        self.iterations = 0
+        self.degenerate_iterations = 0
+        self.degenerate_streak = 0
+        self.fell_back_to_bland = False
+
+    def choose_column(self, tableau, candidates):
+        return self.rule.choose_column(tableau, candidates)
+
+    def record(self, tableau, column, row_index, degenerate):
+        """
+        Called right before every pivot.
+        """
+        self.rule.update(tableau, column, row_index)
+        self.iterations += 1
+        if degenerate:
+            self.degenerate_iterations += 1
+            self.degenerate_streak += 1
+        else:
+            self.degenerate_streak = 0
+        if self.degenerate_streak > self.degeneracy_limit and not isinstance(self.rule, BlandRule):
+            self.rule = BlandRule()
+            self.fell_back_to_bland = True
+
+    def get_statistics(self):
+        return {
+            'rule': self.requested_rule,
+            'iterations': self.iterations,
+            'degenerate_iterations': self.degenerate_iterations,
+            'fell_back_to_bland': self.fell_back_to_bland,
+        }
@@ -0,0 +1,169 @@
+from fractions import Fraction
+from math import gcd
+from functools import reduce
+import numpy as np
+from scipy import sparse
+
+
+class PresolvedSystem(object):
+    """
+    A smaller system equivalent to Ex=b, x>=0, together with what it takes to turn one of its
+    solutions back into a solution of the original system (the postsolve map).
+
+    Attributes:
+        E (csr_matrix): The reduced system.
+        b (ndarray): Its right hand side.
+        rows (ndarray): The rows of the original system that were kept, in order.
+        columns (ndarray): The columns of the original system that were kept, in order.
+        fixed_columns (ndarray): The columns that are zero in every solution.
+        eliminated (list): (column, row entries) for every column singleton that was solved for,
+            in the order they were eliminated.
+        infeasible (bool): Whether presolve alone proved there is no solution.
+        original_shape (tuple): The shape of the original system.
+    """
+
+    def __init__(self, E, b, rows, columns, fixed_columns, eliminated, infeasible, original_shape):
+        self.E = E
+        self.b = b
+        self.rows = rows
+        self.columns = columns
+        self.fixed_columns = fixed_columns
+        self.eliminated = eliminated
+        self.infeasible = infeasible
+        self.original_shape = original_shape
+
+    def get_report(self):
+        """
+        Returns how much the system shrank, as a dict.
+        """
+        return {
+            'original_rows': self.original_shape[0],
+            'original_columns': self.original_shape[1],
+            'rows': self.E.shape[0],
+            'columns': self.E.shape[1],
+            'fixed_columns': len(self.fixed_columns),
+            'eliminated_columns': len(self.eliminated),
+        }
+
+    def __str__(self):
+        report = self.get_report()
+        return "presolve: %d x %d -> %d x %d (%d columns fixed at zero, %d eliminated)" % (
+            report['original_rows'], report['original_columns'], report['rows'], report['columns'],
+            report['fixed_columns'], report['eliminated_columns'])
+
+    def postsolve(self, x):
+        """
+        Turns a solution of the reduced system into one of the original system, as a list of
+        Fractions: kept columns take their values from x, fixed columns are zero, and eliminated
+        columns are solved for from their rows, last eliminated first.
+        """
+        solution = [Fraction(0)] * self.original_shape[1]
+        for column, value in zip(self.columns, x):
+            solution[column] = Fraction(value)
+        for column, entries in reversed(self.eliminated):
+            solution[column] = -sum(entry * solution[other] for other, entry in entries.items() if other != column) / \
+                entries[column]
+        return solution
+
+
+def get_row_key(indices, data):
+    """
+    A key that is equal for two homogeneous rows exactly when they are multiples of each other:
+    the row divided by the gcd of its entries, with its first entry made positive.
+    """
+    divider = reduce(gcd, (abs(int(value)) for value in data), 0)
+    sign = 1 if data[0] > 0 else -1
+    return tuple(indices), tuple(sign * int(value) // divider for value in data)
+
+
+def presolve(E, b):
+    """
+    Input:
+        E - the system (dense rows or scipy.sparse) with integral entries
+        b - the right hand side
+
+    Returns a PresolvedSystem for Ex=b, x>=0. The reductions are repeated until none applies.
+
+    NOTES:
+        (a) an empty row holds trivially if its right hand side is zero and never otherwise
+        (b) a homogeneous row whose entries all have the same sign can only hold with every one of
+            its variables at zero: those columns are fixed and the row goes (at the boundary of a
+            frame this is every vertex whose edges all point away from it, and then their other
+            ends, and so on)
+        (c) a homogeneous row that is a multiple of another one is redundant
+        (d) a column that appears in a single homogeneous row, whose other entries all have the
+            opposite sign, is determined by that row and automatically nonnegative: the row and
+            the column go, and postsolve computes it. Rows with a nonzero right hand side are left
+            out of the count, since in a normalized system every weight has an entry in the sum
+            condition row; that entry goes with the column. The sum condition only asks for
+            nontrivial weights, and an eliminated column only adds to the sum and is zero when
+            the rest of its row is, so the reduced system is solvable exactly when the original
+            one is, as long as the slack of the sum condition is chosen again after postsolve
+            (see backends.postsolve_integer_solution)
+        (e) rows with a nonzero right hand side (the sum condition) are never removed, so their
+            order and that of their columns survives
+    """
+    E = sparse.csr_matrix(E)
+    b = np.asarray(b)
+    original_shape = E.shape
+    active_rows = np.ones(E.shape[0], dtype=bool)
+    active_columns = np.ones(E.shape[1], dtype=bool)
+    fixed_columns, eliminated = [], []
+    infeasible = False
+    changed = True
+    while changed and not infeasible:
+        changed = False
+        rows, columns = np.flatnonzero(active_rows), np.flatnonzero(active_columns)
+        A = E[rows][:, columns].tocsr()
+        A.eliminate_zeros()
+        row_counts = np.diff(A.indptr)
+        homogeneous = b[rows] == 0                                                                  # (e)
+        empty = row_counts == 0                                                                     # (a)
+        if np.any(empty & ~homogeneous):
+            infeasible = True
+            break
+        if np.any(empty):
+            active_rows[rows[empty]] = False
+            changed = True
+        positive = np.asarray((A > 0).sum(axis=1)).ravel()
+        one_signed = homogeneous & ~empty & ((positive == 0) | (positive == row_counts))            # (b)
+        if np.any(one_signed):
+            forced = np.unique(A[np.flatnonzero(one_signed)].indices)
+            active_columns[columns[forced]] = False
+            fixed_columns.extend(columns[forced].tolist())
+            active_rows[rows[one_signed]] = False
+            changed = True
+            continue
+        seen = set()                                                                                # (c)
+        for position in np.flatnonzero(homogeneous & ~empty):
+            start, end = A.indptr[position], A.indptr[position + 1]
+            key = get_row_key(A.indices[start:end], A.data[start:end])
+            if key in seen:
+                active_rows[rows[position]] = False
+                changed = True
+            else:
+                seen.add(key)
+        if changed:
+            continue
+        A_columns = (sparse.diags(homogeneous.astype(A.dtype)) @ A).tocsc()                         # (d)
+        A_columns.eliminate_zeros()
+        column_counts = np.diff(A_columns.indptr)
+        used_rows = set()
+        for position in np.flatnonzero(column_counts == 1):
+            row_position = A_columns.indices[A_columns.indptr[position]]
+            if row_position in used_rows:
+                continue
+            start, end = A.indptr[row_position], A.indptr[row_position + 1]
+            entries = dict(zip(A.indices[start:end].tolist(), A.data[start:end].tolist()))
+            sign = np.sign(entries[position])
+            if all(np.sign(value) == -sign for other, value in entries.items() if other != position):
+                eliminated.append((int(columns[position]),
+                                   {int(columns[other]): Fraction(int(value)) for other, value in entries.items()}))
+                active_rows[rows[row_position]] = False
+                active_columns[columns[position]] = False
+                used_rows.add(row_position)
+                changed = True
+    rows, columns = np.flatnonzero(active_rows), np.flatnonzero(active_columns)
+    reduced = E[rows][:, columns].tocsr()
+    return PresolvedSystem(reduced, b[rows], rows, columns, np.array(sorted(fixed_columns), dtype=np.int64),
+                           eliminated, infeasible, original_shape)
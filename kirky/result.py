@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class FindResult(object):
+    """
+    The outcome of Kirchhoff.find.
+
+    Attributes:
+        status (str): 'solved', or 'unsolved' if no frame it tried had a solution.
+        solution (ndarray): The solution on the final frame, as Kirchhoff.solve returns it, or
+            None.
+        shape (list): The shape of the final frame.
+        tails (ndarray): The position of the tail of every edge of positive weight, in the
+            coordinates of the original matrix.
+        vector_ids (ndarray): The vector (column of the matrix) of every such edge.
+        weights (ndarray): Their weights.
+        attempts (list): The SolverResult of every solve, in order (the first one comes from
+            backend 'cache' if the graph was cached).
+        seconds (float): The wall clock time of the whole search.
+    """
+
+    def __init__(self, status, solution, shape, tails, vector_ids, weights, attempts, seconds):
+        self.status = status
+        self.solution = solution
+        self.shape = shape
+        self.tails = tails
+        self.vector_ids = vector_ids
+        self.weights = weights
+        self.attempts = attempts
+        self.seconds = seconds
+
+    def __bool__(self):
+        return self.solution is not None
+
+    def __str__(self):
+        return "%s on a %s frame after %d solves in %.3fs" % (self.status, self.shape, len(self.attempts), self.seconds)
+
+    def to_dict(self):
+        """
+        The result as plain lists and numbers, ready for json: the status, the number of solves,
+        the seconds, and if solved the final shape, the edges of positive weight as [tail
+        position, vector] and their weights.
+        """
+        result = {'status': self.status, 'solves': len(self.attempts), 'seconds': self.seconds}
+        if self.solution is not None:
+            result['shape'] = [int(extent) for extent in self.shape]
+            result['edges'] = [[np.asarray(tail).tolist(), int(vector_id)]
+                               for tail, vector_id in zip(self.tails, self.vector_ids)]
+            result['weights'] = [int(weight) for weight in self.weights]
+        return result
@@ -0,0 +1,164 @@
+"""
+Cheap necessary conditions for a frame to hold a solution, checked before the solver runs.
+
+Every check here can only reject: a frame that passes may still have no solution, but a frame that
+fails certainly has none, so the full solve (and its system construction) can be skipped.
+"""
+from time import perf_counter
+import numpy as np
+from scipy import sparse
+
+RANK_PRIME = 2**31 - 1
+RANK_MAX_ENTRIES = 10**5
+PRESOLVE_MAX_COLUMNS = 2000
+COARSE_MAX_CELLS = 64
+
+
+class Screening(object):
+    """
+    The outcome of screening a frame.
+
+    Attributes:
+        passed (bool): Whether the frame passed every check (and so is worth solving).
+        condition (str): The name of the check that failed, or None.
+        message (str): A human readable summary.
+        seconds (float): How long the screening took.
+    """
+
+    def __init__(self, passed, condition=None, message='', seconds=0.0):
+        self.passed = passed
+        self.condition = condition
+        self.message = message
+        self.seconds = seconds
+
+    def __bool__(self):
+        return self.passed
+
+    def __str__(self):
+        return self.message
+
+
+def get_missing_vectors(ids, num_vectors):
+    """
+    Returns the vectors (columns of the matrix) that have no edge in the frame.
+    """
+    return np.flatnonzero(np.bincount(np.asarray(ids, dtype=np.int64), minlength=num_vectors) == 0)
+
+
+def get_rank_mod_p(A, p=RANK_PRIME):
+    """
+    Returns the rank of the integer matrix A over the integers modulo the prime p, by dense
+    Gaussian elimination. p is below 2**31, so every product fits in int64. The cost grows with
+    the cube of the size of A, which is why screen only calls it on up to RANK_MAX_ENTRIES
+    entries.
+    """
+    A = np.asarray(A, dtype=np.int64) % p
+    rank = 0
+    for column in range(A.shape[1]):
+        if rank == A.shape[0]:
+            break
+        candidates = np.flatnonzero(A[rank:, column])
+        if len(candidates) == 0:
+            continue
+        pivot = rank + candidates[0]
+        A[[rank, pivot]] = A[[pivot, rank]]
+        A[rank] = A[rank] * pow(int(A[rank, column]), p - 2, p) % p
+        below = rank + 1 + np.flatnonzero(A[rank + 1:, column])
+        A[below] = (A[below] - A[below, column][:, np.newaxis] * A[rank]) % p
+        rank += 1
+    return rank
+
+
+def get_coarse_system(E, b, positions, num_null_rows, max_cells=COARSE_MAX_CELLS):
+    """
+    Input:
+        E, b - a normalized system (vertex conditions, then the sum condition with its slack last)
+        positions - the position of every vertex
+        num_null_rows - how many consecutive rows of E belong to each vertex
+
+    Returns a system with far fewer rows (E_coarse as a CSR matrix, b_coarse) that every solution
+    of E satisfies.
+
+    NOTES:
+        (a) the vertices are grouped into at most max_cells boxes and the vertex conditions of
+            each box are added up; an edge inside a box cancels out of its sum
+        (b) which is why the conditions weighted by each coordinate of the position are added up
+            over the whole frame too: an edge contributes its vector times its null matrix column
+            there, wherever it lies, so edges inside boxes still have to balance
+        (c) the sum condition is kept as it is
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    num_vertices, dimensions = positions.shape
+    extents = positions.max(axis=0) - positions.min(axis=0) + 1
+    cells_per_dimension = max(1, int(np.floor(max_cells ** (1.0 / dimensions))))
+    cell_sizes = np.maximum(1, -(-extents // cells_per_dimension))
+    cell_positions = (positions - positions.min(axis=0)) // cell_sizes                              # (a)
+    _, cells = np.unique(cell_positions, axis=0, return_inverse=True)
+    cells = np.ravel(cells)
+    num_cells = int(cells.max()) + 1
+    vertex_rows = np.arange(num_vertices * num_null_rows)
+    vertices, offsets = np.divmod(vertex_rows, num_null_rows)
+    aggregation_rows = [cells[vertices] * num_null_rows + offsets]
+    aggregation_columns = [vertex_rows]
+    aggregation_data = [np.ones(len(vertex_rows))]
+    for dimension in range(dimensions):                                                             # (b)
+        aggregation_rows.append((num_cells + dimension) * num_null_rows + offsets)
+        aggregation_columns.append(vertex_rows)
+        aggregation_data.append(positions[vertices, dimension].astype(np.float64))
+    num_aggregated = (num_cells + dimensions) * num_null_rows
+    aggregation_rows.append(np.array([num_aggregated]))                                             # (c)
+    aggregation_columns.append(np.array([E.shape[0] - 1]))
+    aggregation_data.append(np.ones(1))
+    P = sparse.coo_matrix((np.concatenate(aggregation_data),
+                           (np.concatenate(aggregation_rows), np.concatenate(aggregation_columns))),
+                          shape=(num_aggregated + 1, E.shape[0])).tocsr()
+    coarse = (P @ E).tocsr()
+    b_coarse = np.zeros(coarse.shape[0])
+    b_coarse[-1] = b[-1]
+    return coarse, b_coarse
+
+
+def screen(kirchhoff, presolve=True):
+    """
+    Screens the current frame of kirchhoff, cheapest check first:
+
+        'vectors'  - a Kirchhoff graph of the matrix has an edge of every vector, so each of them
+                     has to fit into the frame somewhere
+        'presolve' - the reductions of presolve.py already prove the system infeasible, or leave
+                     nothing but the slack
+        'rank'     - the vertex conditions that are left have full column rank modulo a prime,
+                     hence over the rationals, so their only solution is zero (only checked on
+                     presolved systems of up to RANK_MAX_ENTRIES entries)
+        'coarse'   - the LP relaxation on the coarse system of get_coarse_system is infeasible
+
+    Returns a Screening. The presolved system comes from Kirchhoff.get_presolved_system, which
+    keeps it for the backend to solve. presolve tells whether the backend is going to use it;
+    if not, presolving costs more than it can save on large systems, so 'presolve' and 'rank'
+    are only checked on systems of up to PRESOLVE_MAX_COLUMNS columns.
+    """
+    start = perf_counter()
+
+    def reject(condition, message):
+        return Screening(False, condition, message, perf_counter() - start)
+
+    _, _, ids = kirchhoff.frame.get_edge_arrays()
+    missing = get_missing_vectors(ids, kirchhoff.num_vectors)
+    if len(missing):
+        return reject('vectors', "vectors %s have no edge in a frame of shape %s" % (missing.tolist(), kirchhoff.frame.shape))
+    if presolve or len(ids) <= PRESOLVE_MAX_COLUMNS:
+        E, b, presolved = kirchhoff.get_presolved_system()
+        if presolved.infeasible or presolved.E.shape[1] <= 1:
+            return reject('presolve', "presolve leaves no weights to solve for (%s)" % presolved)
+        A = presolved.E[:-1, :-1]
+        if 0 < A.shape[1] <= A.shape[0] and A.shape[0] * A.shape[1] <= RANK_MAX_ENTRIES:
+            if get_rank_mod_p(A.toarray()) == A.shape[1]:
+                return reject('rank', "the %d x %d presolved vertex conditions have full column rank" % A.shape)
+    else:
+        E, b = kirchhoff.get_normalized_system()
+    from scipy.optimize import linprog
+    num_null_rows = kirchhoff.num_vectors - kirchhoff.dimensions
+    coarse, b_coarse = get_coarse_system(E, b, kirchhoff.frame.get_positions(), num_null_rows)
+    relaxation = linprog(np.zeros(coarse.shape[1]), A_eq=coarse, b_eq=b_coarse, bounds=(0, None), method='highs')
+    if relaxation.status == 2:
+        return reject('coarse', "the LP relaxation on %d coarse conditions is infeasible" % coarse.shape[0])
+    return Screening(True, message="passed screening", seconds=perf_counter() - start)
@@ -0,0 +1,250 @@
+"""
+Searches a frontier of frame shapes for the smallest one that carries a Kirchhoff graph.
+
+Kirchhoff.solve together with grow_frame walks through frames one at a time. search_shapes
+instead lays out a frontier of candidate shapes up front, solves them in parallel on a fixed set
+of worker processes, and kills every candidate at least as large as the smallest feasible one
+found so far.
+"""
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import numpy as np
+from . import Kirchhoff
+from .array_frame import ArrayFrame
+
+
+class ShapeAttempt(object):
+    """
+    The outcome of trying one frame shape.
+
+    Attributes:
+        shape (tuple): The shape that was tried.
+        status (str): The SolverResult status ('solved', 'infeasible', ...), 'too small' if the
+            shape is smaller than the first frame shape, 'cancelled' if a smaller feasible shape
+            was found first, 'timeout', or 'error' if its process died.
+        seconds (float): The time it took to build the frame and solve it.
+        num_edges (int): The number of edges of the frame.
+    """
+
+    def __init__(self, shape, status, seconds=0.0, num_edges=0):
+        self.shape = tuple(shape)
+        self.status = status
+        self.seconds = seconds
+        self.num_edges = num_edges
+
+    def __str__(self):
+        return "%s: %s in %.3fs (%d edges)" % (list(self.shape), self.status, self.seconds, self.num_edges)
+
+
+class SearchResult(object):
+    """
+    Attributes:
+        shape (tuple): The smallest feasible shape found, or None.
+        solution (ndarray): A solution on a frame of that shape, as Kirchhoff.solve returns it.
+        attempts (list): A ShapeAttempt for every candidate, in the order they finished.
+        seconds (float): The wall clock time of the whole search.
+    """
+
+    def __init__(self, shape, solution, attempts, seconds):
+        self.shape = shape
+        self.solution = solution
+        self.attempts = attempts
+        self.seconds = seconds
+
+    def __bool__(self):
+        return self.shape is not None
+
+
+def get_size(shape):
+    return int(np.prod(shape))
+
+
+def get_candidate_shapes(first_shape, reach, max_steps=4):
+    """
+    Returns the shapes first_shape + steps * reach for every combination of 0 <= steps < max_steps
+    along each dimension, smallest (by number of vertices) first.
+    """
+    extents = [[first + step * max(step_size, 1) for step in range(max_steps)]
+               for first, step_size in zip(first_shape, reach)]
+    return sorted(itertools.product(*extents), key=lambda shape: (get_size(shape), shape))
+
+
+def try_candidate(arguments):
+    """
+    Builds and solves one candidate. Runs in the worker processes, so it only takes and returns
+    picklable values: (shape, ShapeAttempt, solution).
+    """
+    matrix, q, frame_class, shape, mode = arguments
+    start = time.perf_counter()
+    kirchhoff = Kirchhoff(np.array(matrix), q=q, frame_class=frame_class)
+    solution = kirchhoff.try_shape(list(shape), mode=mode)
+    seconds = time.perf_counter() - start
+    if kirchhoff.solver_result is None:
+        return shape, ShapeAttempt(shape, 'too small', seconds), None
+    attempt = ShapeAttempt(shape, kirchhoff.solver_result.status, seconds, kirchhoff.frame.get_num_edges())
+    return shape, attempt, solution
+
+
+def serve_candidates(connection):
+    """
+    The body of a worker process: tries every candidate it receives and sends the result (or the
+    exception it raised) back, until it receives None.
+    """
+    while True:
+        try:
+            argument = connection.recv()
+        except EOFError:
+            break
+        if argument is None:
+            break
+        try:
+            result = try_candidate(argument)
+        except Exception as error:
+            result = error
+        connection.send(result)
+    connection.close()
+
+
+class CandidateWorker(object):
+    """
+    A worker process that tries candidates one at a time. It lives for the whole search, so
+    starting a process and importing kirky in it is paid once per worker rather than once per
+    candidate. A candidate can still be stopped at any point by killing its worker.
+
+    Attributes:
+        connection (Connection): The end of the pipe to the worker kept by the search.
+        process (Process): The worker process.
+        shape (tuple): The shape of the candidate it is trying, or None.
+        started (float): When it was handed that candidate (time.perf_counter).
+    """
+
+    def __init__(self):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve_candidates, args=(child,))
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+        self.shape = None
+        self.started = None
+
+    def send(self, argument):
+        self.shape = tuple(argument[3])
+        self.started = time.perf_counter()
+        self.connection.send(argument)
+
+    def receive(self):
+        """
+        Returns what the worker sent back for its candidate; raises EOFError if it died.
+        """
+        result = self.connection.recv()
+        self.shape = None
+        return result
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def close(self):
+        """
+        Lets an idle worker exit on its own.
+        """
+        self.connection.send(None)
+        self.process.join()
+        self.connection.close()
+
+
+def search_shapes(matrix, q=1, frame_class=ArrayFrame, max_steps=4, processes=None, mode=None, timeout=None):
+    """
+    Input:
+        matrix, q, frame_class - as for Kirchhoff
+        max_steps - how many steps of the frontier to lay out along each dimension
+        processes - how many candidates are solved at once, all cores by default; 1 searches in
+            this process
+        mode - the solver backend, chosen by the default policy if None
+        timeout - seconds a candidate may take before its worker is killed (status 'timeout'),
+            or None
+
+    Returns a SearchResult with the smallest feasible candidate shape.
+
+    NOTES:
+        (a) the frontier steps every dimension by the reach of the vectors along it, starting at
+            the first frame shape
+        (b) candidates are handed out smallest first to at most processes workers, so once a
+            feasible shape is known nothing larger is ever started; a worker is only started
+            when there is a candidate for it and no idle worker to take it
+        (c) wake up for whichever comes first, a result or the earliest deadline
+        (d) a worker that died is dropped, and the next candidate starts a new one in its place
+        (e) candidates still running that are at least as large as the best shape are killed
+            right away, which frees their place for the next candidate; smaller ones are waited
+            for, since they may still turn out feasible. A solve cannot be interrupted from
+            outside, so stopping a candidate means killing its worker, and only that worker is
+            replaced
+    """
+    start = time.perf_counter()
+    kirchhoff = Kirchhoff(np.array(matrix), q=q, frame_class=frame_class)
+    reach = np.max(np.abs(kirchhoff.frame.matrix), axis=1).astype(np.int64)
+    candidates = get_candidate_shapes(kirchhoff.frame.shape, reach, max_steps)                      # (a)
+    arguments = [(np.asarray(matrix).tolist(), q, frame_class, shape, mode) for shape in candidates]
+    processes = (os.cpu_count() or 1) if processes is None else processes
+    attempts, best_shape, best_solution = [], None, None
+    if processes <= 1 and timeout is None:
+        for argument in arguments:
+            shape, attempt, solution = try_candidate(argument)
+            attempts.append(attempt)
+            if solution is not None:
+                best_shape, best_solution = shape, solution
+                break
+        attempts.extend(ShapeAttempt(argument[3], 'cancelled') for argument in arguments[len(attempts):])
+        return SearchResult(best_shape, best_solution, attempts, time.perf_counter() - start)
+    pending = list(reversed(arguments))
+    idle, running = [], {}
+    try:
+        while pending or running:
+            while pending and (idle or len(running) < processes):                                  # (b)
+                argument = pending.pop()
+                if best_shape is not None and get_size(argument[3]) >= get_size(best_shape):
+                    attempts.append(ShapeAttempt(argument[3], 'cancelled'))
+                    continue
+                worker = idle.pop() if idle else CandidateWorker()
+                worker.send(argument)
+                running[worker.connection] = worker
+            if not running:
+                break
+            wait = None
+            if timeout is not None:                                                                 # (c)
+                wait = max(0.0, min(worker.started for worker in running.values()) + timeout - time.perf_counter())
+            for connection in multiprocessing.connection.wait(list(running), wait):
+                worker = running.pop(connection)
+                shape, started = worker.shape, worker.started
+                try:
+                    result = worker.receive()
+                    idle.append(worker)
+                except EOFError:                                                                    # (d)
+                    result = (shape, ShapeAttempt(shape, 'error', time.perf_counter() - started), None)
+                    worker.kill()
+                if isinstance(result, BaseException):
+                    raise result
+                shape, attempt, solution = result
+                attempts.append(attempt)
+                if solution is not None and (best_shape is None or get_size(shape) < get_size(best_shape)):
+                    best_shape, best_solution = shape, solution
+            now = time.perf_counter()
+            for connection, worker in list(running.items()):
+                if timeout is not None and now - worker.started >= timeout:
+                    del running[connection]
+                    worker.kill()
+                    attempts.append(ShapeAttempt(worker.shape, 'timeout', now - worker.started))
+                elif best_shape is not None and get_size(worker.shape) >= get_size(best_shape):     # (e)
+                    del running[connection]
+                    worker.kill()
+                    attempts.append(ShapeAttempt(worker.shape, 'cancelled', now - worker.started))
+    finally:
+        for worker in running.values():
+            worker.kill()
+        for worker in idle:
+            worker.close()
+    return SearchResult(best_shape, best_solution, attempts, time.perf_counter() - start)
@@ -0,0 +1,307 @@
+import importlib.util
+import time
+import numpy as np
+from scipy import sparse
+from .tableau import find_integer_solution, reconstruct_integer_solution, EXACT_MAX_SUPPORT, MILP_TIME_LIMIT
+
+TIGHT_TOLERANCE = 1e-10
+LP_TIME_LIMIT = 300.0
+MIN_BUDGET = 1.0
+
+
+def get_highspy():
+    """
+    Returns the highspy module, or None if it is not installed. It is imported on first use
+    rather than with kirky: it takes a while to load and most processes never need it.
+    """
+    if importlib.util.find_spec('highspy') is None:
+        return None
+    import highspy
+    return highspy
+
+
+class HighsSession(object):
+    """
+    A HiGHS model of the linear system of a Kirchhoff object that is kept alive across frame
+    expansions. Every call to solve only adds the rows (vertex conditions) and columns (edges)
+    the frame gained since the previous call. If the previous solve was optimal, HiGHS restarts
+    the simplex from the basis it ended with, which stays feasible for the grown model (the new
+    columns start at zero), so the re-solve costs about as much as the increment. The basis of
+    an infeasible model is only the end of a failed Phase I and is worse than no basis at all, so
+    after an infeasible solve the model is solved from scratch (and HiGHS presolves it).
+
+    Model layout:
+        column 0 is the slack of the sum condition, column 1 + pin is the weight of an edge
+        row 0 is the sum condition, rows 1 + slot * num_null_rows ... are the conditions of the
+        vertex in that slot; slots are handed out in the order vertices are first seen, so they
+        survive the renumbering an ArrayFrame does when it grows
+
+    Attributes:
+        kirchhoff (Kirchhoff): The object whose frame the model follows.
+        num_edges (int): How many edges (by pin) are in the model.
+        slots (ndarray): The slot of every vertex of the frame, by vertex index.
+        iterations (list): The simplex iteration count of every solve so far.
+        seconds (list): The seconds HiGHS took in every solve so far.
+        warm (bool): Whether the next solve starts from an optimal basis.
+        time_limit (float): The seconds every solve may take in all, or None for no limit.
+        highspy (module): The highspy module (see get_highspy).
+    """
+
+    def __init__(self, kirchhoff, random_objective_vector=True, time_limit=LP_TIME_LIMIT):
+        highspy = get_highspy()
+        if highspy is None:
+            raise ImportError("HighsSession needs the highspy package")
+        self.highspy = highspy
+        self.kirchhoff = kirchhoff
+        self.random_objective_vector = random_objective_vector
+        self.num_null_rows = kirchhoff.num_vectors - kirchhoff.dimensions
+        self.num_edges = 0
+        self.slots = np.empty(0, dtype=np.int64)
+        self.num_slots = 0
+        self.costs = []
+        self.iterations = []
+        self.seconds = []
+        self.cold_seconds = None
+        self.warm = False
+        self.dual_ray = None
+        self.dual_ray_requested = False
+        self.time_limit = time_limit
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue('output_flag', False)
+        no_entries = np.empty(0, dtype=np.int32)
+        self.highs.addRows(1, np.array([1.0]), np.array([1.0]), 0, no_entries, no_entries, np.empty(0))
+        self.highs.addCols(1, np.array(self.get_costs(1)), np.array([0.0]), np.array([highspy.kHighsInf]),
+                           1, np.array([0], dtype=np.int32), np.array([0], dtype=np.int32), np.array([-1.0]))
+        kirchhoff.extend_linear_system()
+        kirchhoff.pop_vertex_remap()
+
+    def get_costs(self, count):
+        """
+        Draws the objective coefficients of new columns. They are drawn once and never change,
+        so the previous basis stays optimal for the columns it already knew about.
+        """
+        costs = list(np.random.random(count)) if self.random_objective_vector else [1.0] * count
+        self.costs.extend(costs)
+        return costs
+
+    def update(self):
+        """
+        Adds the vertices and edges the frame gained since the last update to the model.
+
+        NOTES:
+            (a) keep the kirchhoff system in step with the frame and follow any renumbering of
+                the vertices it saw in the meantime
+            (b) vertices without a slot are new: give them slots and add their (still empty)
+                rows; no existing column ever touches them
+            (c) the new edges become new columns, with their vertex condition entries and a one in
+                the sum condition row
+        """
+        kirchhoff = self.kirchhoff
+        kirchhoff.extend_linear_system()                                                            # (a)
+        remap = kirchhoff.pop_vertex_remap()
+        slots = np.full(kirchhoff.frame.get_num_vertices(), -1, dtype=np.int64)
+        if remap is None:
+            slots[:len(self.slots)] = self.slots
+        else:
+            slots[remap[:len(self.slots)]] = self.slots
+        new_vertices = np.flatnonzero(slots < 0)                                                    # (b)
+        slots[new_vertices] = self.num_slots + np.arange(len(new_vertices))
+        self.num_slots += len(new_vertices)
+        self.slots = slots
+        num_new_rows = len(new_vertices) * self.num_null_rows
+        if num_new_rows:
+            zeros = np.zeros(num_new_rows)
+            no_entries = np.empty(0, dtype=np.int32)
+            self.highs.addRows(num_new_rows, zeros, zeros, 0, no_entries, no_entries, np.empty(0))
+        first_pin = self.num_edges                                                                  # (c)
+        tails, heads, ids = kirchhoff.frame.get_edge_arrays(first_pin)
+        num_new_edges = len(ids)
+        if num_new_edges == 0:
+            return
+        rows, columns, data = kirchhoff.get_system_entries(kirchhoff.get_null_matrix(), tails, heads, ids, first_pin)
+        vertices, offsets = np.divmod(rows, self.num_null_rows)
+        rows = np.concatenate([1 + slots[vertices] * self.num_null_rows + offsets, np.zeros(num_new_edges, dtype=np.int64)])
+        columns = np.concatenate([columns - first_pin, np.arange(num_new_edges)])
+        data = np.concatenate([data, np.ones(num_new_edges)])
+        block = sparse.csc_matrix((data, (rows, columns)), shape=(1 + self.num_slots * self.num_null_rows, num_new_edges))
+        self.highs.addCols(num_new_edges, np.array(self.get_costs(num_new_edges)), np.zeros(num_new_edges),
+                           np.full(num_new_edges, self.highspy.kHighsInf), block.nnz, block.indptr[:-1].astype(np.int32),
+                           block.indices.astype(np.int32), block.data.astype(np.float64))
+        self.num_edges += num_new_edges
+
+    def get_remaining_time(self, start):
+        if self.time_limit is None:
+            return None
+        return max(0.0, self.time_limit - (time.perf_counter() - start))
+
+    def run(self, seconds):
+        """
+        Runs HiGHS for at most seconds (None for no limit) and returns the model status. HiGHS
+        checks its time_limit option against the total run time of the model, so it is set
+        relative to that.
+        """
+        limit = self.highspy.kHighsInf if seconds is None else self.highs.getRunTime() + seconds
+        self.highs.setOptionValue('time_limit', limit)
+        self.highs.run()
+        self.iterations[-1] += self.highs.getInfo().simplex_iteration_count
+        return self.highs.getModelStatus()
+
+    def solve(self, statistics=None):
+        """
+        Brings the model up to date, re-solves it (from the previous basis if that was optimal),
+        and turns the LP solution into an exact integer one the same way find_integer_solution
+        does. Returns the solution laid out as Kirchhoff.solve returns it (weights by pin, then
+        the slack), or None. statistics is an optional dict updated like the one of
+        find_integer_solution, with 'warm' telling whether the solve started from a basis.
+
+        NOTES:
+            (a) a warm start may take as long as the last cold solve (at least MIN_BUDGET); if
+                it takes longer the basis is not helping, so it is dropped and the model solved
+                from scratch
+            (b) the HiGHS runs of one solve (and the MILP, see (e)) stay within time_limit;
+                running out leaves the status 'failed'
+            (c) on large frames HiGHS can call a point optimal that is off by more than the
+                tolerance reconstruct_integer_solution tells zeros apart with, so the exact
+                solve runs on the basic columns of the final basis instead
+            (d) that basis can still be slightly infeasible in exact arithmetic; then the model is
+                re-solved from it with TIGHT_TOLERANCE (a few more iterations) and tried again,
+                unless it has more basic columns than the exact solve takes (EXACT_MAX_SUPPORT)
+            (e) only if that fails too is the MILP solved, for at most MILP_TIME_LIMIT seconds
+                (and what is left of time_limit); if it runs out the status stays 'failed'
+        """
+        statistics = {} if statistics is None else statistics
+        start = time.perf_counter()
+        self.update()
+        self.iterations.append(0)
+        self.dual_ray = None
+        self.dual_ray_requested = False
+        statistics.update({'status': 'failed', 'used_milp': False, 'warm': self.warm})
+        status = None
+        if self.warm:                                                                               # (a)
+            budget = max(MIN_BUDGET, self.cold_seconds)
+            remaining = self.get_remaining_time(start)
+            status = self.run(budget if remaining is None else min(budget, remaining))
+            if status == self.highspy.HighsModelStatus.kTimeLimit and self.get_remaining_time(start) != 0.0:
+                statistics['warm'] = False
+                status = None
+        if status is None:
+            self.highs.clearSolver()
+            cold_start = time.perf_counter()
+            status = self.run(self.get_remaining_time(start))                                       # (b)
+            self.cold_seconds = time.perf_counter() - cold_start
+        self.seconds.append(time.perf_counter() - start)
+        self.warm = status == self.highspy.HighsModelStatus.kOptimal
+        statistics['iterations'] = self.iterations[-1]
+        if status == self.highspy.HighsModelStatus.kInfeasible:
+            statistics['status'] = 'infeasible'
+            return None
+        if status == self.highspy.HighsModelStatus.kTimeLimit:
+            return None
+        E, b = self.kirchhoff.get_normalized_system()
+        if status == self.highspy.HighsModelStatus.kOptimal:
+            solution = self.reconstruct(E, b)                                                       # (c)
+            if solution is None and len(self.get_basic_columns()) <= EXACT_MAX_SUPPORT:             # (d)
+                solution = self.resolve_tightly(E, b, self.get_remaining_time(start))
+                statistics['tightened'] = True
+                statistics['iterations'] = self.iterations[-1]
+            if solution is not None:
+                statistics['status'] = 'solved'
+                return solution
+        remaining = self.get_remaining_time(start)
+        if remaining == 0.0:
+            return None
+        c = self.costs[1:] + self.costs[:1]
+        milp_statistics = {}
+        time_limit = MILP_TIME_LIMIT if remaining is None else min(MILP_TIME_LIMIT, remaining)
+        solution = find_integer_solution(c, E, b, 'milp', statistics=milp_statistics,                 # (e)
+                                         time_limit=time_limit)
+        statistics.update({'status': milp_statistics['status'], 'used_milp': True})
+        return solution
+
+    def reconstruct(self, E, b):
+        """
+        Turns the current LP solution into an exact integer one, solving exactly on the basic
+        columns if rationalizing it does not work. Returns None if neither does.
+        """
+        x = np.array(self.highs.getSolution().col_value)
+        return reconstruct_integer_solution(np.append(x[1:], x[0]), E, b, support=self.get_basic_columns())
+
+    def get_basic_columns(self):
+        """
+        Returns the basic columns of the current basis, numbered like the columns of
+        Kirchhoff.get_normalized_system (the slack last).
+        """
+        basic = np.array([column_status == self.highspy.HighsBasisStatus.kBasic
+                          for column_status in self.highs.getBasis().col_status])
+        return np.flatnonzero(np.append(basic[1:], basic[0]))
+
+    def resolve_tightly(self, E, b, seconds=None):
+        """
+        Re-solves the model from its current basis, for at most seconds, with TIGHT_TOLERANCE as
+        the primal and dual feasibility tolerances and reconstructs from the result; the
+        tolerances are put back afterwards.
+        """
+        names = ['primal_feasibility_tolerance', 'dual_feasibility_tolerance']
+        tolerances = [self.highs.getOptionValue(name)[1] for name in names]
+        for name in names:
+            self.highs.setOptionValue(name, TIGHT_TOLERANCE)
+        try:
+            if self.run(seconds) != self.highspy.HighsModelStatus.kOptimal:
+                return None
+            return self.reconstruct(E, b)
+        finally:
+            for name, tolerance in zip(names, tolerances):
+                self.highs.setOptionValue(name, tolerance)
+
+    def get_dual_ray(self):
+        """
+        Right after a solve that found the model infeasible, returns the Farkas certificate HiGHS
+        proved it with, laid out like the rows of Kirchhoff.get_normalized_system (the vertex rows
+        by vertex index, then the sum condition row). Returns None otherwise.
+
+        When HiGHS found the model infeasible in its presolve there is no ray yet, and getting
+        one means solving the model again without it, which can take far longer than the solve
+        did. So the certificate may take as long as the solve it explains (at least MIN_BUDGET);
+        if that is not enough, None is returned. Either way it is only asked for once per solve.
+        """
+        if self.dual_ray_requested:
+            return self.dual_ray
+        if self.highs.getModelStatus() != self.highspy.HighsModelStatus.kInfeasible:
+            return None
+        if len(self.slots) != self.kirchhoff.frame.get_num_vertices():
+            return None
+        self.dual_ray_requested = True
+        self.highs.setOptionValue('time_limit', self.highs.getRunTime() + max(MIN_BUDGET, self.seconds[-1]))
+        _, has_dual_ray, dual_ray = self.highs.getDualRay()
+        if not has_dual_ray:
+            return None
+        dual_ray = np.asarray(dual_ray)
+        rows = 1 + self.slots[:, np.newaxis] * self.num_null_rows + np.arange(self.num_null_rows)
+        self.dual_ray = np.append(dual_ray[rows.ravel()], dual_ray[0])
+        return self.dual_ray
+
+
+def find_dual_ray(E, b, time_limit=None):
+    """
+    Solves the feasibility problem Ex=b, x>=0 once with HiGHS and returns its Farkas certificate
+    (one value per row of E) if it is infeasible, or None if it is feasible, highspy is missing,
+    or the certificate takes longer than time_limit seconds (None for no limit).
+    """
+    highspy = get_highspy()
+    if highspy is None:
+        return None
+    E = sparse.csc_matrix(E)
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+    if time_limit is not None:
+        highs.setOptionValue('time_limit', float(time_limit))
+    b = np.asarray(b, dtype=np.float64)
+    no_entries = np.empty(0, dtype=np.int32)
+    highs.addRows(E.shape[0], b, b, 0, no_entries, no_entries, np.empty(0))
+    highs.addCols(E.shape[1], np.zeros(E.shape[1]), np.zeros(E.shape[1]), np.full(E.shape[1], highspy.kHighsInf),
+                  E.nnz, E.indptr[:-1].astype(np.int32), E.indices.astype(np.int32), E.data.astype(np.float64))
+    highs.run()
+    if highs.getModelStatus() != highspy.HighsModelStatus.kInfeasible:
+        return None
+    _, has_dual_ray, dual_ray = highs.getDualRay()
+    return np.asarray(dual_ray) if has_dual_ray else None
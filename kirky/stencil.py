@@ -0,0 +1,202 @@
+"""
+The vertex conditions of a box frame as a structured, matrix-free operator.
+
+In a box frame the edges of vector j are all translates of one edge, with their tails filling the
+box where both ends fit. So the part of the system belonging to vector j is
+
+    (T_j - H_j) (x) N[:, j]
+
+where T_j and H_j pick out the tail and head of every such edge, and each of them is a Kronecker
+product of one 1-D shift matrix per dimension. Applying it to a vector of weights is just adding
+and subtracting shifted slices of a grid, so neither the system nor the frame's edge arrays are
+needed to apply it.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator
+
+
+def get_shift_matrix(extent, length, offset):
+    """
+    The extent x length 1-D shift matrix with ones at (offset + i, i).
+    """
+    return sparse.csr_matrix((np.ones(length), (np.arange(length) + offset, np.arange(length))), shape=(extent, length))
+
+
+class StencilOperator(LinearOperator):
+    """
+    Acts like the matrix Kirchhoff.generate_sparse_linear_system builds for a box frame, with rows
+    ordered by the frame's vertex indices and columns by its pins, without storing it.
+
+    Attributes:
+        null_matrix (ndarray): The null matrix (one row per null row, one column per vector).
+        vectors (ndarray): The vectors of the frame, one per row.
+        frame_shape (tuple): The shape of the box.
+        tail_starts (ndarray): For every vector, the corner of the box of tails.
+        tail_extents (ndarray): For every vector, the extent of the box of tails.
+        offsets (ndarray): Where the canonical columns of every vector start.
+        vertex_order (ndarray): The frame index of every vertex in canonical (Fortran) order.
+        pin_order (ndarray): The frame pin of every edge in canonical order.
+    """
+
+    def __init__(self, null_matrix, vectors, frame_shape, vertex_order=None, pin_order=None):
+        self.null_matrix = np.asarray(null_matrix)
+        if np.all(self.null_matrix == np.round(self.null_matrix)):
+            self.null_matrix = self.null_matrix.astype(np.int64)
+        self.vectors = np.asarray(vectors, dtype=np.int64)
+        self.frame_shape = tuple(int(extent) for extent in frame_shape)
+        self.num_null_rows = self.null_matrix.shape[0]
+        self.num_vertices = int(np.prod(self.frame_shape))
+        self.tail_starts = np.maximum(-self.vectors, 0)
+        self.tail_extents = np.maximum(np.array(self.frame_shape) - np.abs(self.vectors), 0)
+        self.offsets = np.concatenate([[0], np.cumsum(np.prod(self.tail_extents, axis=1))])
+        self.vertex_order = vertex_order
+        self.pin_order = pin_order
+        shape = (self.num_vertices * self.num_null_rows, int(self.offsets[-1]))
+        super(StencilOperator, self).__init__(dtype=np.float64, shape=shape)
+
+    def get_slices(self, vector_id, start):
+        return tuple(slice(int(begin), int(begin + extent)) for begin, extent in zip(start, self.tail_extents[vector_id]))
+
+    def get_canonical_edges(self):
+        """
+        Returns the tails, heads (as Fortran-order vertex indices) and vector ids of the edges in
+        canonical order.
+        """
+        tails, heads, ids = [], [], []
+        for (vector_id, vector) in enumerate(self.vectors):
+            extents = self.tail_extents[vector_id]
+            positions = np.stack(np.unravel_index(np.arange(int(np.prod(extents))), tuple(extents), order='F'), axis=1)
+            positions = positions + self.tail_starts[vector_id]
+            tails.append(np.ravel_multi_index(tuple(positions.T), self.frame_shape, order='F'))
+            heads.append(np.ravel_multi_index(tuple((positions + vector).T), self.frame_shape, order='F'))
+            ids.append(np.full(len(positions), vector_id))
+        return np.concatenate(tails), np.concatenate(heads), np.concatenate(ids)
+
+    def apply(self, x):
+        """
+        Computes E @ x for weights x by pin. Integer weights give an exact integer result (int64,
+        or Python integers if x has dtype object).
+
+        NOTES:
+            (a) the grid holds one layer per null row, each in the shape of the frame
+            (b) the edges of vector j add x_j to the layer at the tails and subtract it at the
+                heads, scaled by N[r, j]
+            (c) the layers are read out vertex by vertex (row v * num_null_rows + r) and put in
+                the frame's vertex order
+        """
+        x = np.asarray(x)
+        if self.pin_order is not None:
+            x = x[self.pin_order]
+        dtype = np.result_type(x.dtype, self.null_matrix.dtype)
+        grid = np.zeros((self.num_null_rows,) + self.frame_shape, dtype=dtype)                     # (a)
+        for (vector_id, vector) in enumerate(self.vectors):
+            extents = tuple(self.tail_extents[vector_id])
+            if np.prod(extents) == 0:
+                continue
+            block = x[self.offsets[vector_id]:self.offsets[vector_id + 1]].reshape(extents, order='F')
+            coefficients = self.null_matrix[:, vector_id].reshape((-1,) + (1,) * len(extents))
+            contribution = coefficients * block[np.newaxis]                                         # (b)
+            grid[(slice(None),) + self.get_slices(vector_id, self.tail_starts[vector_id])] += contribution
+            grid[(slice(None),) + self.get_slices(vector_id, self.tail_starts[vector_id] + vector)] -= contribution
+        rows = grid.reshape(self.num_null_rows, -1, order='F').T                                    # (c)
+        if self.vertex_order is not None:
+            ordered = np.empty_like(rows)
+            ordered[self.vertex_order] = rows
+            rows = ordered
+        return rows.ravel()
+
+    def apply_transpose(self, y):
+        """
+        Computes E.T @ y for one value per row of the system, in the frame's row order.
+        """
+        y = np.asarray(y).reshape(self.num_vertices, self.num_null_rows)
+        if self.vertex_order is not None:
+            y = y[self.vertex_order]
+        layers = y.T.reshape((self.num_null_rows,) + self.frame_shape, order='F')
+        dtype = np.result_type(y.dtype, self.null_matrix.dtype)
+        x = np.zeros(self.shape[1], dtype=dtype)
+        for (vector_id, vector) in enumerate(self.vectors):
+            if self.offsets[vector_id] == self.offsets[vector_id + 1]:
+                continue
+            combined = np.tensordot(self.null_matrix[:, vector_id], layers, axes=1)
+            tails = combined[self.get_slices(vector_id, self.tail_starts[vector_id])]
+            heads = combined[self.get_slices(vector_id, self.tail_starts[vector_id] + vector)]
+            x[self.offsets[vector_id]:self.offsets[vector_id + 1]] = (tails - heads).ravel(order='F')
+        if self.pin_order is not None:
+            ordered = np.empty_like(x)
+            ordered[self.pin_order] = x
+            x = ordered
+        return x
+
+    def _matvec(self, x):
+        return self.apply(np.ravel(x))
+
+    def _rmatvec(self, y):
+        return self.apply_transpose(np.ravel(y))
+
+    def get_residual(self, weights):
+        """
+        E @ weights, exactly: in int64 when no partial sum can overflow, else in Python integers.
+        """
+        weights = np.asarray(weights)
+        if weights.dtype.kind == 'f':
+            if np.any(weights != np.round(weights)):
+                raise ValueError("the weights are not integers")
+            weights = weights.astype(np.int64)
+        bound = int(np.max(np.abs(weights), initial=0)) * 2 * int(np.sum(np.abs(self.null_matrix)))
+        if weights.dtype == object or bound >= 2**63:
+            weights = np.array([int(weight) for weight in weights], dtype=object)
+        return self.apply(weights)
+
+    def to_sparse(self):
+        """
+        Assembles the operator as a CSR matrix from the Kronecker products of the 1-D shift
+        matrices (the last dimension outermost, matching the Fortran vertex order).
+        """
+        blocks = []
+        for (vector_id, vector) in enumerate(self.vectors):
+            tails, heads = sparse.identity(1, format='csr'), sparse.identity(1, format='csr')
+            for dimension in range(len(self.frame_shape)):
+                extent, length = self.frame_shape[dimension], int(self.tail_extents[vector_id][dimension])
+                start = int(self.tail_starts[vector_id][dimension])
+                tails = sparse.kron(get_shift_matrix(extent, length, start), tails, format='csr')
+                heads = sparse.kron(get_shift_matrix(extent, length, start + vector[dimension]), heads, format='csr')
+            blocks.append(sparse.kron(tails - heads, self.null_matrix[:, [vector_id]], format='csr'))
+        matrix = sparse.hstack(blocks, format='csr')
+        if self.vertex_order is not None:
+            rows = (self.vertex_order[:, np.newaxis] * self.num_null_rows + np.arange(self.num_null_rows)).ravel()
+            inverse = np.empty_like(rows)
+            inverse[rows] = np.arange(len(rows))
+            matrix = matrix[inverse]
+        if self.pin_order is not None:
+            inverse = np.empty_like(self.pin_order)
+            inverse[self.pin_order] = np.arange(len(self.pin_order))
+            matrix = matrix[:, inverse]
+        return matrix.tocsr()
+
+
+def get_stencil_operator(null_matrix, frame):
+    """
+    Returns the StencilOperator of a box frame (Frame or ArrayFrame), ordered like the frame.
+    Raises a ValueError for frames that are not full boxes.
+    """
+    operator = StencilOperator(null_matrix, np.transpose(frame.matrix), frame.shape)
+    if frame.get_num_vertices() != operator.num_vertices or frame.get_num_edges() != operator.shape[1]:
+        raise ValueError("the stencil operator needs a frame that fills its whole box")
+    positions = np.asarray(frame.get_positions(), dtype=np.int64)
+    vertex_order = np.empty(operator.num_vertices, dtype=np.int64)
+    vertex_order[np.ravel_multi_index(tuple(positions.T), operator.frame_shape, order='F')] = np.arange(len(positions))
+    tails, heads, ids = frame.get_edge_arrays()
+    canonical_tails, _, canonical_ids = operator.get_canonical_edges()
+    frame_keys = ids.astype(np.int64) * operator.num_vertices + np.argsort(vertex_order)[tails]
+    canonical_keys = canonical_ids * operator.num_vertices + canonical_tails
+    frame_sorted = np.argsort(frame_keys, kind='stable')
+    canonical_sorted = np.argsort(canonical_keys, kind='stable')
+    if not np.array_equal(frame_keys[frame_sorted], canonical_keys[canonical_sorted]):
+        raise ValueError("the edges of the frame are not the edges of its box")
+    pin_order = np.empty(operator.shape[1], dtype=np.int64)
+    pin_order[canonical_sorted] = frame_sorted
+    operator.vertex_order = vertex_order
+    operator.pin_order = pin_order
+    return operator
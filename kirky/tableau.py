@@ -1,12 +1,17 @@
 from fractions import Fraction
+from functools import reduce
+from math import gcd as math_gcd, lcm
 from future.utils import viewitems
+from .pivot_rules import PivotTracker
 import numpy as np
-from scipy.optimize import linprog
+from scipy import sparse
+from .helpers import rationalize, scale_to_integers
+from .verify import get_exact_residual
 
 
 class Tableau(object):
 
-    def __init__(self, objective_vector, objective_value, constraint_matrix, constraint_values):
+    def __init__(self, objective_vector, objective_value, constraint_matrix, constraint_values, pivot_rule='bland'):
         """
         Input:
             objective_vector - a list representing your objective vector
@@ -14,6 +19,8 @@ class Tableau(object):
             constraint_matrix - a matrix like object containing your constraints
             constraint_values - the values corresponding to each of your constraint rows (right hand side
                     of the matrix equation Ax=b)
+            pivot_rule - the name of a rule in pivot_rules.PIVOT_RULES ('bland', 'dantzig', 'steepest'
+                    or 'devex') or a PivotRule instance
 
         NOTES:
             (a) setup the objective vector (first row in a written tableau)
@@ -33,6 +40,7 @@ class Tableau(object):
         self.basis_dict = {}                                                                            # (c)
         self.find_basis()
         self.prepare()                                                                                  # (d)
+        self.pivot_tracker = PivotTracker(pivot_rule, max(50, len(self.constraint_rows)))
         self.pivot_column_index = None                                                                  # (e)
         self.pivot_row = None
         self.pivot_row_index = None
@@ -49,8 +57,9 @@ class Tableau(object):
         NOTES:
             (a) we set the two attributes to None to begin with. If they stay like this it indicates
                 that there was no new pivot
-            (b) for our pivot column we choose the first negative value in the objective row (ignoring
-                of course the augmented portion at the end of this row **
+            (b) the pivot rule chooses our pivot column among the columns with a negative value in the
+                objective row (ignoring of course the augmented portion at the end of this row). With
+                the default rule this is the first such column **
             (c) if we found a pivot column we move on to grab the pivot row
             (d) a pivot row must have a positive value at the pivot column index **
             (e) if we have no candidate rows then we simply return, this will leave pivot_row as
@@ -65,10 +74,9 @@ class Tableau(object):
         self.pivot_row = None                                                                           # (a)
         self.pivot_row_index = None
         self.pivot_column_index = None
-        for i in range(len(self.objective_row) - 1):                                                    # (b)
-            if self.objective_row[i] < 0:
-                self.pivot_column_index = i
-                break
+        candidates = self.get_candidate_columns()                                                       # (b)
+        if candidates:
+            self.pivot_column_index = self.pivot_tracker.choose_column(self, candidates)
         if self.pivot_column_index is not None:                                                         # (c)
             candidate_rows = [(self.constraint_rows[i], i) for i in range(len(self.constraint_rows))    # (d)
                               if self.constraint_rows[i][self.pivot_column_index] > 0]
@@ -91,26 +99,60 @@ class Tableau(object):
         column. It will then call find_pivot to update the pivot for you.
 
         NOTES:
-            (a) we get the value at the pivot column in the pivot row to be one
-            (b) we set this new pivot row into the constraint_rows
-            (c) we zero out the pivot column in all of the other constraint_rows
-            (d) we zero out the pivot column in the objective row as well
-            (e) find the new pivot
+            (a) we let the pivot rule know about the pivot (and whether it is degenerate) and
+                update the basis
+            (b) we get the value at the pivot column in the pivot row to be one
+            (c) we set this new pivot row into the constraint_rows
+            (d) we zero out the pivot column in all of the other constraint_rows
+            (e) we zero out the pivot column in the objective row as well
+            (f) find the new pivot
         """
-        pivot_element = self.pivot_row[self.pivot_column_index]                                         # (a)
+        self.pivot_tracker.record(self, self.pivot_column_index, self.pivot_row_index,                  # (a)
+                                  self.pivot_row[-1] == 0)
+        self.update_basis()
+        pivot_element = self.pivot_row[self.pivot_column_index]                                         # (b)
         self.pivot_row = [element / pivot_element for element in self.pivot_row]
-        self.constraint_rows[self.pivot_row_index] = self.pivot_row                                     # (b)
-        for i in range(len(self.constraint_rows)):                                                      # (c)
+        self.constraint_rows[self.pivot_row_index] = self.pivot_row                                     # (c)
+        for i in range(len(self.constraint_rows)):                                                      # (d)
             if not i == self.pivot_row_index:
                 old_row = self.constraint_rows[i]
                 coefficient = old_row[self.pivot_column_index] / self.pivot_row[self.pivot_column_index]
                 self.constraint_rows[i] = [old_row[k] - coefficient * self.pivot_row[k]
                                            for k in range(len(old_row))]
-        coefficient = (self.objective_row[self.pivot_column_index] /                                    # (d)
+        coefficient = (self.objective_row[self.pivot_column_index] /                                    # (e)
                        self.pivot_row[self.pivot_column_index])
         self.objective_row = [self.objective_row[k] - coefficient * self.pivot_row[k]
                               for k in range(len(self.objective_row))]
-        self.find_pivot()                                                                               # (e)
+        self.find_pivot()                                                                               # (f)
+
+    def update_basis(self):
+        """
+        Makes the pivot column basic in the pivot row, so basis_dict stays current between calls
+        to find_basis.
+        """
+        for column, row_with_one in list(self.basis_dict.items()):
+            if row_with_one == self.pivot_row_index:
+                del self.basis_dict[column]
+        self.basis_dict[self.pivot_column_index] = self.pivot_row_index
+
+    def get_candidate_columns(self):
+        """
+        Returns the (column, reduced cost) pairs with a negative reduced cost, in column order.
+        """
+        return [(i, self.objective_row[i]) for i in range(len(self.objective_row) - 1) if self.objective_row[i] < 0]
+
+    def get_column_entries(self, column):
+        return [row[column] for row in self.constraint_rows if row[column] != 0]
+
+    def get_row_entries(self, row_index):
+        row = self.constraint_rows[row_index]
+        return {column: row[column] for column in range(len(row) - 1) if row[column] != 0}
+
+    def get_statistics(self):
+        """
+        Returns the pivot rule used and the iteration counts of the solve so far.
+        """
+        return self.pivot_tracker.get_statistics()
 
     def find_basis(self):
         """
@@ -186,8 +228,8 @@ class Tableau(object):
 
     def get_solution(self):
         """
-        This function calls find_basis() and then grabs the solution vector (as a list) using that
-        information.
+        This function grabs the solution vector (as a list) using the basis, which find_basis found at
+        the start and pivot has kept up to date since.
 
         Once the basis is known, finding the solution is incredibly easy. It is a vector of the same
         length as all the rows in our tableau (minus the augmented portion) containing
@@ -195,19 +237,23 @@ class Tableau(object):
         augmented portion (last element) of the row having the 1 for that basis column.
 
         NOTES:
-            (a) make sure the basis is fresh
-            (b) by getting zero this way, we ensure it keeps the type that was input into the
+            (a) by getting zero this way, we ensure it keeps the type that was input into the
                 tableau in the first place
-            (c) easiest to just make a vector of zeroes and then just change the appropriate
+            (b) easiest to just make a vector of zeroes and then just change the appropriate
                 columns afterwards
-            (d) setting the nonzero parts of the solution
+            (c) setting the nonzero parts of the solution
         """
-        self.find_basis()                                                                               # (a)
-        zero = self.objective_row[0] - self.objective_row[0]                                            # (b)
-        self.solution = [zero] * (len(self.objective_row) - 1)                                          # (c)
-        for column, row_with_one in viewitems(self.basis_dict):                                        # (d)
+        zero = self.objective_row[0] - self.objective_row[0]                                            # (a)
+        self.solution = [zero] * (len(self.objective_row) - 1)                                          # (b)
+        for column, row_with_one in viewitems(self.basis_dict):                                        # (c)
             self.solution[column] = self.constraint_rows[row_with_one][-1]
 
+    def get_objective_value(self):
+        """
+        The value of the objective function at the current basic solution.
+        """
+        return -self.objective_row[-1]
+
     def solve(self):
         """
         This method calls pivot until either a solution has been found or the problem is determined
@@ -218,12 +264,304 @@ class Tableau(object):
         return self.is_solved()
 
 
-def solve_kirky(E):
+class IntegerTableau(object):
+
+    def __init__(self, objective_vector, objective_value, constraint_matrix, constraint_values, pivot_rule='bland'):
+        """
+        Input:
+            the same as Tableau
+
+        An exact simplex tableau that gives the same answers as Tableau without Fraction
+        arithmetic. Every row (the objective row included) is stored as a dict of its nonzero
+        numerators (Python ints, keyed by column, the augmented column being the last one) and a
+        single positive denominator shared by the whole row. Pivots are fraction-free: a row is
+        combined with the pivot row using only integer multiplications, and is then divided by
+        the gcd of its numerators and denominator so the numbers stay as small as possible. Rows
+        with a zero in the pivot column are not touched at all.
+
+        NOTES:
+            (a) setup the objective row and the constraint rows as integer rows
+            (b) find the basis of our current tableau (it's assumed there is one). Unlike Tableau
+                we keep track of it through the pivots instead of searching for it again
+            (c) make sure the objective vector reflects the basis
+            (d) find the first pivot and initialize the solution to None
+        """
+        self.num_columns = len(objective_vector)
+        self.objective_row = self.make_row(list(objective_vector) + [-objective_value])             # (a)
+        self.constraint_rows = [self.make_row(list(constraint_matrix[i][:]) + [constraint_values[i]])
+                                for i in range(len(constraint_matrix))]
+        self.basis_dict = {}                                                                        # (b)
+        self.find_basis()
+        self.prepare()                                                                              # (c)
+        self.pivot_tracker = PivotTracker(pivot_rule, max(50, len(self.constraint_rows)))
+        self.pivot_column_index = None                                                              # (d)
+        self.pivot_row = None
+        self.pivot_row_index = None
+        self.find_pivot()
+        self.solution = None
+
+    @staticmethod
+    def make_row(values):
+        """
+        Turns a list of numbers (ints or Fractions) into a (numerators, denominator) pair.
+        """
+        values = [Fraction(value) for value in values]
+        denominator = 1
+        for value in values:
+            denominator = lcm(denominator, value.denominator)
+        numerators = {column: int(value * denominator) for column, value in enumerate(values) if value != 0}
+        return IntegerTableau.normalize(numerators, denominator)
+
+    @staticmethod
+    def normalize(numerators, denominator):
+        """
+        Divides a row by the gcd of its numerators and its denominator.
+        """
+        divider = reduce(math_gcd, numerators.values(), denominator)
+        if divider > 1:
+            numerators = {column: value // divider for column, value in numerators.items()}
+            denominator //= divider
+        return numerators, denominator
+
+    @staticmethod
+    def combine(row, pivot_row, pivot_column_index):
+        """
+        Returns row minus the multiple of pivot_row that zeroes out row at pivot_column_index.
+
+        With row = R / d and pivot_row = P / e this is (p * R - r * P) / (p * d) where p and r
+        are the numerators of the two rows at the pivot column, so no fractions are formed.
+        """
+        numerators, denominator = row
+        pivot_numerators, _ = pivot_row
+        p = pivot_numerators[pivot_column_index]
+        r = numerators[pivot_column_index]
+        combined = {column: p * value for column, value in numerators.items()}
+        for column, value in pivot_numerators.items():
+            new_value = combined.get(column, 0) - r * value
+            if new_value:
+                combined[column] = new_value
+            else:
+                combined.pop(column, None)
+        combined.pop(pivot_column_index, None)
+        if p < 0:
+            p = -p
+            combined = {column: -value for column, value in combined.items()}
+        return IntegerTableau.normalize(combined, p * denominator)
+
+    def find_pivot(self):
+        """
+        Finds the new pivot row and pivot column exactly like Tableau.find_pivot.
+
+        NOTES:
+            (a) the pivot rule chooses among the columns with a negative reduced cost
+            (b) the ratio of the augmented value to the pivot column value does not depend on the
+                denominator of the row, so we compare numerator ratios by cross multiplication
+            (c) ties are broken by the smaller value at the pivot column, as in Tableau
+        """
+        self.pivot_row = None
+        self.pivot_row_index = None
+        self.pivot_column_index = None
+        candidates = self.get_candidate_columns()                                                   # (a)
+        if not candidates:
+            return
+        self.pivot_column_index = self.pivot_tracker.choose_column(self, candidates)
+        column = self.pivot_column_index
+        for index, row in enumerate(self.constraint_rows):
+            numerators, denominator = row
+            value = numerators.get(column, 0)
+            if value <= 0:
+                continue
+            if self.pivot_row is None:
+                self.pivot_row, self.pivot_row_index = row, index
+                continue
+            best_numerators, best_denominator = self.pivot_row
+            best_value = best_numerators[column]
+            ratio = numerators.get(self.num_columns, 0) * best_value                                # (b)
+            best_ratio = best_numerators.get(self.num_columns, 0) * value
+            if ratio < best_ratio or \
+                    (ratio == best_ratio and value * best_denominator < best_value * denominator):  # (c)
+                self.pivot_row, self.pivot_row_index = row, index
+
+    def pivot(self):
+        """
+        Performs the pivot operation for the current pivot row and column and then finds the
+        next pivot.
+
+        NOTES:
+            (a) the pivot row is divided by its pivot column value; the sign goes to the
+                numerators so the denominator stays positive
+            (b) only rows (and the objective row) with a nonzero in the pivot column change
+            (c) the pivot column becomes basic in the pivot row
+        """
+        column = self.pivot_column_index
+        numerators, denominator = self.pivot_row
+        self.pivot_tracker.record(self, column, self.pivot_row_index, self.num_columns not in numerators)
+        p = numerators[column]                                                                      # (a)
+        sign = 1 if p > 0 else -1
+        self.pivot_row = self.normalize({k: sign * value for k, value in numerators.items()}, abs(p))
+        self.constraint_rows[self.pivot_row_index] = self.pivot_row
+        for i, row in enumerate(self.constraint_rows):                                              # (b)
+            if i != self.pivot_row_index and column in row[0]:
+                self.constraint_rows[i] = self.combine(row, self.pivot_row, column)
+        if column in self.objective_row[0]:
+            self.objective_row = self.combine(self.objective_row, self.pivot_row, column)
+        for basis_column, row_index in list(self.basis_dict.items()):                               # (c)
+            if row_index == self.pivot_row_index:
+                del self.basis_dict[basis_column]
+        self.basis_dict[column] = self.pivot_row_index
+        self.find_pivot()
+
+    def find_basis(self):
+        """
+        Finds the columns that are zero everywhere but for a single one, like Tableau.find_basis,
+        but only looking at the nonzero entries of each row.
+        """
+        counts = {}
+        for i, (numerators, denominator) in enumerate(self.constraint_rows):
+            for column, value in numerators.items():
+                if column == self.num_columns:
+                    continue
+                row_with_one, count = counts.get(column, (None, 0))
+                counts[column] = (i if value == denominator else None, count + 1)
+        self.basis_dict = {column: row_with_one for column, (row_with_one, count) in sorted(counts.items())
+                           if count == 1 and row_with_one is not None}
+
+    def get_candidate_columns(self):
+        """
+        Returns the (column, reduced cost) pairs with a negative reduced cost, in column order. A
+        denominator is always positive, so the sign of an entry is the sign of its numerator.
+        """
+        numerators, denominator = self.objective_row
+        return [(column, Fraction(value, denominator)) for column, value in sorted(numerators.items())
+                if value < 0 and column != self.num_columns]
+
+    def get_column_entries(self, column):
+        return [Fraction(numerators[column], denominator) for numerators, denominator in self.constraint_rows
+                if column in numerators]
+
+    def get_row_entries(self, row_index):
+        numerators, denominator = self.constraint_rows[row_index]
+        return {column: Fraction(value, denominator) for column, value in numerators.items() if column != self.num_columns}
+
+    def get_statistics(self):
+        return self.pivot_tracker.get_statistics()
+
+    def is_solved(self):
+        return self.pivot_column_index is None and self.pivot_row is None
+
+    def is_unbounded(self):
+        return self.pivot_column_index is not None and self.pivot_row is None
+
+    def prepare(self):
+        """
+        Zeroes out the objective row at the basis columns, as in Tableau.prepare.
+        """
+        for column, row_with_one in viewitems(self.basis_dict):
+            if column in self.objective_row[0]:
+                self.objective_row = self.combine(self.objective_row, self.constraint_rows[row_with_one], column)
+
+    def get_objective_value(self):
+        numerators, denominator = self.objective_row
+        return -Fraction(numerators.get(self.num_columns, 0), denominator)
+
+    def get_solution(self):
+        """
+        Sets self.solution to the basic solution of the tableau, as a list of Fractions.
+        """
+        self.solution = [Fraction(0)] * self.num_columns
+        for column, row_with_one in viewitems(self.basis_dict):
+            numerators, denominator = self.constraint_rows[row_with_one]
+            self.solution[column] = Fraction(numerators.get(self.num_columns, 0), denominator)
+
+    def solve(self):
+        """
+        Pivots until either a solution has been found (returns True) or the problem is determined
+        to be unbounded (returns False).
+        """
+        while not self.is_solved() and not self.is_unbounded():
+            self.pivot()
+        return self.is_solved()
+
+
+class PhaseOneTableau(IntegerTableau):
+
+    def __init__(self, constraint_matrix, constraint_values, pivot_rule='bland'):
+        """
+        Input:
+            constraint_matrix - the rows of Ax=b
+            constraint_values - b
+            pivot_rule - as for Tableau
+
+        The phase I tableau for Ax=b, x>=0: minimize the sum of one artificial variable per row.
+        The artificial variables are never written out as an identity block. Artificial variable i
+        is column num_real_columns + i; we already know it is basic in row i, so there is no basis
+        to search for, and once it leaves the basis its column is dropped from the tableau for
+        good (phase I never needs it back).
+
+        NOTES:
+            (a) rows with a negative right hand side are negated so the artificial basis is feasible
+            (b) the augmented column comes after the artificial columns; each row gets its single
+                artificial entry, equal to its denominator (i.e. a one)
+            (c) the objective row after pricing out the basis is minus the sum of the rows, with
+                zeroes at the artificial columns
+        """
+        self.num_real_columns = len(constraint_matrix[0]) if constraint_matrix else 0
+        self.num_columns = self.num_real_columns + len(constraint_matrix)
+        self.constraint_rows = []
+        for i in range(len(constraint_matrix)):
+            values = list(constraint_matrix[i][:]) + [constraint_values[i]]
+            if constraint_values[i] < 0:                                                            # (a)
+                values = [-value for value in values]
+            numerators, denominator = self.make_row(values)
+            if self.num_real_columns in numerators:                                                 # (b)
+                numerators[self.num_columns] = numerators.pop(self.num_real_columns)
+            numerators[self.num_real_columns + i] = denominator
+            self.constraint_rows.append((numerators, denominator))
+        self.basis_dict = {self.num_real_columns + i: i for i in range(len(self.constraint_rows))}
+        self.live_artificial_columns = set(self.basis_dict)
+        denominator = 1                                                                             # (c)
+        for _, row_denominator in self.constraint_rows:
+            denominator = lcm(denominator, row_denominator)
+        objective_numerators = {}
+        for numerators, row_denominator in self.constraint_rows:
+            multiplier = denominator // row_denominator
+            for column, value in numerators.items():
+                if column < self.num_real_columns or column == self.num_columns:
+                    objective_numerators[column] = objective_numerators.get(column, 0) - value * multiplier
+        objective_numerators = {column: value for column, value in objective_numerators.items() if value}
+        self.objective_row = self.normalize(objective_numerators, denominator)
+        self.pivot_tracker = PivotTracker(pivot_rule, max(50, len(self.constraint_rows)))
+        self.pivot_column_index = None
+        self.pivot_row = None
+        self.pivot_row_index = None
+        self.find_pivot()
+        self.solution = None
+
+    def find_pivot(self):
+        """
+        Drops the artificial columns that have left the basis and then finds the next pivot as
+        IntegerTableau does.
+        """
+        dropped = [column for column in self.live_artificial_columns if column not in self.basis_dict]
+        if dropped:
+            for column in dropped:
+                self.live_artificial_columns.discard(column)
+            for numerators, _ in self.constraint_rows + [self.objective_row]:
+                for column in dropped:
+                    numerators.pop(column, None)
+        IntegerTableau.find_pivot(self)
+
+
+def solve_kirky(E, tableau_class=PhaseOneTableau, pivot_rule='bland', statistics=None):
     """
     Inputs:
         E - the matrix corresponding to the conditions the frame vector weights must satisfy in
             order to be Kirchhoff. Note that it does not contain the conditions for those
             weights to be positive or their sum to be greater than one.
+        tableau_class - PhaseOneTableau (fraction-free with implicit artificial variables, the
+            default), IntegerTableau or Tableau
+        pivot_rule - the pivot rule of the tableau (see pivot_rules.PIVOT_RULES)
+        statistics - an optional dict that is updated with the pivot rule and iteration counts
 
     Outputs:
         if there is no solution the output is None. If there is a solution that solution is returned
@@ -242,8 +580,9 @@ def solve_kirky(E):
             value which will be our sum_condition value. So we create that vector now as it will be needed
             for the simplex method
         (e) now we setup our phase I tableau. This tableau adds as many auxiliary variables as we have rows
-            to form a basis that our simplex method will then try to zero out. To see what we are doing in
-            the next few lines refer to:
+            to form a basis that our simplex method will then try to zero out. PhaseOneTableau does this
+            on its own without ever storing them; for the other tableaus we add them explicitly in the
+            next few lines
         (f) we form the objective function for this phase I step
         (g) we form the objective value for this phase I step
         (h) create the Tableau given all of this information
@@ -260,24 +599,30 @@ def solve_kirky(E):
         row.append(Fraction(0))
     E.append(sum_condition_row)                                                                     # (c)
     b = [Fraction(0)] * (len(E) - 1) + [sum_condition_value]                                        # (d)
-    num_auxiliary_variables = len(E)                                                                # (e)
-    i = 0
-    for row in E:
-        addition = [Fraction(0)] * num_auxiliary_variables
-        addition[i] = Fraction(1)
-        row.extend(addition)
-        i += 1
-    objective_vector = [Fraction(0)] * (len(E[0]) - num_auxiliary_variables) + \
-        [Fraction(1)] * num_auxiliary_variables                                                     # (f)
-    objective_value = Fraction(0)                                                                   # (g)
-    tableau = Tableau(objective_vector, objective_value, E, b)                                      # (h)
-    if not tableau.solve() or tableau.objective_row[-1] != 0:
+    if issubclass(tableau_class, PhaseOneTableau):                                                  # (e)
+        tableau = tableau_class(E, b, pivot_rule)
+    else:
+        num_auxiliary_variables = len(E)
+        i = 0
+        for row in E:
+            addition = [Fraction(0)] * num_auxiliary_variables
+            addition[i] = Fraction(1)
+            row.extend(addition)
+            i += 1
+        objective_vector = [Fraction(0)] * (len(E[0]) - num_auxiliary_variables) + \
+            [Fraction(1)] * num_auxiliary_variables                                                 # (f)
+        objective_value = Fraction(0)                                                               # (g)
+        tableau = tableau_class(objective_vector, objective_value, E, b, pivot_rule)                # (h)
+    solved = tableau.solve()
+    if statistics is not None:
+        statistics.update(tableau.get_statistics())
+    if not solved or tableau.get_objective_value() != 0:
         return None
     else:
         tableau.get_solution()
         return tableau.solution[:num_weights]                                                       # (j)
     
-def solve_kirky_scipy(E, random_objective_vector = False):
+def solve_kirky_scipy(E, random_objective_vector = False, mode = 'rational'):
     num_weights = len(E[0])
     sum_condition_row = [1] * num_weights + [-1]                                # (a)
     sum_condition_value = 1
@@ -289,17 +634,193 @@ def solve_kirky_scipy(E, random_objective_vector = False):
         c = [1 for i in range(num_weights + 1)]
     else:
         c = get_random_objective_vector(num_weights + 1)
-    print("linprog started")
-    result = linprog(c, A_eq=E, b_eq=b, integrality=1)
-    print("linprog ended")
-    status = result.status
-    if(status == 0 ):
-        intSolution = np.array([round(x) for x in result.x])
-        toCheck = intSolution * E
-        if(np.sum(toCheck[:-1]) == 0):
+    return find_integer_solution(c, E, b, mode)
+
+MILP_TIME_LIMIT = 30.0
+EXACT_MAX_SUPPORT = 5000
+
+def find_integer_solution(c, E, b, mode = 'rational', max_denominator = 10**6, statistics = None,
+                          time_limit = MILP_TIME_LIMIT):
+    """
+    Inputs:
+        c - the objective vector
+        E - the constraint matrix (dense rows or scipy.sparse). All rows but the last are
+            homogeneous; the last one is the sum condition row whose final entry belongs to the
+            slack variable (the last variable)
+        b - the right hand side of Ex=b
+        mode - 'rational' to solve the LP and reconstruct an exact integer point from it, or
+            'milp' to solve the integer program directly
+        max_denominator - the largest denominator accepted when reconstructing fractions
+        statistics - an optional dict that is updated with the status ('solved', 'infeasible' or
+            'failed'), the simplex iterations of the LP and whether the MILP had to be solved
+        time_limit - the seconds the MILP may take (None for no limit); if it runs out the status
+            is 'failed'
+
+    Outputs:
+        an integer solution as an array, or None if there is none
+
+    NOTES:
+        (a) in 'rational' mode we only solve the continuous LP
+        (b) and turn its solution into an exact integer one; only if the reconstruction fails do
+            we pay for the MILP (an infeasible LP means there is nothing to look for)
+        (c) HiGHS writes its log to stdout unless told not to, which would end up in the middle
+            of whatever the caller prints there
+    """
+    from scipy.optimize import linprog
+    statistics = {} if statistics is None else statistics
+    statistics.update({'status': 'failed', 'iterations': 0, 'used_milp': False})
+    if mode == 'rational':
+        result = linprog(c, A_eq=E, b_eq=b, method='highs')                                         # (a)
+        statistics['iterations'] = int(getattr(result, 'nit', 0))
+        if result.status == 0:
+            solution = reconstruct_integer_solution(result.x, E, b, max_denominator)                # (b)
+            if solution is not None:
+                statistics['status'] = 'solved'
+                return solution
+        elif result.status == 2:
+            statistics['status'] = 'infeasible'
+            return None
+    statistics['used_milp'] = True
+    options = {'disp': False}                                                                       # (c)
+    if time_limit is not None:
+        options['time_limit'] = time_limit
+    result = linprog(c, A_eq=E, b_eq=b, integrality=1, method='highs', options=options)
+    if(result.status == 0 ):
+        intSolution = np.array([round(x) for x in result.x], dtype=np.int64)
+        if is_exact_solution(E, b, intSolution):
+            statistics['status'] = 'solved'
             return intSolution
+    elif result.status == 2:
+        statistics['status'] = 'infeasible'
+    return None
+
+def reconstruct_integer_solution(x, E, b, max_denominator = 10**6, tolerance = 1e-9, support = None):
+    """
+    Inputs:
+        x - a floating point solution of Ex=b, laid out as for find_integer_solution
+        E, b - the system
+        max_denominator - the largest denominator accepted when reconstructing fractions
+        tolerance - values of x below this are taken to be zero
+        support - the columns to solve on exactly if rationalizing x fails (see solve_on_support)
+
+    Outputs:
+        an integer solution as an array, or None if neither way of recovering one satisfies the
+        system exactly
+
+    NOTES:
+        (a) every value is recovered as an exact fraction with continued fractions
+        (b) the homogeneous rows are unaffected by scaling, so we scale to the smallest integer
+            weights and then choose the slack so that the sum condition row holds again
+        (c) the point is checked exactly against the integer system
+        (d) a vertex of a large frame can have denominators far beyond what a double can carry,
+            so then we solve exactly on just the columns x uses, or on support if given (see
+            solve_on_support); supports of more than EXACT_MAX_SUPPORT columns are left to the
+            caller's MILP
+    """
+    weights = scale_to_integers(rationalize(x[:-1], max_denominator))                               # (a)
+    solution = weights + [sum(weights) - int(b[-1])]                                                # (b)
+    if any(weights) and max(solution) < 2**62 and is_exact_solution(E, b, solution):                # (c)
+        return np.array(solution, dtype=np.int64)
+    exact = solve_on_support(x, E, b, max_denominator, tolerance, support)                          # (d)
+    if exact is None or any(value < 0 for value in exact) or not any(exact[:-1]):
+        return None
+    weights = scale_to_integers(exact[:-1])
+    solution = weights + [sum(weights) - int(b[-1])]
+    if is_exact_solution(E, b, solution):
+        return np.array(solution, dtype=object if max(solution) >= 2**62 else np.int64)
     return None
 
+def solve_on_support(x, E, b, max_denominator = 10**6, tolerance = 1e-9, support = None, max_support = None):
+    """
+    Inputs:
+        x - a floating point solution of Ex=b
+        E, b - the system, with integral entries
+        max_denominator, tolerance - as for reconstruct_integer_solution
+        support - the columns to solve on; by default those where x is above tolerance. When x is
+            only nearly feasible the small values of x cannot tell its support apart from noise,
+            and the basic columns of the LP are the better choice
+        max_support - the most columns to solve on (EXACT_MAX_SUPPORT if None). The elimination
+            is pure Python on Fractions and its cost grows faster than the support (about 2s for
+            2000 columns), so larger supports are refused
+
+    Outputs:
+        an exact solution of Ex=b as a list of Fractions that is zero wherever x is, or None if
+        there is none or the support is too large
+
+    Solves the system restricted to the columns x uses by sparse Gauss-Jordan elimination over
+    the rationals. At a vertex those columns are independent, so the solution is unique and no
+    pivoting by objective is needed, unlike the simplex tableaus above.
+
+    NOTES:
+        (a) one sparse row per row of E, keeping only the support columns; columns_of lists
+            the rows each column still appears in
+        (b) eliminate the row with the fewest entries on the column appearing in the fewest rows
+            (Markowitz), which keeps the fill-in of these grid-like systems small
+        (c) an empty row with a nonzero right hand side means the support admits no solution
+        (d) columns that never became pivots are free (only at a degenerate vertex); they keep
+            their rationalized LP values and the pivot columns are solved for by substitution
+    """
+    E = sparse.csr_matrix(E)
+    if support is None:
+        support = np.flatnonzero(np.asarray(x) > tolerance)
+    support = set(int(column) for column in support)
+    if len(support) > (EXACT_MAX_SUPPORT if max_support is None else max_support):
+        return None
+    rows, columns_of = {}, {}                                                                       # (a)
+    for row_index in range(E.shape[0]):
+        start, end = E.indptr[row_index], E.indptr[row_index + 1]
+        row = {int(column): Fraction(int(value)) for column, value in zip(E.indices[start:end], E.data[start:end])
+               if column in support}
+        if not row:
+            if b[row_index] != 0:
+                return None
+            continue
+        rows[row_index] = (row, Fraction(int(b[row_index])))
+        for column in row:
+            columns_of.setdefault(column, set()).add(row_index)
+    pivots = []
+    while rows:
+        row_index = min(rows, key=lambda index: (len(rows[index][0]), index))                       # (b)
+        row, value = rows.pop(row_index)
+        if not row:
+            if value != 0:                                                                          # (c)
+                return None
+            continue
+        column = min(row, key=lambda column: (len(columns_of[column]), column))
+        pivot_value = row[column]
+        row = {other_column: entry / pivot_value for other_column, entry in viewitems(row)}
+        value = value / pivot_value
+        for other_column in row:
+            columns_of[other_column].discard(row_index)
+        for other_index in list(columns_of[column]):
+            other_row, other_value = rows[other_index]
+            factor = other_row[column]
+            for other_column, entry in viewitems(row):
+                new_entry = other_row.get(other_column, 0) - factor * entry
+                if new_entry == 0:
+                    other_row.pop(other_column, None)
+                    columns_of[other_column].discard(other_index)
+                else:
+                    other_row[other_column] = new_entry
+                    columns_of[other_column].add(other_index)
+            rows[other_index] = (other_row, other_value - factor * value)
+        pivots.append((column, row, value))
+    solution = [Fraction(0)] * E.shape[1]
+    pivot_columns = set(column for column, _, _ in pivots)
+    for column in support - pivot_columns:                                                          # (d)
+        solution[column] = Fraction(float(x[column])).limit_denominator(max_denominator)
+    for column, row, value in reversed(pivots):
+        solution[column] = value - sum(entry * solution[other_column]
+                                       for other_column, entry in viewitems(row) if other_column != column)
+    return solution
+
+def is_exact_solution(E, b, solution):
+    """
+    Checks Ex=b exactly for an integer solution, with integer arithmetic throughout.
+    """
+    residual = get_exact_residual(E, solution)
+    return all(int(value) == int(target) for value, target in zip(residual, b))
+
 def get_random_objective_vector(num_dims):
     """
     Generates a random objective vector of length num_weights.
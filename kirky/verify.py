@@ -0,0 +1,272 @@
+from fractions import Fraction
+import numpy as np
+from scipy import sparse
+from .helpers import scale_to_integers
+
+
+class Verification(object):
+    """
+    The outcome of checking edge weights against the vertex conditions of a Kirchhoff system.
+
+    Attributes:
+        passed (bool): Whether every condition holds exactly.
+        max_violation (int): The largest absolute residual of any row of the system.
+        worst_row (int): The row with that residual (None if there are no rows).
+        worst_vertex (int): The index of the vertex that row belongs to.
+        message (str): A human readable summary.
+    """
+
+    def __init__(self, passed, max_violation=0, worst_row=None, worst_vertex=None, message=''):
+        self.passed = passed
+        self.max_violation = max_violation
+        self.worst_row = worst_row
+        self.worst_vertex = worst_vertex
+        self.message = message
+
+    def __bool__(self):
+        return self.passed
+
+    def __str__(self):
+        return self.message
+
+
+def get_exact_residual(E, weights):
+    """
+    Input:
+        E - the system, dense rows or scipy.sparse, with integral entries (they may be stored
+            as floats), or a StencilOperator (which computes the residual itself)
+        weights - integer weights, one per column of E
+
+    Computes E @ weights exactly with a sparse mat-vec.
+
+    NOTES:
+        (a) a float entry that is not an integer means the system itself is not what we expect
+        (b) if no partial sum can leave int64 we let scipy do the mat-vec in int64
+        (c) otherwise we fall back to Python integers, row by row over the CSR structure
+    """
+    if hasattr(E, 'get_residual'):
+        return E.get_residual(weights)
+    E = sparse.csr_matrix(E)
+    if np.any(E.data != np.round(E.data)):                                                          # (a)
+        raise ValueError("the system has non-integer entries")
+    E_int = E.astype(np.int64)
+    weights = np.asarray(weights)
+    if weights.dtype.kind == 'f':
+        if np.any(weights != np.round(weights)):
+            raise ValueError("the weights are not integers")
+        weights = weights.astype(np.int64)
+    row_sums = np.asarray(abs(E_int).sum(axis=1)).ravel()
+    bound = int(np.max(np.abs(weights), initial=0)) * int(np.max(row_sums, initial=0))
+    if weights.dtype != object and bound < 2**63:                                                   # (b)
+        return E_int @ weights.astype(np.int64)
+    weights = [int(weight) for weight in weights]                                                   # (c)
+    residual = np.zeros(E_int.shape[0], dtype=object)
+    for row in range(E_int.shape[0]):
+        start, end = E_int.indptr[row], E_int.indptr[row + 1]
+        residual[row] = sum(int(value) * weights[column]
+                            for value, column in zip(E_int.data[start:end], E_int.indices[start:end]))
+    return residual
+
+
+def verify_weights(E, weights, num_null_rows=1):
+    """
+    Input:
+        E - the vertex condition system (without the sum condition row)
+        weights - one integer weight per edge
+        num_null_rows - how many consecutive rows of E belong to each vertex
+
+    Checks that the weights are nonnegative, not all zero, and satisfy Ew = 0 exactly. Returns a
+    Verification pointing at the worst violating vertex.
+    """
+    weights = np.asarray(weights)
+    if np.any(weights < 0):
+        return Verification(False, message="negative weight on edge %s" % int(np.argmin(weights)))
+    if not np.any(weights):
+        return Verification(False, message="all weights are zero")
+    residual = get_exact_residual(E, weights)
+    if len(residual) == 0:
+        return Verification(True, message="no vertex conditions to check")
+    violations = np.abs(residual)
+    worst_row = int(np.argmax(violations))
+    max_violation = int(violations[worst_row])
+    worst_vertex = worst_row // num_null_rows
+    if max_violation == 0:
+        return Verification(True, 0, worst_row, worst_vertex, "all vertex conditions hold exactly")
+    num_failed = int(np.count_nonzero(violations))
+    message = "%d of %d vertex conditions fail; worst is vertex %d (null row %d) with residual %d" % (
+        num_failed, len(residual), worst_vertex, worst_row % num_null_rows, int(residual[worst_row]))
+    return Verification(False, max_violation, worst_row, worst_vertex, message)
+
+
+CYCLE_PRIMES = (2**31 - 1, 2147483629, 2147483587)
+
+
+class CycleVerification(object):
+    """
+    The outcome of checking the second Kirchhoff condition: the cycles of the graph span the null
+    space of the matrix.
+
+    Attributes:
+        passed (bool): Whether they do.
+        rank (int): The rank of the image of the cycle space under the edge-label map.
+        expected (int): The dimension of the null space (the number of null rows).
+        cycles (list): If passed, pins of edges whose fundamental cycles have independent images:
+            together with prime this is the certificate.
+        prime (int): The prime the independence was found modulo (a nonzero minor modulo a prime
+            is nonzero over the integers).
+        witness (ndarray): If failed, an integer vector orthogonal to the image of every cycle but
+            not to the null space, checked exactly; None if no such vector was found.
+        message (str): A human readable summary.
+    """
+
+    def __init__(self, passed, rank, expected, cycles=None, prime=None, witness=None, message=''):
+        self.passed = passed
+        self.rank = rank
+        self.expected = expected
+        self.cycles = cycles
+        self.prime = prime
+        self.witness = witness
+        self.message = message
+
+    def __bool__(self):
+        return self.passed
+
+    def __str__(self):
+        return self.message
+
+
+def get_spanning_forest(num_vertices, tails, heads):
+    """
+    Returns the vertices in breadth first order and, for every vertex, the edge leading to it in
+    a spanning forest of the graph (-1 for the roots).
+    """
+    endpoints = np.concatenate([tails, heads])
+    others = np.concatenate([heads, tails])
+    edges = np.concatenate([np.arange(len(tails))] * 2)
+    by_endpoint = np.argsort(endpoints, kind='stable')
+    starts = np.searchsorted(endpoints[by_endpoint], np.arange(num_vertices + 1))
+    parent_edges = np.full(num_vertices, -1, dtype=np.int64)
+    visited = np.zeros(num_vertices, dtype=bool)
+    order = []
+    for root in range(num_vertices):
+        if visited[root]:
+            continue
+        visited[root] = True
+        queue = [root]
+        for vertex in queue:
+            for position in by_endpoint[starts[vertex]:starts[vertex + 1]]:
+                other = others[position]
+                if not visited[other]:
+                    visited[other] = True
+                    parent_edges[other] = edges[position]
+                    queue.append(other)
+        order.extend(queue)
+    return np.array(order, dtype=np.int64), parent_edges
+
+
+def get_pivot_columns_mod_p(A, p, limit=None):
+    """
+    Returns the first columns of the integer matrix A that are independent modulo the prime p,
+    stopping once there are limit of them. p is below 2**31, so every product fits in int64.
+    """
+    basis, pivots, columns = [], [], []
+    for column in range(A.shape[1]):
+        vector = np.asarray(A[:, column], dtype=np.int64) % p
+        for (pivot, reduced) in zip(pivots, basis):
+            if vector[pivot]:
+                vector = (vector - vector[pivot] * reduced) % p
+        nonzero = np.flatnonzero(vector)
+        if len(nonzero) == 0:
+            continue
+        vector = vector * pow(int(vector[nonzero[0]]), p - 2, p) % p
+        basis.append(vector)
+        pivots.append(nonzero[0])
+        columns.append(column)
+        if limit is not None and len(columns) == limit:
+            break
+    return columns
+
+
+def get_left_kernel(A):
+    """
+    Returns integer vectors spanning {z : z @ A = 0} for a small integer matrix A, exactly.
+    """
+    rows = [[Fraction(int(value)) for value in row] + [Fraction(int(i == j)) for j in range(A.shape[0])]
+            for (i, row) in enumerate(np.asarray(A))]
+    pivot_row = 0
+    for column in range(A.shape[1]):
+        candidates = [row for row in range(pivot_row, len(rows)) if rows[row][column] != 0]
+        if not candidates:
+            continue
+        rows[pivot_row], rows[candidates[0]] = rows[candidates[0]], rows[pivot_row]
+        for row in range(len(rows)):
+            if row != pivot_row and rows[row][column] != 0:
+                factor = rows[row][column] / rows[pivot_row][column]
+                rows[row] = [value - factor * other for value, other in zip(rows[row], rows[pivot_row])]
+        pivot_row += 1
+    return [scale_to_integers(row[A.shape[1]:]) for row in rows[pivot_row:]]
+
+
+def verify_cycle_space(tails, heads, ids, weights, null_matrix, num_vertices):
+    """
+    Input:
+        tails, heads, ids - the edges of the frame (see Frame.get_edge_arrays)
+        weights - one weight per edge; the graph is made of the edges of positive weight
+        null_matrix - rows spanning the null space of the matrix, one column per vector
+        num_vertices - the number of vertices of the frame
+
+    Checks that the cycles of the graph, mapped to vectors of counts by edge label, span the null
+    space of the matrix. Returns a CycleVerification with a certificate either way.
+
+    NOTES:
+        (a) the fundamental cycles of a spanning forest span the cycle space, so their images
+            span the image of the cycle space; the image of the fundamental cycle of an edge
+            u -> v with label j is e_j + P[u] - P[v], where P[w] counts the labels on the forest
+            path from the root to w
+        (b) columns independent modulo a prime are independent over the rationals, so finding
+            enough of them modulo any one prime proves the condition
+        (c) the image always lies in the null space, so it spans it exactly when it has that many
+            independent vectors; several primes guard against an unlucky one
+        (d) otherwise the left kernel of the best independent columns is computed exactly, and a
+            kernel vector that kills every image but not the null space proves the condition fails
+    """
+    null_matrix = np.rint(np.asarray(null_matrix)).astype(np.int64)
+    expected, num_labels = null_matrix.shape
+    support = np.flatnonzero(np.asarray(weights) > 0)
+    tails = np.asarray(tails, dtype=np.int64)[support]
+    heads = np.asarray(heads, dtype=np.int64)[support]
+    ids = np.asarray(ids, dtype=np.int64)[support]
+    order, parent_edges = get_spanning_forest(num_vertices, tails, heads)                           # (a)
+    potentials = np.zeros((num_vertices, num_labels), dtype=np.int64)
+    for vertex in order:
+        edge = parent_edges[vertex]
+        if edge < 0:
+            continue
+        if heads[edge] == vertex:
+            potentials[vertex] = potentials[tails[edge]]
+            potentials[vertex, ids[edge]] += 1
+        else:
+            potentials[vertex] = potentials[heads[edge]]
+            potentials[vertex, ids[edge]] -= 1
+    non_tree = np.setdiff1d(np.arange(len(support)), parent_edges[parent_edges >= 0])
+    images = potentials[tails[non_tree]] - potentials[heads[non_tree]]
+    images[np.arange(len(non_tree)), ids[non_tree]] += 1
+    images = images.T
+    best = []
+    for prime in CYCLE_PRIMES:                                                                      # (b)
+        columns = get_pivot_columns_mod_p(images, prime, limit=expected)
+        if len(columns) == expected:                                                                # (c)
+            return CycleVerification(True, expected, expected, support[non_tree[columns]].tolist(), prime,
+                                     message="the cycles span the %d dimensional null space" % expected)
+        if len(columns) > len(best):
+            best = columns
+    for vector in get_left_kernel(images[:, best]):                                                 # (d)
+        witness = np.array(vector, dtype=object)
+        if np.any(witness.dot(images.astype(object)) != 0):
+            continue
+        if np.any(null_matrix.astype(object).dot(witness) != 0):
+            message = "the cycles only span %d of the %d dimensional null space" % (len(best), expected)
+            return CycleVerification(False, len(best), expected, witness=witness, message=message)
+    message = "the cycles span %d of %d dimensions modulo %s, but no exact witness was found" % (
+        len(best), expected, list(CYCLE_PRIMES))
+    return CycleVerification(False, len(best), expected, message=message)
@@ -0,0 +1,191 @@
+import itertools
+import numpy as np
+from .helpers import get_lattice_positions
+
+
+def get_zonotope_facets(vectors):
+    """
+    Input:
+        vectors - the (num_vectors, dimensions) generators of the zonotope {sum t_j v_j : 0 <= t_j <= 1}
+
+    Returns (normals, lower, upper): the zonotope is the set of points x with
+    lower <= normals @ x <= upper. Every facet of a zonotope is parallel to dimensions - 1 of its
+    generators, so its normal is their generalized cross product; the bounds are the smallest and
+    largest value of normal . x over the zonotope, which are the sums of the negative and positive
+    parts of normal . v_j.
+    """
+    vectors = np.asarray(vectors, dtype=np.int64)
+    dimensions = vectors.shape[1]
+    if dimensions == 1:
+        normals = np.array([[1]], dtype=np.int64)
+    else:
+        normals = set()
+        for subset in itertools.combinations(range(len(vectors)), dimensions - 1):
+            spanning = vectors[list(subset)].astype(np.float64)
+            normal = np.array([(-1) ** i * np.linalg.det(np.delete(spanning, i, axis=1)) for i in range(dimensions)])
+            normal = np.round(normal).astype(np.int64)
+            divider = np.gcd.reduce(normal)
+            if divider == 0:
+                continue
+            normal = normal // divider
+            if tuple(-normal) not in normals:
+                normals.add(tuple(normal))
+        normals = np.array(sorted(normals), dtype=np.int64)
+    projections = vectors @ normals.T
+    return normals, np.minimum(projections, 0).sum(axis=0), np.maximum(projections, 0).sum(axis=0)
+
+
+class ZonotopeFrame(object):
+    """
+    Represents a frame in a Kirchhoff graph whose vertices are only the lattice points of a region
+    around the origin instead of a whole box: either the zonotope scale * {sum t_j v_j : 0 <= t_j <= 1}
+    spanned by the vectors, or the ball of radius scale * (longest vector). Points far from both are
+    only reachable through long chains of edges and rarely carry weight, while a box spends most of
+    its vertices on them once there are many dimensions.
+
+    Vertices are numbered in the order they are added and never renumbered, and positions are
+    looked up through a dict from integer coordinates to vertex index. Edges are stored in the same
+    flat arrays as ArrayFrame, so Kirchhoff builds its system the same way for both.
+
+    Attributes:
+        dimensions (int): The number of dimensions in the frame.
+        num_vectors (int): The number of vectors in the frame.
+        q (int): The value of q for the frame.
+        region (str): 'zonotope' or 'ball'.
+        scale (int): How far the region reaches, in multiples of the vectors.
+        positions (ndarray): The position of every vertex, in vertex order.
+        index (dict): Maps the coordinates of every vertex to its index.
+        tails, heads, vector_ids, weights (ndarray): The edges, by pin, as in ArrayFrame.
+    """
+    grows_by_dimension = False
+
+    def __init__(self, matrix, q=1, region='zonotope', scale=1):
+        if region not in ('zonotope', 'ball'):
+            raise ValueError("unknown region %s, expected 'zonotope' or 'ball'" % region)
+        self.dimensions = matrix.shape[0]
+        self.num_vectors = matrix.shape[1]
+        self.matrix = matrix
+        self.vectors = np.transpose(matrix).astype(np.int64)
+        self.q = q
+        self.region = region
+        self.scale = 0
+        if region == 'zonotope':
+            self.normals, self.lower, self.upper = get_zonotope_facets(self.vectors)
+        self.positions = np.empty((0, self.dimensions), dtype=np.int64)
+        self.index = {}
+        self.tails = np.empty(0, dtype=np.int32)
+        self.heads = np.empty(0, dtype=np.int32)
+        self.vector_ids = np.empty(0, dtype=np.int32)
+        self.weights = np.empty(0, dtype=np.int64)
+        self.grow_to_scale(scale)
+
+    @property
+    def shape(self):
+        """
+        The extent of the bounding box of the vertices, for code that only wants a rough size.
+        """
+        if len(self.positions) == 0:
+            return [0] * self.dimensions
+        return list(np.max(self.positions, axis=0) - np.min(self.positions, axis=0) + 1)
+
+    def get_bounding_box(self, scale):
+        if self.region == 'zonotope':
+            start = scale * np.minimum(self.vectors, 0).sum(axis=0)
+            end = scale * np.maximum(self.vectors, 0).sum(axis=0) + 1
+        else:
+            radius = int(np.ceil(scale * np.max(np.linalg.norm(self.vectors, axis=1))))
+            start, end = np.full(self.dimensions, -radius), np.full(self.dimensions, radius + 1)
+        return start, end
+
+    def contains(self, positions, scale):
+        """
+        Tells for every row of positions whether it lies in the region of the given scale.
+        """
+        if self.region == 'zonotope':
+            projections = positions @ self.normals.T
+            return np.all((projections >= scale * self.lower) & (projections <= scale * self.upper), axis=1)
+        radius = scale * np.max(np.linalg.norm(self.vectors, axis=1))
+        return np.sum(positions.astype(np.float64) ** 2, axis=1) <= radius * radius + 1e-9
+
+    def find(self, positions):
+        """
+        Returns the index of the vertex at every row of positions, or -1 where there is none.
+        """
+        return np.fromiter((self.index.get(tuple(position), -1) for position in positions.tolist()),
+                           dtype=np.int64, count=len(positions))
+
+    def get_num_vertices(self):
+        return len(self.positions)
+
+    def get_num_edges(self):
+        return len(self.tails)
+
+    def get_positions(self):
+        return self.positions
+
+    def get_edge_arrays(self, start_pin=0):
+        return self.tails[start_pin:], self.heads[start_pin:], self.vector_ids[start_pin:]
+
+    def get_vertex_remap(self):
+        """
+        Vertices are never renumbered, so there is never anything to remap.
+        """
+        return None
+
+    def set_weights(self, weights):
+        self.weights = np.asarray(weights)
+
+    def get_weights(self):
+        return self.weights
+
+    def expand(self, dimension=None, amount=None):
+        """
+        Grows the region by amount (by default doubles its scale). A zonotope or ball grows in
+        every direction at once, so dimension is ignored.
+        """
+        self.grow_to_scale(self.scale + (max(self.scale, 1) if amount is None else int(amount)))
+
+    def grow_to_scale(self, scale):
+        """
+        Adds the lattice points of the region of the given scale that are not vertices yet, and
+        every edge with at least one end among them.
+
+        NOTES:
+            (a) the regions are nested (both contain the origin and grow away from it), so the
+                old vertices all stay and the new ones are numbered after them
+            (b) a new edge either has its tail among the new vertices, or an old tail and a new
+                head; both are found by looking up the other end of every new vertex
+        """
+        if scale <= self.scale:
+            return
+        start, end = self.get_bounding_box(scale)
+        candidates = get_lattice_positions(start, end)
+        candidates = candidates[self.contains(candidates, scale)]
+        new_positions = candidates[self.find(candidates) < 0]                                       # (a)
+        first_index = len(self.positions)
+        new_indices = np.arange(first_index, first_index + len(new_positions))
+        self.index.update(zip(map(tuple, new_positions.tolist()), new_indices.tolist()))
+        self.positions = np.concatenate([self.positions, new_positions])
+        self.scale = scale
+        tails, heads, vector_ids = [self.tails], [self.heads], [self.vector_ids]
+        for (vector_id, vector) in enumerate(self.vectors):                                         # (b)
+            forward = self.find(new_positions + vector)
+            backward = self.find(new_positions - vector)
+            from_new = forward >= 0
+            from_old = (backward >= 0) & (backward < first_index)
+            tails.extend([new_indices[from_new], backward[from_old]])
+            heads.extend([forward[from_new], new_indices[from_old]])
+            vector_ids.append(np.full(np.count_nonzero(from_new) + np.count_nonzero(from_old), vector_id))
+        self.tails = np.concatenate(tails).astype(np.int32)
+        self.heads = np.concatenate(heads).astype(np.int32)
+        self.vector_ids = np.concatenate(vector_ids).astype(np.int32)
+        self.weights = np.concatenate([self.weights, np.zeros(len(self.tails) - len(self.weights), dtype=np.int64)])
+
+
+class BallFrame(ZonotopeFrame):
+    """
+    A ZonotopeFrame whose region is the ball around the origin.
+    """
+
+    def __init__(self, matrix, q=1, scale=1):
+        super(BallFrame, self).__init__(matrix, q, 'ball', scale)
@@ -8,6 +8,9 @@ setup(name='kirky',
         author_email='marcelsanders96@gmail.com',
         license='None',
         packages=['kirky'],
+        entry_points={
+            'console_scripts': ['kirky=kirky.cli:main'],
+        },
         install_requires=[
             'future',
             'matplotlib==3.2.1',
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame, MAX_VERTICES
+
+
+def get_frame():
+    return Kirchhoff(np.array([[1, 1], [1, -1]]), frame_class=ArrayFrame).frame
+
+
+def test_set_weights_keeps_int64():
+    frame = get_frame()
+    weights = np.full(frame.get_num_edges(), 2**40, dtype=np.int64)
+    frame.set_weights(weights)
+    assert frame.get_weights().dtype == np.int64 and frame.get_weights()[0] == 2**40
+    frame.set_weights([1.0] * frame.get_num_edges())
+    assert frame.get_weights().dtype == np.int64
+
+
+def test_set_weights_keeps_python_ints():
+    frame = get_frame()
+    weights = np.array([2**70] * frame.get_num_edges(), dtype=object)
+    frame.set_weights(weights)
+    assert frame.get_weights().dtype == object and frame.get_weights()[0] == 2**70
+
+
+def test_weights_are_int64_before_any_solve():
+    frame = get_frame()
+    assert frame.get_weights().dtype == np.int64
+    frame.expand()
+    assert frame.get_weights().dtype == np.int64 and len(frame.get_weights()) == frame.get_num_edges()
+
+
+def test_vertex_indices_fit_int32():
+    frame = get_frame()
+    shape, num_edges = list(frame.shape), frame.get_num_edges()
+    with pytest.raises(ValueError):
+        frame.expand(0, MAX_VERTICES)
+    assert frame.shape == shape and frame.get_num_edges() == num_edges
+    with pytest.raises(ValueError):
+        frame.grow_to_shape([MAX_VERTICES // shape[1] + 1, shape[1]])
+    assert frame.shape == shape
+    with pytest.raises(ValueError):
+        ArrayFrame(np.array([[2**16, 1], [1, 2**16]]))
+    frame.check_shape([MAX_VERTICES // 2, 2])
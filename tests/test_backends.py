@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.backends import (BACKENDS, SolverBackend, TABLEAU_MAX_COLUMNS, choose_backend, get_available_backends,
+                            get_backend, register_backend)
+
+
+def test_registry():
+    assert {'tableau', 'rational', 'milp', 'warm'} <= set(BACKENDS)
+    assert set(get_available_backends()) <= set(BACKENDS)
+    backend = get_backend('rational')
+    assert get_backend(backend) is backend
+    with pytest.raises(ValueError):
+        get_backend('simplex')
+
+
+def test_register_backend():
+    class UnavailableBackend(SolverBackend):
+        name = 'unavailable'
+
+        @staticmethod
+        def is_available():
+            return False
+
+    class NamelessBackend(SolverBackend):
+        pass
+
+    try:
+        assert register_backend(UnavailableBackend) is UnavailableBackend
+        assert 'unavailable' not in get_available_backends()
+        with pytest.raises(ValueError):
+            get_backend('unavailable')
+    finally:
+        BACKENDS.pop('unavailable', None)
+    with pytest.raises(ValueError):
+        register_backend(NamelessBackend)
+
+
+def test_choose_backend():
+    assert choose_backend(10, TABLEAU_MAX_COLUMNS, 100) == 'tableau'
+    assert choose_backend(1000, 10000, 40000) in ('warm', 'rational')
+
+
+@pytest.mark.parametrize('mode', [name for name in sorted(BACKENDS) if BACKENDS[name].is_available()])
+def test_backends_agree(mode):
+    for matrix, shape, feasible in [([[1, 1], [1, -1]], [3, 3], True), ([[2, 1], [1, 2]], [2, 2], False)]:
+        k = Kirchhoff(np.array(matrix), frame_class=ArrayFrame)
+        k.frame.grow_to_shape(shape)
+        k.screening = False
+        solution = k.solve(random_objective_vector=False, mode=mode)
+        result = k.solver_result
+        assert result.backend == mode
+        assert (solution is not None) == feasible
+        assert result.status == ('solved' if feasible else 'infeasible')
+        if feasible:
+            assert k.verify_solution(solution).passed
@@ -0,0 +1,59 @@
+import io
+import json
+import time
+import pytest
+from kirky.batch import get_finished_ids, main, read_jobs, run_batch
+
+SLOW = [[9, 7, 5], [3, 8, 2], [4, 1, 6]]
+
+
+def read_results(text):
+    return {result['id']: result for result in map(json.loads, text.splitlines())}
+
+
+def test_read_jobs():
+    jsonl = io.StringIO('{"id": "a", "matrix": [[2, 1], [1, 2]], "q": 2}\n\n{"matrix": [[1, 1]]}\n')
+    assert list(read_jobs(jsonl)) == [('a', [[2, 1], [1, 2]], 2), (3, [[1, 1]], 1)]
+    csv = io.StringIO('id,q,matrix\na,2,2 1;1 2\n,,1 1\n')
+    assert list(read_jobs(csv, 'csv')) == [('a', [[2, 1], [1, 2]], 2), (3, [[1, 1]], 1)]
+    with pytest.raises(ValueError):
+        list(read_jobs(io.StringIO(''), 'xml'))
+
+
+def test_get_finished_ids(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    assert get_finished_ids(str(path)) == set()
+    path.write_text('{"id": 1, "status": "solved"}\n{"id": "b", "status": "timeout"}\n{"id": "c", "sta')
+    assert get_finished_ids(str(path)) == {'1', 'b'}
+
+
+def test_run_batch_in_process():
+    output = io.StringIO()
+    jobs = [('a', [[1, 1], [1, -1]], 1), ('b', [[2, 1], [1, 2]], 1), ('c', [[1, 'x']], 1)]
+    counts = run_batch(jobs, output, finished={'b'}, processes=1)
+    results = read_results(output.getvalue())
+    assert counts == {'solved': 1, 'error': 1} and sorted(results) == ['a', 'c']
+    assert results['a']['weights'] and len(results['a']['edges']) == len(results['a']['weights'])
+
+
+def test_run_batch_times_out():
+    output = io.StringIO()
+    jobs = [('slow', SLOW, 1), ('fast', [[1, 1], [1, -1]], 1), ('bad', [[1, 'x']], 1)]
+    start = time.perf_counter()
+    counts = run_batch(jobs, output, processes=2, timeout=2.0)
+    assert time.perf_counter() - start < 30
+    results = read_results(output.getvalue())
+    assert counts == {'timeout': 1, 'solved': 1, 'error': 1}
+    assert results['slow']['status'] == 'timeout' and results['fast']['status'] == 'solved'
+
+
+def test_main_resumes(tmp_path, capsys):
+    source = tmp_path / 'jobs.csv'
+    source.write_text('a,1,1 1;1 -1\nb,1,2 1;1 2\n')
+    output = tmp_path / 'out.jsonl'
+    output.write_text('{"id": "b", "status": "unsolved"}\n')
+    main([str(source), '-o', str(output), '--processes', '1', '--max-steps', '2'])
+    assert capsys.readouterr().err.strip() == '1 solved'
+    assert sorted(read_results(output.read_text())) == ['a', 'b']
+    main([str(source), '-o', str(output), '--processes', '1'])
+    assert capsys.readouterr().err.strip() == 'nothing to do'
@@ -0,0 +1,130 @@
+from fractions import Fraction
+import pytest
+from kirky.block import Edge, Frame
+
+CASES = [
+    (2, [1, 1], [2, 3], [((0, 0), (1, 1), 2)]),
+    (2, [2, 3], [2, 2], [((0, 0), (Fraction(1, 2), Fraction(2, 3)), 2), ((0, Fraction(1, 3)), (1, 0), 3)]),
+    (3, [2, 1, 3], [2, 1, 2], [((0, 0, 0), (Fraction(1, 2), 1, Fraction(1, 3)), 3)]),
+]
+
+
+class FractionFrame(Frame):
+    """
+    block.Frame as it was before positions were scaled to integers: every position is a tuple of
+    Fractions and every move adds a Fraction.
+    """
+
+    def fill_vertex_frame_with_coordinate_vectors(self):
+        for dimension in range(self.dimensions):
+            for position in self.vertices:
+                head_position = tuple(position[i] + (i == dimension) for i in range(self.dimensions))
+                if head_position in self.vertices:
+                    edge = Edge(position, head_position, dimension)
+                    if edge not in self.coordinate_vectors:
+                        self.welcome_edge(edge)
+                        self.coordinate_vectors.add(edge)
+
+    def create_unit_vertex_frame(self):
+        origin = tuple(Fraction(0) for _ in range(self.dimensions))
+        self.vertices[origin] = None
+        for dimension in range(self.dimensions):
+            distance = Fraction(1, self.steps[dimension])
+            new_positions = []
+            for position in list(self.vertices):
+                for i in range(self.steps[dimension]):
+                    new_position = list(position)
+                    new_position[dimension] += (i + 1) * distance
+                    new_positions.append(tuple(new_position))
+            for position in new_positions:
+                self.vertices[position] = None
+
+    def update_vertices(self, edge):
+        self.vertices.setdefault(edge.tail, None)
+        self.vertices.setdefault(edge.head, None)
+
+    def copy_and_add(self, edges, dimension, distance):
+        new_edges = []
+        for edge in edges:
+            tail, head = list(edge.tail), list(edge.head)
+            tail[dimension] += distance
+            head[dimension] += distance
+            new_edge = Edge(tail, head, edge.id)
+            if new_edge in edges:
+                continue
+            new_edges.append(new_edge)
+            self.welcome_edge(new_edge)
+        edges.update(new_edges)
+
+    def shift_and_add(self, edges, dimension, offset):
+        self.copy_and_add(edges, dimension, Fraction(offset, self.steps[dimension]))
+
+    def populate(self, cross_vector):
+        edge_dif = [cross_vector.head[i] - cross_vector.tail[i] for i in range(self.dimensions)]
+        for position in list(self.vertices):
+            needed_position = tuple(position[i] + edge_dif[i] for i in range(self.dimensions))
+            if needed_position in self.vertices:
+                new_edge = Edge(position, needed_position, cross_vector.id)
+                self.welcome_edge(new_edge)
+                self.cross_vectors.add(new_edge)
+
+
+def build(frame_class, dimensions, steps, shape, cross_vectors):
+    frame = frame_class(dimensions, dimensions + len(cross_vectors), steps)
+    frame.seed_frame(list(shape))
+    for (tail, head, id) in cross_vectors:
+        frame.populate(Edge(tail, head, id))
+    frame.double(0)
+    frame.grow_to_size([extent + 1 for extent in frame.shape])
+    return frame
+
+
+def get_edges(frame, edges, convert):
+    return {(convert(edge.tail), convert(edge.head), edge.id) for edge in edges}
+
+
+@pytest.mark.parametrize('dimensions, steps, shape, cross_vectors', CASES)
+def test_integer_positions_match_the_fractions(dimensions, steps, shape, cross_vectors):
+    frame = build(Frame, dimensions, steps, shape, cross_vectors)
+    reference = build(FractionFrame, dimensions, steps, shape, cross_vectors)
+    assert reference.cross_vectors
+    assert set(frame.get_vertex_positions()) == set(reference.vertices)
+    for (edges, reference_edges) in [(frame.coordinate_vectors, reference.coordinate_vectors),
+                                     (frame.cross_vectors, reference.cross_vectors)]:
+        assert get_edges(frame, edges, frame.to_fractions) == get_edges(reference, reference_edges, tuple)
+    assert frame.current_pin == reference.current_pin
+    pins = sorted(edge.pin for edge in frame.coordinate_vectors | frame.cross_vectors)
+    assert pins == list(range(frame.current_pin))
+
+
+@pytest.mark.parametrize('dimensions, steps, shape, cross_vectors', CASES)
+def test_lattice_round_trip(dimensions, steps, shape, cross_vectors):
+    frame = build(Frame, dimensions, steps, shape, cross_vectors)
+    for position in frame.vertices:
+        assert all(isinstance(coordinate, int) for coordinate in position)
+        assert frame.to_lattice(frame.to_fractions(position)) == position
+        assert frame.vertices[position].position == position
+    for edge in frame.cross_vectors:
+        tail, head = frame.get_edge_positions(edge)
+        assert (frame.to_lattice(tail), frame.to_lattice(head)) == (edge.tail, edge.head)
+
+
+def test_off_lattice_positions():
+    frame = Frame(2, 3, [2, 3])
+    assert frame.to_lattice((Fraction(1, 2), Fraction(2, 3))) == (1, 2)
+    assert frame.to_fractions((1, 2)) == (Fraction(1, 2), Fraction(2, 3))
+    with pytest.raises(ValueError):
+        frame.to_lattice((Fraction(1, 3), 0))
+    frame.seed_frame([1, 1])
+    with pytest.raises(ValueError):
+        frame.copy_and_add(frame.coordinate_vectors, 1, Fraction(1, 2))
+
+
+def test_copy_and_add_matches_shift_and_add():
+    shifted, copied = Frame(2, 2, [2, 3]), Frame(2, 2, [2, 3])
+    for frame in [shifted, copied]:
+        frame.seed_frame([1, 1])
+    shifted.shift_and_add(shifted.coordinate_vectors, 1, 2)
+    copied.copy_and_add(copied.coordinate_vectors, 1, Fraction(2, 3))
+    assert set(shifted.vertices) == set(copied.vertices)
+    assert get_edges(shifted, shifted.coordinate_vectors, tuple) == get_edges(copied, copied.coordinate_vectors, tuple)
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.cache import GraphCache, canonicalize
+
+B = np.array([[1, 1, 2], [1, -1, 0]])
+
+
+def get_variants():
+    """
+    B with its columns permuted, its rows swapped, and a row negated.
+    """
+    yield B[:, [2, 0, 1]]
+    yield B[::-1]
+    yield B * np.array([[1], [-1]])
+    yield (B * np.array([[-1], [1]]))[::-1, [1, 2, 0]]
+
+
+def augment(B):
+    return np.hstack([np.identity(B.shape[0], dtype=np.int64), B])
+
+
+def test_canonicalize():
+    canonical = canonicalize(augment(B))[0]
+    for variant in get_variants():
+        matrix = augment(variant)
+        other, M, labels, signs = canonicalize(matrix)
+        assert np.array_equal(other, canonical)
+        assert np.array_equal(M @ matrix, canonical[:, labels] * signs)
+
+
+def test_round_trip_under_permutation_and_reflection(tmp_path):
+    cache = GraphCache(str(tmp_path))
+    k = Kirchhoff(B, frame_class=ArrayFrame, cache=cache)
+    result = k.find()
+    assert result.solution is not None and result.attempts[-1].backend != 'cache'
+    assert len(os.listdir(str(tmp_path))) == 1
+    for variant in get_variants():
+        k = Kirchhoff(variant, frame_class=ArrayFrame, cache=cache)
+        result = k.find()
+        assert len(result.attempts) == 1 and result.attempts[0].backend == 'cache'
+        assert k.verify_solution(result.solution).passed
+        assert k.verify_cycles(result.solution).passed
+    assert len(os.listdir(str(tmp_path))) == 1
+
+
+def test_put_and_get(tmp_path):
+    cache = GraphCache(str(tmp_path))
+    matrix = augment(np.array([[1], [1]]))
+    assert cache.get(matrix) is None
+    positions = np.array([[0, 0], [1, 0], [0, 1], [1, 1]])
+    weights = np.array([2**63, 0, 1], dtype=object)
+    cache.put(matrix, 1, positions, [0, 0, 1], [1, 2, 3], [0, 1, 1], weights)
+    cached_positions, tails, heads, ids, cached_weights = cache.get(matrix)
+    assert cached_weights.tolist() == [2**63, 1]
+    edges = sorted(zip(cached_positions[tails].tolist(), cached_positions[heads].tolist(), ids.tolist()))
+    assert edges == [([0, 0], [1, 0], 0), ([1, 0], [1, 1], 1)]
+    assert cache.get(matrix, q=2) is None
+
+
+def test_eviction(tmp_path):
+    cache = GraphCache(str(tmp_path), max_bytes=0)
+    positions = np.array([[0, 0], [1, 0]])
+    cache.put(augment(np.array([[1], [1]])), 1, positions, [0], [1], [0], [1])
+    assert os.listdir(str(tmp_path)) == []
+    cache.max_bytes = 10**6
+    for extent in [1, 2]:
+        cache.put(augment(np.array([[extent], [1]])), 1, positions, [0], [1], [0], [1])
+    assert len(os.listdir(str(tmp_path))) == 2
+    cache.clear()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_corrupt_entries_are_misses(tmp_path):
+    cache = GraphCache(str(tmp_path))
+    matrix = augment(np.array([[1], [1]]))
+    path = cache.get_path(canonicalize(matrix)[0], 1)
+    with open(path, 'wb') as entry:
+        entry.write(b'not an archive')
+    assert cache.get(matrix) is None
@@ -0,0 +1,53 @@
+import json
+import os
+import pytest
+from kirky.cli import main, parse_matrix
+
+
+def test_parse_matrix():
+    assert parse_matrix('2 1; 1 2').tolist() == [[2, 1], [1, 2]]
+    assert parse_matrix(' 2,1;1,-2; ').tolist() == [[2, 1], [1, -2]]
+    assert parse_matrix('[[2, 1], [1, 2]]').tolist() == [[2, 1], [1, 2]]
+
+
+def test_export(tmp_path, capsys):
+    path = tmp_path / 'graph.json'
+    assert main(['1 1; 1 -1', '--export', str(path)]) == 0
+    exported = json.loads(path.read_text())
+    assert exported['status'] == 'solved' and len(exported['edges']) == len(exported['weights'])
+    err = capsys.readouterr().err
+    assert 'find' in err and 'export' in err
+
+
+def test_export_to_stdout(capsys):
+    assert main(['1 1; 1 -1', '--export', '-', '--frame', 'frame']) == 0
+    exported = json.loads(capsys.readouterr().out)
+    assert exported['status'] == 'solved' and min(exported['weights']) > 0
+
+
+def test_unsolved(capsys):
+    assert main(['2 1; 1 2', '--max-steps', '1', '--export', '-']) == 1
+    assert json.loads(capsys.readouterr().out)['status'] == 'unsolved'
+
+
+def test_render(tmp_path):
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    path = tmp_path / 'graph.png'
+    assert main(['1 1; 1 -1', '--render', str(path)]) == 0
+    assert path.read_bytes().startswith(b'\x89PNG')
+
+
+def test_cache(tmp_path, capsys):
+    assert main(['1 1; 1 -1', '--cache', str(tmp_path)]) == 0
+    assert len(os.listdir(str(tmp_path))) == 1
+    capsys.readouterr()
+    assert main(['1 1; -1 1', '--cache', str(tmp_path)]) == 0
+    assert 'cache' in capsys.readouterr().err
+
+
+def test_batch(tmp_path, capsys):
+    source = tmp_path / 'jobs.jsonl'
+    source.write_text(json.dumps({'id': 'a', 'matrix': [[1, 1], [1, -1]]}) + '\n')
+    main(['batch', str(source), '--processes', '1'])
+    assert json.loads(capsys.readouterr().out)['status'] == 'solved'
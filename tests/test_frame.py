@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+from kirky import Kirchhoff
+from kirky.block_q import Frame
+from kirky.helpers import get_lattice_positions
+
+MATRICES = [
+    np.array([[2, 1], [1, 2]]),
+    np.array([[1, -2, 3]]),
+    np.array([[1, 1, 0], [0, 1, -1]]),
+    np.array([[3, -1, 2], [1, 2, -2], [0, 1, 1]]),
+]
+
+
+def get_dense_system(k):
+    """
+    Builds the system with the per-vertex, per-edge loop generate_linear_system used before it
+    was assembled as a sparse matrix.
+    """
+    null_matrix = k.get_null_matrix()
+    num_edges = len(k.frame.edges)
+    system = []
+    for position in k.frame.vertices:
+        vertex = k.frame.vertices[position]
+        for null_row in null_matrix:
+            system_row = [0 for _ in range(num_edges)]
+            for edge in vertex.incoming:
+                if edge.head is not None:
+                    system_row[edge.pin] -= null_row[edge.id]
+            for edge in vertex.outgoing:
+                if edge.head is not None:
+                    system_row[edge.pin] += null_row[edge.id]
+            system.append(system_row)
+    return np.array(system)
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_sparse_system_matches_the_dense_loop(matrix):
+    k = Kirchhoff(matrix, reduce_lattice=False)
+    for _ in range(3):
+        E = k.generate_sparse_linear_system()
+        assert np.array_equal(E.toarray(), get_dense_system(k))
+        assert np.array_equal(np.array(k.generate_linear_system()), get_dense_system(k))
+        k.frame.expand()
+
+
+def get_frame_at_shape(matrix, shape):
+    """
+    Builds a frame of the given shape in one go, the way Frame.__init__ builds its first shape.
+    """
+    frame = Frame(matrix)
+    frame.shape = list(shape)
+    frame.vertices = {}
+    frame.vertex_list = []
+    frame.index_grid = np.zeros(0, dtype=np.int64).reshape((0,) * frame.dimensions)
+    frame.edges = []
+    frame.populate_vertices(np.zeros(frame.dimensions, dtype=np.int16), np.array(shape, dtype=np.int16))
+    frame.populate_edges(np.zeros(frame.dimensions, dtype=np.int16), np.array(shape, dtype=np.int16))
+    return frame
+
+
+def get_edge_set(frame):
+    return {(tuple(edge.tail.position), tuple(edge.head.position), edge.id) for edge in frame.edges}
+
+
+def get_pins(frame):
+    return [(tuple(edge.tail.position), tuple(edge.head.position), edge.id) for edge in frame.edges]
+
+
+def get_indices(frame):
+    return {position: vertex.index for (position, vertex) in frame.vertices.items()}
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_expand_keeps_pins_and_indices(matrix):
+    frame = Frame(matrix)
+    for _ in range(3):
+        pins, indices = get_pins(frame), get_indices(frame)
+        frame.expand()
+        assert get_pins(frame)[:len(pins)] == pins
+        assert all(get_indices(frame)[position] == index for (position, index) in indices.items())
+        assert [edge.pin for edge in frame.edges] == list(range(len(frame.edges)))
+        assert [vertex.index for vertex in frame.vertex_list] == list(range(len(frame.vertices)))
+        fresh = get_frame_at_shape(matrix, frame.shape)
+        assert len(frame.edges) == len(fresh.edges) == len(get_edge_set(frame))
+        assert get_edge_set(frame) == get_edge_set(fresh)
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_grow_to_shape_matches_a_fresh_frame(matrix):
+    frame = Frame(matrix)
+    pins, indices = get_pins(frame), get_indices(frame)
+    shape = [extent + 2 + dimension for (dimension, extent) in enumerate(frame.shape)]
+    assert frame.grow_to_shape(shape)
+    assert frame.shape == shape
+    assert get_pins(frame)[:len(pins)] == pins
+    assert all(get_indices(frame)[position] == index for (position, index) in indices.items())
+    fresh = get_frame_at_shape(matrix, shape)
+    assert len(frame.edges) == len(fresh.edges)
+    assert get_edge_set(frame) == get_edge_set(fresh)
+    assert not frame.grow_to_shape([extent - 1 for extent in shape])
+    assert frame.shape == shape
+
+
+def iterate_vertices(start, end):
+    """
+    The generator Frame used to enumerate a box before get_lattice_positions.
+    """
+    start = np.array(start)
+    end = np.array(end)
+    for i in range(np.prod(end - start)):
+        position = np.zeros(len(start))
+        for j, dim in enumerate(end - start):
+            position[j] = i % dim
+            i = i // dim
+        position += start
+        yield position
+
+
+@pytest.mark.parametrize('start, end', [([0, 0], [3, 4]), ([2, 0, 1], [5, 3, 4]), ([1], [6]), ([0, 2], [3, 2])])
+def test_lattice_positions_match_the_generator(start, end):
+    positions = get_lattice_positions(start, end)
+    expected = list(iterate_vertices(start, end))
+    assert positions.shape == (len(expected), len(start))
+    assert np.array_equal(positions, np.array(expected).reshape(positions.shape))
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_index_grid_matches_the_vertices(matrix):
+    frame = Frame(matrix)
+    for _ in range(3):
+        assert list(frame.index_grid.shape) == list(frame.shape)
+        for (position, vertex) in frame.vertices.items():
+            assert frame.index_grid[position] == vertex.index
+            assert frame.vertex_list[vertex.index] is vertex
+        for edge in frame.edges:
+            vector = frame.matrix[:, edge.id]
+            assert np.array_equal(edge.head.position - edge.tail.position, vector)
+        frame.expand()
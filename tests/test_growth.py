@@ -0,0 +1,70 @@
+import time
+import numpy as np
+import pytest
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.growth import choose_growth, get_dimension_blame, get_vertex_blame
+from kirky.session import MIN_BUDGET, get_highspy
+
+
+def test_get_vertex_blame():
+    assert get_vertex_blame([1, -2, 0, 3, 5], 2).tolist() == [3, 3]
+
+
+def test_get_dimension_blame():
+    positions = [[0, 1], [2, 2], [4, 0]]
+    blame = get_dimension_blame(positions, [5, 5], [1, 2], [1, 10, 100])
+    assert blame.tolist() == [101, 100.5]
+    assert get_dimension_blame(positions, [5, 5], [1, 1], [0, 10, 0]).tolist() == [0, 0]
+
+
+def test_choose_growth():
+    assert choose_growth([4, 4], [1, 3], [0, 0]) == []
+    assert choose_growth([4, 4], [1, 3], [1, 0.2]) == [(0, 1)]
+    assert choose_growth([4, 2], [1, 3], [1, 0.6]) == [(0, 1), (1, 2)]
+
+
+def test_unknown_strategy():
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    with pytest.raises(ValueError):
+        k.grow_frame('triple')
+
+
+MATRICES = [[[2, 1], [1, 2]], [[3, 1], [1, 3]], [[2, 3]], [[3, 2], [1, 4]], [[1, 2, 3]], [[2, 1, 1], [1, 2, 1]],
+            [[5, 2], [3, 1]], [[7, 3], [2, 9]], [[5, 3, 2], [1, 4, 7]]]
+
+
+@pytest.mark.skipif(get_highspy() is None, reason="needs highspy")
+def test_certificate_beats_doubling():
+    edges, solves = {}, {}
+    for strategy in ['certificate', 'double']:
+        edges[strategy], solves[strategy] = [], []
+        for matrix in MATRICES:
+            k = Kirchhoff(np.array(matrix), frame_class=ArrayFrame)
+            result = k.find(max_steps=10, strategy=strategy)
+            assert result.solution is not None and k.verify_solution(result.solution).passed
+            edges[strategy].append(k.frame.get_num_edges())
+            solves[strategy].append(len(result.attempts))
+    assert all(np.less_equal(solves['certificate'], solves['double']))
+    assert sum(solves['certificate']) < sum(solves['double'])
+    assert sum(edges['certificate']) < sum(edges['double'])
+    assert sum(np.less(edges['certificate'], edges['double'])) > len(MATRICES) / 2
+
+
+@pytest.mark.skipif(get_highspy() is None, reason="needs highspy")
+def test_certificate_costs_at_most_the_solve():
+    k = Kirchhoff(np.array([[9, 7, 5], [3, 8, 2], [4, 1, 6]]), frame_class=ArrayFrame)
+    k.frame.grow_to_shape([7, 13, 13])
+    assert k.solve(mode='warm') is None
+    start = time.perf_counter()
+    k.get_dual_ray()
+    assert time.perf_counter() - start < max(MIN_BUDGET, k.solver_result.seconds) + 1.0
+
+
+@pytest.mark.skipif(get_highspy() is None, reason="needs highspy")
+def test_grow_frame_follows_the_certificate():
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    shape = list(k.frame.shape)
+    assert k.solve() is None
+    k.grow_frame()
+    assert all(np.greater_equal(k.frame.shape, shape)) and k.frame.shape != shape
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from kirky import Kirchhoff
+
+matplotlib = pytest.importorskip('matplotlib')
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from kirky import imagine
+from kirky.imagine import get_drawable_edges, get_connected_positions, get_stacked_edges, project_edges, plot_graph
+
+MATRICES = [[[2, 1], [1, 2]], [[1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, -1]]]
+
+
+def get_solved(matrix):
+    k = Kirchhoff(np.array(matrix))
+    assert k.find().solution is not None
+    return k
+
+
+def get_projection(dimensions):
+    return np.random.RandomState(dimensions).uniform(-1, 1, (2, dimensions))
+
+
+def get_loop_geometry(k, transformation_matrix, space_offset):
+    """
+    The per-edge loop plot_graph and draw_graph_slider used before the edges were projected with
+    one matrix product.
+    """
+    LABEL_POSITION = 0.618
+    TEXT_OFFSET = 0.025
+    vectors = []
+    vector_text = []
+    vector_text_positions = []
+    for tail, head, vector_id, weight in zip(*get_drawable_edges(k)):
+        if weight != 0:
+            head_vertex = np.dot(transformation_matrix, head)
+            tail_vertex = np.dot(transformation_matrix, tail)
+            vector = head_vertex - tail_vertex
+            normalized = vector / np.linalg.norm(vector)
+            tail_position = tail_vertex + space_offset * normalized
+            components = vector - 2 * space_offset * normalized
+            text_position = np.subtract(tail_vertex + vector * LABEL_POSITION, TEXT_OFFSET)
+            vectors.append((tail_position[0], tail_position[1], components[0], components[1]))
+            vector_text.append(f'{weight}, {vector_id + 1}')
+            vector_text_positions.append((text_position[0], text_position[1]))
+    vertices = [np.dot(transformation_matrix, position) for position in get_connected_positions(k)]
+    return np.array(vectors), vector_text, np.array(vector_text_positions), np.array(vertices)
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_project_edges_matches_the_loop(matrix):
+    k = get_solved(matrix)
+    transformation_matrix = get_projection(k.dimensions)
+    vectors, texts, text_positions, _ = get_loop_geometry(k, transformation_matrix, 0.05)
+    tails, heads, labels, _ = get_stacked_edges(k)
+    tail_positions, components, projected_text_positions = project_edges(tails, heads, transformation_matrix, 0.05)
+    assert np.allclose(np.hstack([tail_positions, components]), vectors)
+    assert np.allclose(projected_text_positions, text_positions)
+    assert labels == texts
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_plot_graph_matches_the_loop(matrix):
+    k = get_solved(matrix)
+    transformation_matrix = get_projection(k.dimensions)
+    vectors, texts, text_positions, vertices = get_loop_geometry(k, transformation_matrix, 0.02)
+    fig = plt.figure()
+    quiver, scatter, labels = plot_graph(fig.add_subplot(111), k, transformation_matrix)
+    assert np.allclose(quiver.get_offsets(), vectors[:, :2])
+    assert np.allclose(np.transpose([quiver.U, quiver.V]), vectors[:, 2:])
+    assert np.allclose(scatter.get_offsets(), vertices)
+    assert [label.get_text() for label in labels] == texts
+    assert np.allclose([label.get_position() for label in labels], text_positions)
+    plt.close(fig)
+
+
+def test_zero_length_projection():
+    tails = np.array([[0.0, 0.0], [1.0, 1.0]])
+    heads = np.array([[1.0, 1.0], [2.0, 2.0]])
+    tail_positions, components, _ = project_edges(tails, heads, np.array([[1.0, -1.0], [1.0, -1.0]]), 0.05)
+    assert np.all(np.isfinite(tail_positions)) and np.all(components == 0)
+
+
+def get_visible_labels(fig):
+    return [text for text in fig.axes[0].texts if text.get_visible() and text.get_text()]
+
+
+def test_slider_labels(monkeypatch):
+    monkeypatch.setattr(plt, 'show', lambda: None)
+    k = get_solved(MATRICES[1])
+    num_labels = len(get_stacked_edges(k)[2])
+    x, y = get_projection(k.dimensions)
+    imagine.draw_graph_slider(k, x, y)
+    fig = plt.gcf()
+    fig.canvas.draw()
+    assert len(fig.axes[0].texts) == num_labels and len(get_visible_labels(fig)) == num_labels
+    plt.close(fig)
+    imagine.draw_graph_slider(k, x, y, max_labels=2)
+    fig = plt.gcf()
+    assert len(fig.axes[0].texts) == 2 and not get_visible_labels(fig)
+    plt.close(fig)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.block_q import Frame
+from kirky.lattice import lll_reduce, reduce_rows, get_frame_size
+
+MATRICES = [
+    np.array([[-3, -3], [1, 3]]),
+    np.array([[2, 1], [1, 2]]),
+    np.array([[5, 7, 2], [3, 4, -3]]),
+    np.array([[1, 1, 1], [1, -1, 0], [0, 1, -1]]),
+]
+
+
+def test_lll_reduce_is_unimodular():
+    rows = [[1, 0, 7, 9], [0, 1, 3, 4]]
+    reduced, transform = lll_reduce(rows)
+    assert np.array_equal(np.array(transform) @ np.array(rows), np.array(reduced))
+    assert abs(round(np.linalg.det(np.array(transform, dtype=float)))) == 1
+
+
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_reduce_rows(matrix):
+    k = Kirchhoff(matrix, reduce_lattice=False)
+    reduced, transform, inverse = reduce_rows(k.matrix)
+    identity = np.identity(k.dimensions, dtype=np.int64)
+    assert np.array_equal(transform @ inverse, identity)
+    assert np.array_equal(reduced, transform @ k.matrix)
+    assert get_frame_size(reduced) <= get_frame_size(k.matrix)
+    for row in reduced:
+        assert max(row) >= -min(row) and max(row) > 0
+
+
+@pytest.mark.parametrize('frame_class', [Frame, ArrayFrame])
+def test_expand_grows_along_every_dimension(frame_class):
+    k = Kirchhoff(np.array([[-3, -3], [1, 3]]), frame_class=frame_class)
+    first_shape = list(k.frame.shape)
+    for _ in range(4):
+        k.frame.expand()
+    assert all(extent > first for extent, first in zip(k.frame.shape, first_shape))
+
+
+@pytest.mark.parametrize('frame_class', [Frame, ArrayFrame])
+def test_find_on_a_reduced_matrix(frame_class):
+    k = Kirchhoff(np.array([[-3, -3], [1, 3]]), frame_class=frame_class)
+    result = k.find(max_steps=6)
+    assert result
+    assert k.verify_solution(result.solution).passed
+    assert np.array_equal(k.get_positions() @ k.transform.T, np.asarray(k.frame.get_positions()))
@@ -0,0 +1,37 @@
+import pytest
+from kirky.pivot_rules import PIVOT_RULES, BlandRule, DantzigRule, PivotTracker, get_pivot_rule
+from kirky.tableau import IntegerTableau, PhaseOneTableau, solve_kirky
+from .test_tableau import get_systems, get_rows, is_exact, is_feasible
+
+
+@pytest.mark.parametrize('rule', sorted(PIVOT_RULES))
+@pytest.mark.parametrize('tableau_class', [IntegerTableau, PhaseOneTableau])
+def test_every_rule_solves(rule, tableau_class):
+    for E, b in get_systems():
+        statistics = {}
+        weights = solve_kirky(get_rows(E), tableau_class=tableau_class, pivot_rule=rule, statistics=statistics)
+        assert statistics['rule'] == rule
+        assert (weights is not None) == is_feasible(E, b)
+        if weights is not None:
+            assert min(weights) >= 0 and is_exact(E, b, list(weights) + [sum(weights) - 1])
+
+
+def test_get_pivot_rule():
+    assert isinstance(get_pivot_rule('dantzig'), DantzigRule)
+    rule = BlandRule()
+    assert get_pivot_rule(rule) is rule
+    with pytest.raises(ValueError):
+        get_pivot_rule('largest')
+
+
+def test_tracker_falls_back_to_bland():
+    tracker = PivotTracker('dantzig', degeneracy_limit=2)
+    tracker.record(None, 0, 0, True)
+    tracker.record(None, 0, 0, False)
+    tracker.record(None, 0, 0, True)
+    tracker.record(None, 0, 0, True)
+    assert isinstance(tracker.rule, DantzigRule)
+    tracker.record(None, 0, 0, True)
+    assert isinstance(tracker.rule, BlandRule)
+    assert tracker.get_statistics() == {'rule': 'dantzig', 'iterations': 5, 'degenerate_iterations': 4,
+                                        'fell_back_to_bland': True}
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from scipy.optimize import linprog
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.backends import get_backend, postsolve_integer_solution
+from kirky.presolve import presolve
+from kirky.verify import get_exact_residual
+
+MATRICES = [[[2, 1], [1, 2]], [[-3, 1], [1, 1]], [[1, 2]], [[2, 3]], [[1, -2, 3]], [[-2, 0], [2, -1]], [[0, 2], [-1, 0]]]
+
+
+def get_systems():
+    for matrix in MATRICES:
+        k = Kirchhoff(np.array(matrix), frame_class=ArrayFrame)
+        for _ in range(2):
+            yield k
+            k.frame.expand()
+
+
+def test_singleton_columns_are_eliminated():
+    E = sparse.csr_matrix([[1, -1, -2, 0], [0, 1, 0, 0], [1, 1, 1, -1]])
+    presolved = presolve(E, np.array([0, 0, 1]))
+    report = presolved.get_report()
+    assert report['eliminated_columns'] == 1
+    assert report['rows'] < E.shape[0] and report['columns'] < E.shape[1]
+
+
+def test_eliminations_happen_on_frames():
+    eliminated = 0
+    for k in get_systems():
+        E, b = k.get_normalized_system()
+        eliminated += presolve(E, b).get_report()['eliminated_columns']
+    assert eliminated > 0
+
+
+def test_postsolve_round_trip():
+    for k in get_systems():
+        E, b = k.get_normalized_system()
+        presolved = presolve(E, b)
+        if presolved.infeasible:
+            continue
+        result = linprog(np.ones(presolved.E.shape[1]), A_eq=presolved.E, b_eq=presolved.b, method='highs')
+        if result.status != 0:
+            continue
+        backend = get_backend('rational')
+        solution = backend.solve_system([1] * presolved.E.shape[1], presolved.E, presolved.b, {})
+        original = postsolve_integer_solution(presolved, solution, E, b)
+        assert original is not None
+        assert np.array_equal(get_exact_residual(E, original), b)
+        assert min(original) >= 0 and sum(original[:-1]) > 0
+
+
+@pytest.mark.parametrize('mode', ['tableau', 'rational'])
+def test_presolve_keeps_feasibility(mode):
+    for k in get_systems():
+        E, b = k.get_normalized_system()
+        if mode == 'tableau' and E.shape[1] > 64:
+            continue
+        feasible = linprog(np.zeros(E.shape[1]), A_eq=E, b_eq=b, method='highs').status == 0
+        solution = get_backend(mode).solve(k, False, {})
+        assert (solution is not None) == feasible
+        if solution is not None:
+            assert k.verify_solution(solution).passed
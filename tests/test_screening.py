@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from scipy.optimize import linprog
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.session import get_highspy
+from kirky.screening import screen, get_missing_vectors, get_rank_mod_p, PRESOLVE_MAX_COLUMNS, RANK_PRIME
+
+
+def test_get_missing_vectors():
+    assert get_missing_vectors([0, 2, 2], 4).tolist() == [1, 3]
+
+
+def test_get_rank_mod_p():
+    A = np.array([[1, 2, 3], [2, 4, 6], [1, 0, 1]])
+    assert get_rank_mod_p(A) == np.linalg.matrix_rank(A) == 2
+    assert get_rank_mod_p(np.array([[RANK_PRIME, 0], [0, 1]])) == 1
+
+
+@pytest.mark.parametrize('matrix, condition', [
+    ([[2, 1], [1, 2]], 'presolve'),
+    ([[2, 3]], 'rank'),
+    ([[0, 2], [3, 4]], 'coarse'),
+])
+def test_rejections(matrix, condition):
+    k = Kirchhoff(np.array(matrix), frame_class=ArrayFrame)
+    screening = screen(k)
+    assert not screening and screening.condition == condition
+    E, b = k.get_normalized_system()
+    assert linprog(np.zeros(E.shape[1]), A_eq=E, b_eq=b, method='highs').status == 2
+    assert k.solve() is None and k.solver_result.backend == 'screening'
+
+
+def test_never_rejects_a_feasible_frame():
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        k = Kirchhoff(rng.integers(-4, 5, (rng.integers(1, 3), rng.integers(1, 3))), frame_class=ArrayFrame)
+        for _ in range(2):
+            E, b = k.get_normalized_system()
+            if linprog(np.zeros(E.shape[1]), A_eq=E, b_eq=b, method='highs').status == 0:
+                assert screen(k)
+            k.grow_frame('double')
+
+
+def test_presolve_is_shared_with_the_backend():
+    k = Kirchhoff(np.array([[1, 2]]), frame_class=ArrayFrame)
+    screen(k)
+    presolved = k.presolved
+    assert presolved is not None
+    assert k.solve(mode='rational') is not None
+    assert k.presolved is presolved
+    k.frame.expand()
+    assert k.get_presolved_system()[2] is not presolved[3]
+
+
+@pytest.mark.skipif(get_highspy() is None, reason="needs highspy")
+def test_presolve_only_for_backends_using_it():
+    k = Kirchhoff(np.array([[7, 3], [2, 9]]), frame_class=ArrayFrame)
+    k.frame.grow_to_shape([32, 32])
+    assert k.frame.get_num_edges() > PRESOLVE_MAX_COLUMNS
+    assert screen(k, presolve=False) and k.presolved is None
+    k.solve(mode='warm')
+    assert k.presolved is None
+    assert screen(k) and k.presolved is not None
+
+
+def test_small_systems_are_always_presolved():
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    screening = screen(k, presolve=False)
+    assert not screening and screening.condition == 'presolve'
@@ -0,0 +1,60 @@
+import numpy as np
+from kirky import search
+from kirky.search import search_shapes, get_candidate_shapes, get_size
+
+MATRIX = [[5, 7, 2], [3, 4, -3]]
+
+
+def test_get_candidate_shapes():
+    shapes = get_candidate_shapes([2, 3], [1, 2], max_steps=3)
+    assert len(shapes) == 9 and shapes[0] == (2, 3)
+    assert [get_size(shape) for shape in shapes] == sorted(get_size(shape) for shape in shapes)
+
+
+def test_parallel_search_finds_the_serial_shape():
+    serial = search_shapes(MATRIX, processes=1)
+    parallel = search_shapes(MATRIX, processes=3)
+    assert serial and parallel
+    assert get_size(parallel.shape) == get_size(serial.shape)
+    assert len(parallel.attempts) == len(serial.attempts)
+    for attempt in parallel.attempts:
+        if attempt.status == 'cancelled':
+            assert get_size(attempt.shape) >= get_size(parallel.shape)
+
+
+def test_timeout_kills_candidates():
+    result = search_shapes(MATRIX, processes=2, timeout=0.01)
+    statuses = [attempt.status for attempt in result.attempts]
+    assert 'timeout' in statuses
+    assert len(statuses) == 4 ** 2
+    assert result.seconds < 10
+
+
+def count_workers(monkeypatch):
+    started = []
+
+    class CountedWorker(search.CandidateWorker):
+        def __init__(self):
+            super(CountedWorker, self).__init__()
+            started.append(self)
+
+    monkeypatch.setattr(search, 'CandidateWorker', CountedWorker)
+    return started
+
+
+def test_workers_are_reused(monkeypatch):
+    started = count_workers(monkeypatch)
+    result = search_shapes(MATRIX, processes=2, max_steps=3)
+    assert result
+    tried = [attempt for attempt in result.attempts if attempt.status != 'cancelled']
+    killed = [attempt for attempt in result.attempts if attempt.status == 'cancelled' and attempt.seconds > 0]
+    assert len(started) <= 2 + len(killed) and len(started) < len(tried) + len(killed)
+    assert not any(worker.process.is_alive() for worker in started)
+
+
+def test_only_killed_workers_are_replaced(monkeypatch):
+    started = count_workers(monkeypatch)
+    result = search_shapes(MATRIX, processes=2, timeout=0.01)
+    timeouts = [attempt for attempt in result.attempts if attempt.status == 'timeout']
+    assert len(started) <= 2 + len(timeouts)
+    assert not any(worker.process.is_alive() for worker in started)
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.session import HighsSession, get_highspy, find_dual_ray
+from kirky.tableau import find_integer_solution, reconstruct_integer_solution
+
+pytestmark = pytest.mark.skipif(get_highspy() is None, reason="needs highspy")
+
+
+def test_session_follows_the_frame():
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    session = HighsSession(k)
+    statistics = {}
+    assert session.solve(statistics) is None
+    assert statistics['status'] == 'infeasible'
+    dual_ray = session.get_dual_ray()
+    E, b = k.get_normalized_system()
+    assert dual_ray is not None and len(dual_ray) == E.shape[0]
+    k.frame.grow_to_shape([3, 5])
+    solution = session.solve(statistics)
+    assert statistics['status'] == 'solved' and not statistics['used_milp']
+    assert k.verify_solution(solution).passed
+    assert session.num_edges == k.frame.get_num_edges()
+
+
+def test_find_dual_ray():
+    E = sparse.csr_matrix([[1, -1, 0], [1, 1, -1]])
+    assert find_dual_ray(E, [0, 1]) is None
+    dual_ray = find_dual_ray(sparse.csr_matrix([[1, 1, 0], [1, 1, -1]]), [0, 1])
+    assert dual_ray is not None
+
+
+def test_reconstruct_on_given_support():
+    k = Kirchhoff(np.array([[1, 1], [1, -1]]), frame_class=ArrayFrame)
+    solution = k.find(mode='warm').solution
+    E, b = k.get_normalized_system()
+    x = np.asarray(solution, dtype=np.float64)
+    noisy = x / x[:-1].sum() + np.where(x > 0, 0, 1e-7)
+    noisy[-1] = 0
+    rebuilt = reconstruct_integer_solution(noisy, E, b, max_denominator=1, support=np.flatnonzero(x))
+    assert rebuilt is not None and k.verify_solution(rebuilt).passed
+
+
+def test_milp_fallback_is_silent_and_limited(capfd):
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    k.frame.grow_to_shape([3, 5])
+    E, b = k.get_normalized_system()
+    statistics = {}
+    solution = find_integer_solution([1] * E.shape[1], E, b, 'milp', statistics=statistics, time_limit=10)
+    assert statistics['used_milp'] and statistics['status'] == 'solved'
+    assert k.verify_solution(solution).passed
+    assert capfd.readouterr().out == ''
+
+
+def test_find_prints_nothing(capfd):
+    k = Kirchhoff(np.array([[5, 7, 2], [3, 4, -3]]), frame_class=ArrayFrame)
+    assert k.find(max_steps=4, mode='warm')
+    assert capfd.readouterr().out == ''
+
+
+@pytest.mark.parametrize('matrix, shape', [([[1, 1], [1, -1]], [20, 20]), ([[2, 1], [1, 2]], [16, 16])])
+def test_resolve_costs_about_the_increment(matrix, shape):
+    np.random.seed(0)
+    k = Kirchhoff(np.array(matrix), frame_class=ArrayFrame)
+    k.frame.grow_to_shape(shape)
+    session = HighsSession(k)
+    assert session.solve() is not None
+    num_edges = k.frame.get_num_edges()
+    k.frame.expand(0, 1)
+    statistics = {}
+    assert session.solve(statistics) is not None and statistics['warm']
+    cold = Kirchhoff(np.array(matrix), frame_class=ArrayFrame)
+    cold.frame.grow_to_shape(k.frame.shape)
+    cold_statistics = {}
+    HighsSession(cold).solve(cold_statistics)
+    assert statistics['iterations'] <= k.frame.get_num_edges() - num_edges
+    assert statistics['iterations'] < cold_statistics['iterations'] / 4
+
+
+def test_no_warm_start_after_infeasible():
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    session = HighsSession(k)
+    statistics = {}
+    assert session.solve(statistics) is None and not statistics['warm']
+    k.frame.grow_to_shape([3, 5])
+    assert session.solve(statistics) is not None and not statistics['warm']
+    assert session.solve(statistics) is not None and statistics['warm']
+
+
+def test_time_limit():
+    k = Kirchhoff(np.array([[7, 3], [2, 9]]), frame_class=ArrayFrame)
+    k.frame.grow_to_shape([16, 14])
+    statistics = {}
+    assert HighsSession(k, time_limit=0.0).solve(statistics) is None
+    assert statistics['status'] == 'failed' and not statistics['used_milp']
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import kirky
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.block_q import Frame
+from kirky.verify import get_exact_residual
+from kirky.zonotope_frame import ZonotopeFrame
+
+MATRICES = [[[2, 1], [1, 2]], [[1, -2, 3]], [[1, 1, 0], [0, 1, -1]]]
+
+
+def get_frames():
+    for frame_class in [Frame, ArrayFrame]:
+        for matrix in MATRICES:
+            k = Kirchhoff(np.array(matrix), frame_class=frame_class)
+            for _ in range(3):
+                yield k
+                k.frame.expand()
+
+
+def test_operator_matches_the_system():
+    random = np.random.RandomState(0)
+    for k in get_frames():
+        E = k.generate_sparse_linear_system()
+        operator = k.get_stencil_operator()
+        assert operator.shape == E.shape
+        x = random.randint(-5, 6, E.shape[1])
+        y = random.randint(-5, 6, E.shape[0])
+        assert np.array_equal(operator.apply(x), E @ x)
+        assert np.array_equal(operator.apply_transpose(y), E.T @ y)
+        assert np.array_equal(operator.matvec(x.astype(np.float64)), E @ x)
+        assert (operator.to_sparse() != E).nnz == 0
+
+
+def test_exact_residual():
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    k.frame.expand()
+    E = k.generate_sparse_linear_system()
+    weights = np.array([2**62 + pin for pin in range(E.shape[1])], dtype=object)
+    expected = E.toarray().astype(np.int64).astype(object) @ weights
+    assert list(k.get_stencil_operator().get_residual(weights)) == list(expected)
+    assert list(get_exact_residual(k.get_stencil_operator(), weights)) == list(expected)
+
+
+def test_only_box_frames():
+    k = Kirchhoff(np.array([[1, 1], [1, -1]]), frame_class=ZonotopeFrame)
+    with pytest.raises(ValueError):
+        k.get_stencil_operator()
+
+
+@pytest.mark.parametrize('frame_class', [Frame, ArrayFrame, ZonotopeFrame])
+def test_verify_solution_with_the_operator(frame_class, monkeypatch):
+    k = Kirchhoff(np.array([[1, 1], [1, -1]]), frame_class=frame_class)
+    solution = k.find().solution
+    monkeypatch.setattr(kirky, 'STENCIL_MIN_EDGES', 0)
+    assert k.verify_solution(solution).passed
+    broken = np.array(solution)
+    broken[np.flatnonzero(broken[:-1])[0]] += 1
+    verification = k.verify_solution(broken)
+    assert not verification.passed
+    monkeypatch.setattr(kirky, 'STENCIL_MIN_EDGES', 10**9)
+    assert k.verify_solution(broken).worst_row == verification.worst_row
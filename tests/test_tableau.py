@@ -0,0 +1,165 @@
+from fractions import Fraction
+import numpy as np
+import pytest
+from scipy.optimize import linprog
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky import tableau
+from kirky.tableau import (Tableau, IntegerTableau, PhaseOneTableau, solve_kirky, find_integer_solution,
+                           reconstruct_integer_solution, solve_on_support, is_exact_solution)
+
+MATRICES = [[[2, 1], [1, 2]], [[-3, 1], [1, 1]], [[1, 2]], [[2, 3]], [[1, -2, 3]], [[1, 1], [1, -1]]]
+
+
+def get_systems():
+    for matrix in MATRICES:
+        k = Kirchhoff(np.array(matrix), frame_class=ArrayFrame)
+        for _ in range(2):
+            E, b = k.get_normalized_system()
+            if E.shape[1] <= 64:
+                yield E, b
+            k.frame.expand()
+
+
+def is_feasible(E, b):
+    return linprog(np.zeros(E.shape[1]), A_eq=E, b_eq=b, method='highs').status == 0
+
+
+def is_exact(E, b, solution):
+    residual = E.toarray().astype(np.int64).astype(object) @ np.array(solution, dtype=object)
+    return list(residual) == [int(value) for value in b]
+
+
+def get_rows(E):
+    return [[Fraction(int(value)) for value in row[:-1]] for row in E[:-1].toarray()]
+
+
+@pytest.mark.parametrize('tableau_class', [Tableau, IntegerTableau, PhaseOneTableau])
+def test_tableaus_agree_with_highs(tableau_class):
+    for E, b in get_systems():
+        weights = solve_kirky(get_rows(E), tableau_class=tableau_class)
+        assert (weights is not None) == is_feasible(E, b)
+        if weights is not None:
+            assert min(weights) >= 0
+            assert is_exact(E, b, list(weights) + [sum(weights) - 1])
+
+
+SMALL_SYSTEMS = [
+    ([[1, 1, 0], [0, 1, 1]], [2, 3], True),
+    ([[1, -1, 0], [0, 1, -1]], [-1, -2], True),
+    ([[1, 1], [2, 2]], [1, 2], True),
+    ([[1, 1], [1, 1]], [1, 2], False),
+    ([[1, 2, 3]], [-1], False),
+    ([[1, -1], [-1, 1]], [1, 1], False),
+]
+
+
+def get_phase_one_systems():
+    for E, b in get_systems():
+        rows = get_rows(E)
+        yield [row + [Fraction(0)] for row in rows] + [[Fraction(1)] * len(rows[0]) + [Fraction(-1)]], \
+            [Fraction(int(value)) for value in b], is_feasible(E, b)
+    for rows, values, feasible in SMALL_SYSTEMS:
+        yield [[Fraction(value) for value in row] for row in rows], [Fraction(value) for value in values], feasible
+
+
+def get_explicit_phase_one(rows, values):
+    """
+    Builds the phase I tableau the way solve_kirky used to for every tableau class: rows with a
+    negative right hand side are negated and one artificial column per row is written out.
+    """
+    signs = [-1 if value < 0 else 1 for value in values]
+    rows = [[sign * value for value in row] + [Fraction(int(i == j)) for j in range(len(rows))]
+            for (i, (sign, row)) in enumerate(zip(signs, rows))]
+    values = [sign * value for (sign, value) in zip(signs, values)]
+    num_columns = len(rows[0]) - len(values)
+    objective_vector = [Fraction(0)] * num_columns + [Fraction(1)] * len(values)
+    return Tableau(objective_vector, Fraction(0), rows, values)
+
+
+def test_phase_one_matches_explicit_artificials():
+    verdicts = set()
+    for rows, values, feasible in get_phase_one_systems():
+        explicit = get_explicit_phase_one([list(row) for row in rows], list(values))
+        implicit = PhaseOneTableau([list(row) for row in rows], list(values))
+        assert explicit.solve() and implicit.solve()
+        assert implicit.get_objective_value() == explicit.get_objective_value()
+        assert (implicit.get_objective_value() == 0) == feasible
+        verdicts.add(feasible)
+        if feasible:
+            implicit.get_solution()
+            solution = implicit.solution[:len(rows[0])]
+            assert min(solution) >= 0
+            assert [sum(a * x for (a, x) in zip(row, solution)) for row in rows] == values
+    assert verdicts == {True, False}
+
+
+def test_tableau_statistics():
+    E, b = next(get_systems())
+    statistics = {}
+    solve_kirky(get_rows(E), statistics=statistics)
+    assert statistics['rule'] == 'bland' and statistics['iterations'] > 0
+
+
+@pytest.mark.parametrize('mode', ['rational', 'milp'])
+def test_find_integer_solution(mode):
+    for E, b in get_systems():
+        statistics = {}
+        solution = find_integer_solution(np.ones(E.shape[1]), E, b, mode, statistics=statistics)
+        assert (solution is not None) == is_feasible(E, b)
+        assert statistics['status'] == ('solved' if solution is not None else 'infeasible')
+        if solution is not None:
+            assert is_exact_solution(E, b, solution) and min(solution) >= 0
+
+
+def test_solve_on_support():
+    for E, b in get_systems():
+        result = linprog(np.ones(E.shape[1]), A_eq=E, b_eq=b, method='highs')
+        if result.status != 0:
+            continue
+        solution = solve_on_support(result.x, E, b)
+        assert solution is not None and min(solution) >= 0 and is_exact(E, b, solution)
+
+
+def get_lp_solution():
+    k = Kirchhoff(np.array([[7, 3], [2, 9]]), frame_class=ArrayFrame)
+    k.frame.grow_to_shape([16, 14])
+    E, b = k.get_normalized_system()
+    result = linprog(np.random.RandomState(0).random_sample(E.shape[1]), A_eq=E, b_eq=b, method='highs')
+    assert result.status == 0
+    return result.x, E, b
+
+
+def test_rational_reconstruction():
+    x, E, b = get_lp_solution()
+    solution = reconstruct_integer_solution(x, E, b)
+    assert solution.dtype == np.int64 and min(solution) >= 0 and is_exact_solution(E, b, solution)
+    assert np.array_equal(np.flatnonzero(solution[:-1]), np.flatnonzero(x[:-1] > 1e-9))
+
+
+def test_reconstruction_falls_back_to_the_support(monkeypatch):
+    x, E, b = get_lp_solution()
+    solution = reconstruct_integer_solution(x, E, b, max_denominator=1)
+    assert solution is not None and is_exact_solution(E, b, solution)
+    monkeypatch.setattr(tableau, 'EXACT_MAX_SUPPORT', 0)
+    assert reconstruct_integer_solution(x, E, b, max_denominator=1) is None
+
+
+def test_solve_on_support_limits():
+    x, E, b = get_lp_solution()
+    support = np.flatnonzero(x > 1e-9)
+    assert solve_on_support(x, E, b, max_support=len(support)) is not None
+    assert solve_on_support(x, E, b, max_support=len(support) - 1) is None
+    assert solve_on_support(x, E, b, support=support[:1]) is None
+
+
+def test_milp_fallback(monkeypatch):
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=ArrayFrame)
+    k.frame.grow_to_shape([3, 5])
+    E, b = k.get_normalized_system()
+    monkeypatch.setattr(tableau, 'EXACT_MAX_SUPPORT', 0)
+    statistics = {}
+    solution = find_integer_solution(np.ones(E.shape[1]), E, b, max_denominator=1, statistics=statistics,
+                                     time_limit=10)
+    assert statistics['used_milp'] and statistics['status'] == 'solved'
+    assert is_exact_solution(E, b, solution)
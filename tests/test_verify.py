@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from kirky import Kirchhoff
+from kirky.array_frame import ArrayFrame
+from kirky.verify import (get_exact_residual, get_left_kernel, get_pivot_columns_mod_p, get_spanning_forest,
+                          verify_cycle_space, verify_weights)
+
+E = sparse.csr_matrix([[1, -1, 0], [0, 1, -1], [2, 0, -2]])
+
+
+def test_get_exact_residual():
+    assert get_exact_residual(E, [1, 1, 1]).tolist() == [0, 0, 0]
+    assert get_exact_residual(E.astype(np.float64), np.array([3.0, 1.0, 0.0])).tolist() == [2, 1, 6]
+    weights = np.array([2**62, 2**62 + 1, 2**62], dtype=object)
+    assert get_exact_residual(E, weights).tolist() == [-1, 1, 0]
+    with pytest.raises(ValueError):
+        get_exact_residual(E * 0.5, [1, 1, 1])
+    with pytest.raises(ValueError):
+        get_exact_residual(E, np.array([1.5, 1.0, 1.0]))
+
+
+def test_verify_weights():
+    assert verify_weights(E, [2, 2, 2]).passed
+    assert not verify_weights(E, [0, 0, 0]).passed
+    assert not verify_weights(E, [1, -1, 1]).passed
+    verification = verify_weights(E, [1, 1, 0], num_null_rows=2)
+    assert not verification
+    assert (verification.worst_row, verification.worst_vertex, verification.max_violation) == (2, 1, 2)
+
+
+def test_get_spanning_forest():
+    order, parent_edges = get_spanning_forest(5, np.array([0, 1, 3]), np.array([1, 2, 4]))
+    assert sorted(order.tolist()) == list(range(5))
+    assert parent_edges.tolist() == [-1, 0, 1, -1, 2]
+
+
+def test_mod_p_and_left_kernel():
+    A = np.array([[1, 2, 0], [1, 2, 1], [0, 0, 1]])
+    assert get_pivot_columns_mod_p(A, 7) == [0, 2]
+    kernel = get_left_kernel(A[:, [0, 2]])
+    assert len(kernel) == 1
+    assert not np.any(np.array(kernel[0]) @ A)
+
+
+def test_verify_cycle_space():
+    null_matrix = [[1, 0, 0], [0, 1, 0]]
+    loops = np.zeros(3, dtype=np.int64)
+    passed = verify_cycle_space(loops, loops, [0, 1, 2], [1, 1, 0], null_matrix, 1)
+    assert passed and passed.rank == 2 and sorted(passed.cycles) == [0, 1] and passed.prime is not None
+    failed = verify_cycle_space(loops, loops, [0, 1, 2], [1, 0, 0], null_matrix, 1)
+    assert not failed and failed.rank == 1
+    assert failed.witness is not None and np.any(np.array(null_matrix) @ failed.witness)
+
+
+def test_solutions_pass_both_conditions():
+    k = Kirchhoff(np.array([[1, 1], [1, -1]]), frame_class=ArrayFrame)
+    solution = k.find().solution
+    assert k.verify_solution(solution).passed
+    assert k.verify_cycles(solution).passed
+    broken = np.array(solution)
+    broken[np.flatnonzero(broken[:-1])[0]] += 1
+    assert not k.verify_solution(broken).passed
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from scipy.optimize import linprog
+from kirky import Kirchhoff
+from kirky.helpers import get_lattice_positions
+from kirky.zonotope_frame import ZonotopeFrame, BallFrame
+
+MATRICES = [np.array([[2, 1], [1, 2]]), np.array([[1, -2, 3]]), np.array([[1, 1, 0], [0, 1, -1]]),
+            np.array([[1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, -1]])]
+
+
+def in_zonotope(position, vectors, scale):
+    """
+    Tells whether position = sum t_j v_j for some 0 <= t_j <= scale, by solving the LP directly
+    instead of going through the facets.
+    """
+    result = linprog(np.zeros(len(vectors)), A_eq=np.transpose(vectors), b_eq=position,
+                     bounds=[(0, scale)] * len(vectors), method='highs')
+    return result.status == 0
+
+
+def in_ball(position, vectors, scale):
+    return np.linalg.norm(position) <= scale * np.max(np.linalg.norm(vectors, axis=1)) + 1e-9
+
+
+def get_body(frame_class, matrix, scale):
+    vectors = np.transpose(matrix)
+    if frame_class is ZonotopeFrame:
+        test = in_zonotope
+        start = scale * np.minimum(vectors, 0).sum(axis=0) - 1
+        end = scale * np.maximum(vectors, 0).sum(axis=0) + 2
+    else:
+        test = in_ball
+        reach = int(np.ceil(scale * np.max(np.linalg.norm(vectors, axis=1)))) + 1
+        start, end = [-reach] * matrix.shape[0], [reach + 1] * matrix.shape[0]
+    box = get_lattice_positions(start, end)
+    return {tuple(position) for position in box.tolist() if test(position, vectors, scale)}
+
+
+@pytest.mark.parametrize('frame_class', [ZonotopeFrame, BallFrame])
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_vertices_are_the_body(frame_class, matrix):
+    frame = frame_class(matrix)
+    for scale in [1, 2, 3]:
+        frame.grow_to_scale(scale)
+        positions = [tuple(position) for position in frame.get_positions().tolist()]
+        assert len(set(positions)) == len(positions)
+        assert set(positions) == get_body(frame_class, matrix, scale)
+
+
+@pytest.mark.parametrize('frame_class', [ZonotopeFrame, BallFrame])
+@pytest.mark.parametrize('matrix', MATRICES)
+def test_edges_join_every_pair_in_the_body(frame_class, matrix):
+    frame = frame_class(matrix)
+    for _ in range(3):
+        positions = frame.get_positions()
+        tails, heads, ids = frame.get_edge_arrays()
+        edges = list(zip(tails.tolist(), heads.tolist(), ids.tolist()))
+        assert len(set(edges)) == len(edges)
+        index = {tuple(position): i for (i, position) in enumerate(positions.tolist())}
+        expected = set()
+        for (vector_id, vector) in enumerate(np.transpose(matrix)):
+            for (tail, position) in enumerate(positions.tolist()):
+                head = index.get(tuple(np.array(position) + vector))
+                if head is not None:
+                    expected.add((tail, head, vector_id))
+        assert set(edges) == expected
+        old_positions, old_edges = positions, edges
+        frame.expand()
+        assert np.array_equal(frame.get_positions()[:len(old_positions)], old_positions)
+        tails, heads, ids = frame.get_edge_arrays()
+        assert list(zip(tails.tolist(), heads.tolist(), ids.tolist()))[:len(old_edges)] == old_edges
+
+
+@pytest.mark.parametrize('frame_class', [ZonotopeFrame, BallFrame])
+def test_solves_a_small_matrix(frame_class):
+    k = Kirchhoff(np.array([[2, 1], [1, 2]]), frame_class=frame_class)
+    result = k.find(max_steps=6)
+    assert result.solution is not None
+    assert k.verify_solution(result.solution).passed
+    assert min(result.solution) >= 0
+
+
+def test_unknown_region():
+    with pytest.raises(ValueError):
+        ZonotopeFrame(np.array([[1, 1]]), region='cube')
+
+
+@pytest.mark.parametrize('frame_class', [ZonotopeFrame, BallFrame])
+def test_weights_are_int64(frame_class):
+    frame = frame_class(np.array([[2, 1], [1, 2]]))
+    frame.expand()
+    assert frame.get_weights().dtype == np.int64 and len(frame.get_weights()) == frame.get_num_edges()